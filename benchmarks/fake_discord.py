@@ -0,0 +1,723 @@
+"""A fake Discord gateway and REST API for driving the real bot under load.
+
+Implements the subset of Discord the bot uses: sending, editing and deleting
+messages, channel history, creating and deleting channels, DMs, app command
+sync and interactions (component clicks, modals, deferred responses and
+webhook followups). Attachments and avatars are served from the same server,
+so image downloads stay local too.
+
+Every REST call is counted per route template (``POST /channels/{channel_id}/messages``),
+and calls the fake doesn't implement are answered with 404 and counted in
+``unhandled`` so a scenario can tell when the bot started using something new.
+
+    fake = FakeDiscord(guild_id, channels, roles)
+    await fake.start()
+    fake.install()            # point discord.py's REST, gateway and CDN urls here
+    ...start the bot, then drive it with fake.click() / fake.submit_modal()
+"""
+import asyncio
+import itertools
+import json
+import secrets
+import time
+from collections import Counter
+
+import discord
+import yarl
+from aiohttp import web, WSMsgType
+
+API_PREFIX = "/api/v10"
+DISCORD_EPOCH = 1420070400000
+EPHEMERAL = 64
+LOADING = 128
+
+# Interaction callback types
+PONG, CHANNEL_MESSAGE, DEFERRED_CHANNEL_MESSAGE, DEFERRED_UPDATE, UPDATE_MESSAGE, MODAL = 1, 4, 5, 6, 7, 9
+
+# Gateway opcodes
+DISPATCH, HEARTBEAT, IDENTIFY, RESUME, REQUEST_MEMBERS, HELLO, HEARTBEAT_ACK = 0, 1, 2, 6, 8, 10, 11
+
+
+def iso_now():
+    return discord.utils.utcnow().isoformat()
+
+
+def respond(data, status=200):
+    # discord.py only decodes bodies whose content type is exactly application/json, without a charset
+    return web.Response(body=json.dumps(data).encode(), status=status, content_type="application/json")
+
+
+def error(status, message, code=0):
+    return respond({"message": message, "code": code}, status)
+
+
+class FakeInteraction:
+    """One interaction sent to the bot and everything it answered with"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.id = int(payload["id"])
+        self.token = payload["token"]
+        self.user_id = int(payload["member"]["user"]["id"])
+        self.channel_id = int(payload["channel_id"])
+        self.created = time.perf_counter()
+        # Callback body ({"type", "data"}) once the bot has responded
+        self.response = None
+        # Response message and followups, in order; edits update them in place
+        self.messages = []
+        self.updated = asyncio.Event()
+
+    @property
+    def modal(self):
+        if self.response and self.response["type"] == MODAL:
+            return self.response["data"]
+        return None
+
+    def _notify(self):
+        self.updated.set()
+
+    async def wait_for(self, check, timeout=30):
+        """First message (response or followup) for which check(message) is true"""
+        async def wait():
+            while True:
+                self.updated.clear()
+                for message in self.messages:
+                    if check(message):
+                        return message
+                await self.updated.wait()
+        return await asyncio.wait_for(wait(), timeout)
+
+    async def wait_modal(self, timeout=30):
+        async def wait():
+            while self.response is None:
+                self.updated.clear()
+                await self.updated.wait()
+            return self.modal
+        modal = await asyncio.wait_for(wait(), timeout)
+        if modal is None:
+            raise AssertionError(f"expected a modal, got callback type {self.response['type']}")
+        return modal
+
+    async def wait_reply(self, timeout=30):
+        """The first message the bot sent in answer, skipping 'thinking' placeholders"""
+        return await self.wait_for(lambda message: not message["flags"] & LOADING, timeout)
+
+
+class FakeDiscord:
+    """In-process Discord stand-in for one guild"""
+
+    def __init__(self, guild_id, channels, roles=(), latency=0.0, bot_name="Relics Bot"):
+        """channels: [(channel_id, name, type)], type 0 for text and 4 for categories;
+        roles: [(role_id, name, permissions)]"""
+        self.guild_id = guild_id
+        # REST latency added to every API call, to mimic the round trip to Discord
+        self.latency = latency
+        self.sequence = itertools.count()
+        self.bot_user = self.user_payload(self.snowflake(), bot_name, bot=True)
+        self.application_id = int(self.bot_user["id"])
+
+        self.roles = [self.role_payload(guild_id, "@everyone", 0, permissions=1024 | 2048 | 65536)]
+        self.roles += [self.role_payload(role_id, name, i + 1, permissions) for i, (role_id, name, permissions) in enumerate(roles)]
+        self.channels = {}
+        for position, (channel_id, name, channel_type) in enumerate(channels):
+            self.channels[channel_id] = self.channel_payload(channel_id, name, channel_type, position)
+
+        self.users = {int(self.bot_user["id"]): self.bot_user}
+        self.members = {int(self.bot_user["id"]): self.member_payload(self.bot_user, [])}
+        self.messages = {}
+        # channel_id -> message ids, oldest first
+        self.history = {}
+        self.blobs = {}
+        self.dm_channels = {}
+        self.interactions = {}
+        self.commands = {}
+
+        self.calls = Counter()
+        self.unhandled = Counter()
+        self.sockets = {}
+        self.ready = asyncio.Event()
+        self.runner = None
+        self.base_url = None
+        self.avatar_bytes = None
+
+    # -- payloads ---------------------------------------------------------
+
+    def snowflake(self):
+        return ((int(time.time() * 1000) - DISCORD_EPOCH) << 22) | (next(self.sequence) & 0x3FFFFF)
+
+    @staticmethod
+    def user_payload(user_id, name, bot=False, avatar=None):
+        return {
+            "id": str(user_id), "username": name, "discriminator": "0", "global_name": None,
+            "avatar": avatar, "bot": bot, "flags": 0, "public_flags": 0,
+        }
+
+    @staticmethod
+    def role_payload(role_id, name, position, permissions=0):
+        return {
+            "id": str(role_id), "name": name, "color": 0, "hoist": False, "position": position,
+            "permissions": str(permissions), "managed": False, "mentionable": False, "flags": 0,
+        }
+
+    def channel_payload(self, channel_id, name, channel_type=0, position=0, parent_id=None, overwrites=(), topic=None):
+        return {
+            "id": str(channel_id), "type": channel_type, "guild_id": str(self.guild_id), "name": name,
+            "position": position, "permission_overwrites": list(overwrites), "parent_id": parent_id,
+            "topic": topic, "nsfw": False, "rate_limit_per_user": 0, "last_message_id": None, "flags": 0,
+        }
+
+    @staticmethod
+    def member_payload(user, role_ids):
+        return {
+            "user": user, "nick": None, "roles": [str(role_id) for role_id in role_ids],
+            "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0,
+        }
+
+    def guild_payload(self):
+        return {
+            "id": str(self.guild_id), "name": "Fake Relics", "icon": None, "owner_id": self.bot_user["id"],
+            "roles": self.roles, "channels": [c for c in self.channels.values()],
+            "members": [self.members[int(self.bot_user["id"])]], "member_count": len(self.members),
+            "large": False, "unavailable": False, "joined_at": "2024-01-01T00:00:00+00:00",
+            "features": [], "emojis": [], "stickers": [], "threads": [], "presences": [], "voice_states": [],
+            "stage_instances": [], "guild_scheduled_events": [], "soundboard_sounds": [],
+            "premium_tier": 0, "verification_level": 0, "explicit_content_filter": 0,
+            "default_message_notifications": 0, "mfa_level": 0, "afk_timeout": 300, "system_channel_flags": 0,
+            "preferred_locale": "en-US", "nsfw_level": 0, "premium_progress_bar_enabled": False,
+        }
+
+    def add_member(self, name, role_ids=()):
+        """A guild member with an avatar; returns their user payload"""
+        user_id = self.snowflake()
+        user = self.user_payload(user_id, name, avatar=f"{user_id:x}")
+        self.users[user_id] = user
+        self.members[user_id] = self.member_payload(user, role_ids)
+        return user
+
+    def store_message(self, channel_id, author, body, attachments=(), flags=0, interaction=None):
+        message_id = self.snowflake()
+        message = {
+            "id": str(message_id), "channel_id": str(channel_id), "author": author,
+            "content": body.get("content") or "", "timestamp": iso_now(), "edited_timestamp": None,
+            "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+            "attachments": list(attachments), "embeds": body.get("embeds") or [],
+            "components": body.get("components") or [], "pinned": False, "type": 0,
+            "flags": flags | (body.get("flags") or 0),
+        }
+        if channel_id in self.channels:
+            message["guild_id"] = str(self.guild_id)
+        if interaction is not None:
+            message["interaction_metadata"] = {
+                "id": str(interaction.id), "type": interaction.payload["type"],
+                "user": interaction.payload["member"]["user"], "authorizing_integration_owners": {},
+            }
+        self.messages[message_id] = message
+        self.history.setdefault(channel_id, []).append(message_id)
+        return message
+
+    def store_attachment(self, channel_id, filename, data, content_type="image/png"):
+        attachment_id = self.snowflake()
+        self.blobs[attachment_id] = data
+        url = f"{self.base_url}/attachments/{channel_id}/{attachment_id}/{filename}"
+        return {
+            "id": str(attachment_id), "filename": filename, "size": len(data), "url": url,
+            "proxy_url": url, "content_type": content_type,
+        }
+
+    # -- server -----------------------------------------------------------
+
+    async def start(self, host="127.0.0.1"):
+        app = web.Application(middlewares=[self.count_calls], client_max_size=64 * 1024 * 1024)
+        api = [
+            ("GET", "/gateway/bot", self.get_gateway),
+            ("GET", "/users/@me", self.get_me),
+            ("GET", "/oauth2/applications/@me", self.get_application),
+            ("GET", "/users/{user_id}", self.get_user),
+            ("POST", "/users/@me/channels", self.create_dm),
+            ("PUT", "/applications/{application_id}/commands", self.sync_commands),
+            ("PUT", "/applications/{application_id}/guilds/{guild_id}/commands", self.sync_commands),
+            ("GET", "/guilds/{guild_id}/members/{user_id}", self.get_member),
+            ("POST", "/guilds/{guild_id}/channels", self.create_channel),
+            ("GET", "/channels/{channel_id}", self.get_channel),
+            ("PATCH", "/channels/{channel_id}", self.edit_channel),
+            ("DELETE", "/channels/{channel_id}", self.delete_channel),
+            ("PUT", "/channels/{channel_id}/permissions/{overwrite_id}", self.no_content),
+            ("DELETE", "/channels/{channel_id}/permissions/{overwrite_id}", self.no_content),
+            ("POST", "/channels/{channel_id}/typing", self.no_content),
+            ("GET", "/channels/{channel_id}/messages", self.get_history),
+            ("POST", "/channels/{channel_id}/messages", self.send_message),
+            ("GET", "/channels/{channel_id}/messages/{message_id}", self.get_message),
+            ("PATCH", "/channels/{channel_id}/messages/{message_id}", self.edit_message),
+            ("DELETE", "/channels/{channel_id}/messages/{message_id}", self.delete_message),
+            ("POST", "/channels/{channel_id}/messages/bulk-delete", self.bulk_delete),
+            ("PUT", "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me", self.no_content),
+            ("POST", "/interactions/{interaction_id}/{token}/callback", self.interaction_callback),
+            ("POST", "/webhooks/{application_id}/{token}", self.followup),
+            ("GET", "/webhooks/{application_id}/{token}/messages/{message_id}", self.get_webhook_message),
+            ("PATCH", "/webhooks/{application_id}/{token}/messages/{message_id}", self.edit_webhook_message),
+            ("DELETE", "/webhooks/{application_id}/{token}/messages/{message_id}", self.delete_webhook_message),
+        ]
+        for method, path, handler in api:
+            app.router.add_route(method, API_PREFIX + path, handler)
+        app.router.add_route("*", API_PREFIX + "/{tail:.*}", self.not_implemented)
+        app.router.add_get("/gateway", self.gateway)
+        app.router.add_get("/attachments/{channel_id}/{attachment_id}/{filename}", self.get_attachment)
+        app.router.add_get("/avatars/{user_id}/{filename}", self.get_avatar)
+
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+
+    async def close(self):
+        for ws in list(self.sockets.values()):
+            await ws.close()
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    def install(self):
+        """Point discord.py at this server instead of discord.com"""
+        discord.http.Route.BASE = self.base_url + API_PREFIX
+        discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(self.base_url.replace("http", "ws", 1) + "/gateway")
+        discord.asset.Asset.BASE = self.base_url
+
+    @web.middleware
+    async def count_calls(self, request, handler):
+        if not request.path.startswith(API_PREFIX):
+            return await handler(request)
+        resource = request.match_info.route.resource
+        template = resource.canonical[len(API_PREFIX):] if resource is not None else request.path
+        if template != "/{tail:.*}":
+            self.calls[f"{request.method} {template}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    def reset_counts(self):
+        """REST calls counted since the last reset, as a plain dict"""
+        calls, self.calls = self.calls, Counter()
+        return dict(calls.most_common())
+
+    async def not_implemented(self, request):
+        self.unhandled[f"{request.method} {request.path[len(API_PREFIX):]}"] += 1
+        return error(404, "Not implemented by FakeDiscord")
+
+    async def no_content(self, request):
+        return web.Response(status=204)
+
+    async def read_body(self, request):
+        """JSON body plus uploaded files, for both plain and multipart requests"""
+        if request.content_type != "multipart/form-data":
+            return (await request.json() if request.can_read_body else {}), []
+        body, files = {}, []
+        reader = await request.multipart()
+        while (part := await reader.next()) is not None:
+            if part.name == "payload_json":
+                body = json.loads(await part.text())
+            elif part.filename:
+                files.append((part.filename, bytes(await part.read()), part.headers.get("Content-Type", "application/octet-stream")))
+        return body, files
+
+    def attachments_for(self, channel_id, body, files, existing=()):
+        """Kept attachments (by id) followed by newly uploaded files"""
+        # New uploads are described with a filename; existing ones are listed by id alone
+        kept_ids = {str(a["id"]) for a in body.get("attachments", []) if "filename" not in a}
+        kept = [a for a in existing if a["id"] in kept_ids] if "attachments" in body else list(existing)
+        return kept + [self.store_attachment(channel_id, name, data, content_type) for name, data, content_type in files]
+
+    # -- gateway ----------------------------------------------------------
+
+    async def gateway(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        await ws.send_json({"op": HELLO, "d": {"heartbeat_interval": 41250}})
+        shard_id = None
+        state = {"seq": 0}
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                data = json.loads(msg.data)
+                op = data["op"]
+                if op == HEARTBEAT:
+                    await ws.send_json({"op": HEARTBEAT_ACK})
+                elif op == IDENTIFY:
+                    shard_id, shard_count = data["d"].get("shard", [0, 1])
+                    self.sockets[shard_id] = ws
+                    ws.shard = (shard_id, shard_count)
+                    ws.state = state
+                    guilds = [self.guild_id] if (self.guild_id >> 22) % shard_count == shard_id else []
+                    await self.send(ws, "READY", {
+                        "v": 10, "user": self.bot_user, "session_id": secrets.token_hex(16),
+                        "resume_gateway_url": str(discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY),
+                        "guilds": [{"id": str(guild_id), "unavailable": True} for guild_id in guilds],
+                        "application": {"id": str(self.application_id), "flags": 0},
+                        "shard": [shard_id, shard_count],
+                    })
+                    for _ in guilds:
+                        await self.send(ws, "GUILD_CREATE", self.guild_payload())
+                    self.ready.set()
+                elif op == RESUME:
+                    self.sockets[shard_id] = ws
+                    await self.send(ws, "RESUMED", {})
+                elif op == REQUEST_MEMBERS:
+                    request_data = data["d"]
+                    user_ids = request_data.get("user_ids")
+                    members = [m for user_id, m in self.members.items() if user_ids is None or str(user_id) in map(str, user_ids)]
+                    await self.send(ws, "GUILD_MEMBERS_CHUNK", {
+                        "guild_id": str(self.guild_id), "members": members, "chunk_index": 0, "chunk_count": 1,
+                        "nonce": request_data.get("nonce"),
+                    })
+        finally:
+            if shard_id is not None and self.sockets.get(shard_id) is ws:
+                del self.sockets[shard_id]
+        return ws
+
+    async def send(self, ws, event, data):
+        ws.state["seq"] += 1
+        await ws.send_str(json.dumps({"op": DISPATCH, "t": event, "s": ws.state["seq"], "d": data}))
+
+    async def dispatch(self, event, data):
+        """Send a gateway event to the shard that has the guild"""
+        for ws in list(self.sockets.values()):
+            shard_id, shard_count = ws.shard
+            if (self.guild_id >> 22) % shard_count == shard_id and not ws.closed:
+                await self.send(ws, event, data)
+
+    # -- users, guild and channels ----------------------------------------
+
+    async def get_gateway(self, request):
+        return respond({
+            "url": self.base_url.replace("http", "ws", 1) + "/gateway", "shards": 1,
+            "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1},
+        })
+
+    async def get_me(self, request):
+        return respond(self.bot_user)
+
+    async def get_application(self, request):
+        return respond({
+            "id": str(self.application_id), "name": self.bot_user["username"], "icon": None, "description": "",
+            "rpc_origins": [], "bot_public": False, "bot_require_code_grant": False, "bot": self.bot_user,
+            "owner": self.bot_user, "team": None, "verify_key": "", "summary": "", "flags": 0,
+        })
+
+    async def get_user(self, request):
+        user = self.users.get(int(request.match_info["user_id"]))
+        return respond(user) if user else error(404, "Unknown User", 10013)
+
+    async def get_member(self, request):
+        member = self.members.get(int(request.match_info["user_id"]))
+        return respond(member) if member else error(404, "Unknown Member", 10007)
+
+    async def create_dm(self, request):
+        recipient_id = int((await request.json())["recipient_id"])
+        if recipient_id not in self.users:
+            return error(404, "Unknown User", 10013)
+        channel_id = self.dm_channels.setdefault(recipient_id, self.snowflake())
+        return respond({
+            "id": str(channel_id), "type": 1, "recipients": [self.users[recipient_id]], "last_message_id": None,
+        })
+
+    async def sync_commands(self, request):
+        commands = await request.json()
+        synced = []
+        for command in commands:
+            key = (request.match_info.get("guild_id"), command.get("type", 1), command["name"])
+            command_id = self.commands.setdefault(key, self.snowflake())
+            synced.append({
+                "id": str(command_id), "application_id": str(self.application_id), "version": str(command_id),
+                "type": 1, "description": "", "options": [], "default_member_permissions": None,
+                "nsfw": False, **command,
+            })
+        return respond(synced)
+
+    async def create_channel(self, request):
+        body = await request.json()
+        channel_id = self.snowflake()
+        channel = self.channel_payload(
+            channel_id, body["name"], body.get("type", 0), len(self.channels), body.get("parent_id"),
+            body.get("permission_overwrites", ()), body.get("topic"),
+        )
+        self.channels[channel_id] = channel
+        await self.dispatch("CHANNEL_CREATE", channel)
+        return respond(channel)
+
+    async def get_channel(self, request):
+        channel = self.channels.get(int(request.match_info["channel_id"]))
+        return respond(channel) if channel else error(404, "Unknown Channel", 10003)
+
+    async def edit_channel(self, request):
+        channel = self.channels.get(int(request.match_info["channel_id"]))
+        if channel is None:
+            return error(404, "Unknown Channel", 10003)
+        channel.update({key: value for key, value in (await request.json()).items() if key in channel})
+        await self.dispatch("CHANNEL_UPDATE", channel)
+        return respond(channel)
+
+    async def delete_channel(self, request):
+        channel = self.channels.pop(int(request.match_info["channel_id"]), None)
+        if channel is None:
+            return error(404, "Unknown Channel", 10003)
+        for message_id in self.history.pop(int(channel["id"]), []):
+            self.messages.pop(message_id, None)
+        await self.dispatch("CHANNEL_DELETE", channel)
+        return respond(channel)
+
+    # -- messages ---------------------------------------------------------
+
+    def channel_exists(self, channel_id):
+        return channel_id in self.channels or channel_id in self.dm_channels.values()
+
+    def find_message(self, request):
+        channel_id = int(request.match_info["channel_id"])
+        message = self.messages.get(int(request.match_info["message_id"]))
+        if message is None or int(message["channel_id"]) != channel_id:
+            return None
+        return message
+
+    async def send_message(self, request):
+        channel_id = int(request.match_info["channel_id"])
+        if not self.channel_exists(channel_id):
+            return error(404, "Unknown Channel", 10003)
+        body, files = await self.read_body(request)
+        message = self.store_message(channel_id, self.bot_user, body, self.attachments_for(channel_id, body, files))
+        if channel_id in self.channels:
+            await self.dispatch("MESSAGE_CREATE", message)
+        return respond(message)
+
+    async def get_history(self, request):
+        channel_id = int(request.match_info["channel_id"])
+        if not self.channel_exists(channel_id):
+            return error(404, "Unknown Channel", 10003)
+        limit = int(request.query.get("limit", 50))
+        ids = self.history.get(channel_id, [])
+        if "before" in request.query:
+            ids = [i for i in ids if i < int(request.query["before"])]
+        if "after" in request.query:
+            ids = [i for i in ids if i > int(request.query["after"])][:limit]
+        return respond([self.messages[i] for i in reversed(ids[-limit:])])
+
+    async def get_message(self, request):
+        message = self.find_message(request)
+        return respond(message) if message else error(404, "Unknown Message", 10008)
+
+    async def edit_message(self, request):
+        message = self.find_message(request)
+        if message is None:
+            return error(404, "Unknown Message", 10008)
+        body, files = await self.read_body(request)
+        await self.apply_edit(message, body, files)
+        return respond(message)
+
+    async def apply_edit(self, message, body, files):
+        for key in ("content", "embeds", "components"):
+            if key in body:
+                message[key] = body[key] or ([] if key != "content" else "")
+        if "flags" in body and body["flags"] is not None:
+            message["flags"] = body["flags"]
+        message["flags"] &= ~LOADING
+        if "attachments" in body or files:
+            message["attachments"] = self.attachments_for(int(message["channel_id"]), body, files, message["attachments"])
+        message["edited_timestamp"] = iso_now()
+        if "guild_id" in message and not message["flags"] & EPHEMERAL:
+            await self.dispatch("MESSAGE_UPDATE", message)
+        self.notify(message)
+
+    async def delete_message(self, request):
+        message = self.find_message(request)
+        if message is None:
+            return error(404, "Unknown Message", 10008)
+        await self.remove_message(message)
+        return web.Response(status=204)
+
+    async def bulk_delete(self, request):
+        for message_id in (await request.json())["messages"]:
+            message = self.messages.get(int(message_id))
+            if message is not None:
+                await self.remove_message(message)
+        return web.Response(status=204)
+
+    async def remove_message(self, message):
+        message_id, channel_id = int(message["id"]), int(message["channel_id"])
+        self.messages.pop(message_id, None)
+        history = self.history.get(channel_id, [])
+        if message_id in history:
+            history.remove(message_id)
+        if "guild_id" in message:
+            await self.dispatch("MESSAGE_DELETE", {"id": str(message_id), "channel_id": str(channel_id), "guild_id": str(self.guild_id)})
+
+    # -- interactions -----------------------------------------------------
+
+    def notify(self, message):
+        """Wake up whoever waits on the interaction this message belongs to"""
+        metadata = message.get("interaction_metadata")
+        if metadata is not None:
+            interaction = self.interactions.get(int(metadata["id"]))
+            if interaction is not None:
+                interaction._notify()
+
+    async def interaction_callback(self, request):
+        interaction = self.interactions.get(int(request.match_info["interaction_id"]))
+        if interaction is None or interaction.token != request.match_info["token"]:
+            return error(404, "Unknown interaction", 10062)
+        if interaction.response is not None:
+            return error(400, "Interaction has already been acknowledged.", 40060)
+
+        body, files = await self.read_body(request)
+        data = body.get("data") or {}
+        callback_type = body["type"]
+        interaction.response = body
+        message = None
+        if callback_type in (CHANNEL_MESSAGE, DEFERRED_CHANNEL_MESSAGE):
+            flags = data.get("flags") or 0
+            if callback_type == DEFERRED_CHANNEL_MESSAGE:
+                flags |= LOADING
+            message = self.store_message(
+                interaction.channel_id, self.bot_user, data,
+                self.attachments_for(interaction.channel_id, data, files), flags=flags, interaction=interaction,
+            )
+            interaction.messages.append(message)
+        elif callback_type in (DEFERRED_UPDATE, UPDATE_MESSAGE):
+            # A component interaction's original response is the message the component is on
+            source = interaction.payload.get("message")
+            message = source and self.messages.get(int(source["id"]))
+            if message is not None:
+                interaction.messages.append(message)
+                if callback_type == UPDATE_MESSAGE:
+                    await self.apply_edit(message, data, files)
+        interaction._notify()
+
+        response = {
+            "interaction": {
+                "id": str(interaction.id), "type": interaction.payload["type"],
+                "response_message_id": message["id"] if message else None,
+                "response_message_loading": callback_type == DEFERRED_CHANNEL_MESSAGE,
+                "response_message_ephemeral": bool(message and message["flags"] & EPHEMERAL),
+            },
+        }
+        if message is not None:
+            response["resource"] = {"type": callback_type, "message": message}
+        return respond(response)
+
+    def interaction_for_token(self, request):
+        for interaction in self.interactions.values():
+            if interaction.token == request.match_info["token"]:
+                return interaction
+        return None
+
+    def webhook_message(self, interaction, message_id):
+        if message_id == "@original":
+            return interaction.messages[0] if interaction.messages else None
+        message = self.messages.get(int(message_id))
+        return message if message in interaction.messages else None
+
+    async def followup(self, request):
+        interaction = self.interaction_for_token(request)
+        if interaction is None:
+            return error(404, "Unknown Webhook", 10015)
+        body, files = await self.read_body(request)
+        # A followup to a deferred response replaces the 'thinking' message
+        original = interaction.messages[0] if interaction.messages else None
+        if original is not None and original["flags"] & LOADING:
+            await self.apply_edit(original, body, files)
+            return respond(original)
+        message = self.store_message(
+            interaction.channel_id, self.bot_user, body,
+            self.attachments_for(interaction.channel_id, body, files), interaction=interaction,
+        )
+        interaction.messages.append(message)
+        interaction._notify()
+        return respond(message)
+
+    async def get_webhook_message(self, request):
+        interaction = self.interaction_for_token(request)
+        message = interaction and self.webhook_message(interaction, request.match_info["message_id"])
+        return respond(message) if message else error(404, "Unknown Message", 10008)
+
+    async def edit_webhook_message(self, request):
+        interaction = self.interaction_for_token(request)
+        message = interaction and self.webhook_message(interaction, request.match_info["message_id"])
+        if not message:
+            return error(404, "Unknown Message", 10008)
+        body, files = await self.read_body(request)
+        await self.apply_edit(message, body, files)
+        return respond(message)
+
+    async def delete_webhook_message(self, request):
+        interaction = self.interaction_for_token(request)
+        message = interaction and self.webhook_message(interaction, request.match_info["message_id"])
+        if not message:
+            return error(404, "Unknown Message", 10008)
+        await self.remove_message(message)
+        return web.Response(status=204)
+
+    # -- CDN --------------------------------------------------------------
+
+    async def get_attachment(self, request):
+        data = self.blobs.get(int(request.match_info["attachment_id"]))
+        if data is None:
+            return web.Response(status=404)
+        return web.Response(body=data, content_type="application/octet-stream")
+
+    async def get_avatar(self, request):
+        if self.avatar_bytes is None:
+            return web.Response(status=404)
+        return web.Response(body=self.avatar_bytes, content_type="image/png")
+
+    # -- driving the bot --------------------------------------------------
+
+    async def interact(self, user, interaction_type, data, channel_id, message=None):
+        """Send an INTERACTION_CREATE as ``user`` and return its FakeInteraction"""
+        member = dict(self.members[int(user["id"])], permissions="0")
+        payload = {
+            "id": str(self.snowflake()), "application_id": str(self.application_id), "type": interaction_type,
+            "token": secrets.token_urlsafe(32), "version": 1, "guild_id": str(self.guild_id),
+            "channel_id": str(channel_id), "channel": self.channels[channel_id], "member": member,
+            "data": data, "app_permissions": "8", "locale": "en-US", "guild_locale": "en-US",
+            "entitlements": [], "authorizing_integration_owners": {"0": str(self.guild_id)}, "context": 0,
+            "attachment_size_limit": 10 * 1024 * 1024,
+        }
+        if message is not None:
+            payload["message"] = message
+        interaction = FakeInteraction(payload)
+        self.interactions[interaction.id] = interaction
+        await self.dispatch("INTERACTION_CREATE", payload)
+        return interaction
+
+    async def click(self, user, message, label=None, custom_id=None):
+        """Press a button on a message, found by label or custom_id"""
+        message = self.messages.get(int(message["id"]), message)
+        for row in message["components"]:
+            for component in row.get("components", []):
+                if component.get("type") == 2 and (component.get("label") == label if label else component.get("custom_id") == custom_id):
+                    data = {"custom_id": component["custom_id"], "component_type": 2}
+                    return await self.interact(user, 3, data, int(message["channel_id"]), message)
+        raise LookupError(f"no button {label or custom_id!r} on message {message['id']}")
+
+    async def submit_modal(self, user, interaction, values):
+        """Submit the modal an interaction answered with; values are keyed by field label"""
+        modal = interaction.modal
+        components = []
+        for component in modal["components"]:
+            if component["type"] == 18:
+                # Label wrapping a single input
+                field = component["component"]
+                value = values.get(component["label"], "")
+                components.append({"type": 18, "component": {"type": field["type"], "custom_id": field["custom_id"], "value": value}})
+            else:
+                row = [{"type": field["type"], "custom_id": field["custom_id"], "value": values.get(field.get("label"), "")}
+                       for field in component["components"]]
+                components.append({"type": component["type"], "components": row})
+        data = {"custom_id": modal["custom_id"], "components": components}
+        return await self.interact(user, 5, data, interaction.channel_id)
+
+    async def post_as(self, user, channel_id, content="", files=()):
+        """A member sends a message, optionally with (filename, bytes) attachments"""
+        attachments = [self.store_attachment(channel_id, name, data) for name, data in files]
+        message = self.store_message(channel_id, user, {"content": content}, attachments)
+        message["member"] = {k: v for k, v in self.members[int(user["id"])].items() if k != "user"}
+        await self.dispatch("MESSAGE_CREATE", message)
+        return message
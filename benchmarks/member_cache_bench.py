@@ -0,0 +1,146 @@
+"""Memory benchmark for the CACHE_POLICY configurations.
+
+Builds a synthetic guild the way discord.py does from GUILD_CREATE and
+member chunks, then replays a day of trading activity through
+MemberResolver, and reports members cached and traced Python memory per
+policy as JSON.
+
+Usage:
+    python -m benchmarks.member_cache_bench --members 50000 --traders 800
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+GUILD_ID = 1300000000000000000
+BOT_ID = 1300000000000000001
+FIRST_MEMBER_ID = 1310000000000000000
+
+
+def role_payload(role_id, name, position):
+    return {
+        "id": str(role_id), "name": name, "color": 0, "hoist": False, "position": position,
+        "permissions": "0", "managed": False, "mentionable": False, "flags": 0,
+    }
+
+
+def member_payload(user_id, role_ids=()):
+    return {
+        "user": {
+            "id": str(user_id), "username": f"trader{user_id % 100000}", "discriminator": "0",
+            "global_name": None, "avatar": None,
+        },
+        "nick": None,
+        "roles": [str(role_id) for role_id in role_ids],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def make_state(policy):
+    import discord
+    from discord.state import ConnectionState
+    from cogs.member_cache import gateway_options
+
+    state = ConnectionState(dispatch=lambda *args: None, handlers={}, hooks={}, http=None, **gateway_options(policy))
+    state._get_client = lambda: None
+    state.user = discord.ClientUser(state=state, data={
+        "id": str(BOT_ID), "username": "bench-bot", "discriminator": "0", "avatar": None,
+        "bot": True, "verified": True, "mfa_enabled": False, "flags": 0,
+    })
+    return state
+
+
+def run_policy(policy, member_count, traders, staff, interactions, seed=1):
+    import discord
+    from cogs.member_cache import CACHE_POLICIES, MemberResolver
+
+    random.seed(seed)
+    roles = [
+        role_payload(GUILD_ID, "@everyone", 0),
+        role_payload(GUILD_ID + 10, "Trusted", 1),
+        role_payload(GUILD_ID + 11, "Moderator", 2),
+        role_payload(GUILD_ID + 12, "Admin", 3),
+    ]
+    member_ids = [FIRST_MEMBER_ID + i for i in range(member_count)]
+    staff_ids = set(member_ids[:staff])
+    trader_ids = member_ids[staff:staff + traders]
+    staff_list = sorted(staff_ids)
+
+    def payload_for(user_id):
+        role_ids = (GUILD_ID + 12,) if user_id in staff_ids else (GUILD_ID + 10,) if user_id % 3 == 0 else ()
+        return member_payload(user_id, role_ids)
+
+    state = make_state(policy)
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+
+    # GUILD_CREATE only carries the bot itself for large guilds
+    guild = discord.Guild(data={
+        "id": str(GUILD_ID), "name": "Bench", "roles": roles, "emojis": [], "stickers": [],
+        "features": [], "member_count": member_count, "owner_id": str(member_ids[0]),
+        "members": [member_payload(BOT_ID)],
+    }, state=state)
+
+    if CACHE_POLICIES[policy]["cache_members"]:
+        # What chunk_guilds_at_startup loads: every member
+        for user_id in member_ids:
+            guild._add_member(discord.Member(data=payload_for(user_id), guild=guild, state=state))
+
+    # Members the bot sees through interactions during the day
+    resolver = MemberResolver()
+    for _ in range(interactions):
+        user_id = random.choice(trader_ids) if random.random() < 0.9 else random.choice(staff_list)
+        if resolver.get(guild, user_id) is None:
+            resolver.remember(discord.Member(data=payload_for(user_id), guild=guild, state=state))
+
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    traced = sum(stat.size_diff for stat in snapshot.compare_to(baseline, "filename"))
+
+    return {
+        "members_in_guild": member_count,
+        "discord_cached_members": len(guild._members),
+        "resolver_members": len(resolver),
+        "traced_mb": round(traced / 1024 / 1024, 2),
+        "intents": {name: getattr(state._intents, name) for name in ("members", "message_content", "presences")},
+    }
+
+
+def run_isolated(*args):
+    """One policy per process so allocations from the previous run don't count"""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_policy, args)
+
+
+def main(argv=None):
+    from cogs.member_cache import CACHE_POLICIES
+
+    parser = argparse.ArgumentParser(description="Compare member cache memory per CACHE_POLICY")
+    parser.add_argument("--members", type=int, default=50000)
+    parser.add_argument("--traders", type=int, default=800)
+    parser.add_argument("--staff", type=int, default=15)
+    parser.add_argument("--interactions", type=int, default=20000)
+    parser.add_argument("--policies", nargs="+", choices=list(CACHE_POLICIES), default=list(CACHE_POLICIES))
+    args = parser.parse_args(argv)
+
+    results = {}
+    for policy in args.policies:
+        print(f"Running {policy}...", file=sys.stderr)
+        results[policy] = run_isolated(policy, args.members, args.traders, args.staff, args.interactions)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""Offline rendering benchmarks for EmbedGenerator.
+
+Runs each render path against the real templates with fake users, a local
+avatar server and synthetic phone-sized screenshots, and reports per-stage
+latency percentiles, peak RSS and output size as JSON.
+
+Usage:
+    python -m benchmarks.render_bench --iterations 20 --output bench.json
+    python -m benchmarks.render_bench --compare bench.json --threshold 15
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+
+from PIL import Image
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+SCENARIOS = (
+    "listing_main",
+    "showcase_1",
+    "showcase_2",
+    "showcase_3",
+    "showcase_6",
+    "showcase_10",
+    "gp_buyer",
+    "gp_seller",
+)
+
+# Stages recorded by EmbedGenerator.stage(); text layout is whatever is left over
+MEASURED_STAGES = ("decode", "zone_lookup", "paste", "encode", "avatar_download")
+
+
+class FakeAsset:
+    def __init__(self, url):
+        self.url = url
+
+    def __str__(self):
+        return self.url
+
+    def with_size(self, size):
+        # The bench avatar server always serves the same image
+        return self
+
+
+class FakeUser:
+    def __init__(self, avatar_url, user_id=123456789012345678, display_name="Bench Trader ⚔️"):
+        self.id = user_id
+        self.display_name = display_name
+        self.display_avatar = FakeAsset(avatar_url)
+        self.avatar = FakeAsset(avatar_url)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples):
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def make_avatar_bytes():
+    avatar = Image.radial_gradient('L').resize((256, 256)).convert('RGB')
+    buffer = io.BytesIO()
+    avatar.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def make_screenshot_bytes(size=(3024, 4032)):
+    """A noisy phone-sized JPEG, so decode cost resembles a real upload"""
+    bands = [Image.effect_noise(size, 40 + 20 * i) for i in range(3)]
+    buffer = io.BytesIO()
+    Image.merge('RGB', bands).save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def make_vouch_db():
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE vouches (
+            user_id TEXT PRIMARY KEY,
+            total_stars INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            comments TEXT
+        )
+    ''')
+    conn.execute("INSERT INTO vouches VALUES (?, ?, ?, ?)", ("123456789012345678", 240, 50, "[]"))
+    conn.commit()
+    conn.close()
+    return path
+
+
+async def start_avatar_server(avatar_bytes):
+    async def avatar(request):
+        return web.Response(body=avatar_bytes, content_type="image/png")
+
+    app = web.Application()
+    app.router.add_get("/avatar.png", avatar)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/avatar.png"
+
+
+def build_job(scenario, generator, user, screenshots):
+    if scenario == "listing_main":
+        return lambda: generator.generate_listing_image(
+            "Main", user, "JAGEX ACCOUNT | NO BANS",
+            "Full graceful\nFire cape\nDragon defender\nMA2 cape",
+            "Quest cape\n99 strength\nBarrows gloves\nVoid set",
+            "250", "USD"
+        )
+    if scenario.startswith("showcase_"):
+        count = int(scenario.split("_")[1])
+        return lambda: generator.generate_image_template(screenshots[:count])
+    if scenario.startswith("gp_"):
+        gp_type = "BUYING" if scenario == "gp_buyer" else "SELLING"
+        return lambda: generator.generate_gp_listing_image(gp_type, user, "0.18", "2B", "Crypto")
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+async def run_scenario(scenario, iterations, warmup):
+    from cogs.embed_generator import EmbedGenerator
+    from cogs.reputation import ReputationCache
+
+    count = int(scenario.split("_")[1]) if scenario.startswith("showcase_") else 0
+    screenshots = [make_screenshot_bytes() for _ in range(count)]
+    runner, avatar_url = await start_avatar_server(make_avatar_bytes())
+    vouch_db = make_vouch_db()
+    baseline_rss = peak_rss_mb()
+
+    try:
+        generator = EmbedGenerator()
+        generator.reputation = ReputationCache(vouch_db)
+        generator.reputation.load()
+        user = FakeUser(avatar_url)
+        job = build_job(scenario, generator, user, screenshots)
+
+        totals = []
+        stages = {name: [] for name in MEASURED_STAGES + ("text_layout",)}
+        output_bytes = 0
+
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for i in range(warmup + iterations):
+                generator.stage_timings = {}
+                start = time.perf_counter()
+                buffer = await job()
+                elapsed = time.perf_counter() - start
+                if i < warmup:
+                    continue
+
+                totals.append(elapsed)
+                measured = 0.0
+                for name in MEASURED_STAGES:
+                    value = generator.stage_timings.get(name, 0.0)
+                    stages[name].append(value)
+                    measured += value
+                stages["text_layout"].append(max(0.0, elapsed - measured))
+                output_bytes = len(buffer.getvalue())
+    finally:
+        await runner.cleanup()
+        os.remove(vouch_db)
+
+    return {
+        "iterations": iterations,
+        "total": summarize(totals),
+        "stages": {name: summarize(samples) for name, samples in stages.items()},
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss_mb(),
+        "output_bytes": output_bytes,
+    }
+
+
+def _scenario_worker(scenario, iterations, warmup, queue):
+    queue.put(asyncio.run(run_scenario(scenario, iterations, warmup)))
+
+
+def run_isolated(scenario, iterations, warmup):
+    """Run one scenario in a fresh process so peak RSS belongs to that scenario alone"""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_scenario_worker, args=(scenario, iterations, warmup, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Return scenarios whose p95 total grew more than threshold percent over baseline"""
+    regressions = []
+    for scenario, result in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous:
+            continue
+        old_p95 = previous["total"]["p95_ms"]
+        new_p95 = result["total"]["p95_ms"]
+        if old_p95 and (new_p95 - old_p95) / old_p95 * 100 > threshold:
+            regressions.append((scenario, old_p95, new_p95))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark EmbedGenerator render paths")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON from a previous run")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Allowed p95 regression in percent when using --compare")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": sys.version.split()[0],
+        "pillow": Image.__version__,
+        "scenarios": {},
+    }
+    for scenario in args.scenarios:
+        print(f"Running {scenario}...", file=sys.stderr)
+        results["scenarios"][scenario] = run_isolated(scenario, args.iterations, args.warmup)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for scenario, old_p95, new_p95 in regressions:
+            print(f"❌ {scenario}: p95 {old_p95:.1f}ms -> {new_p95:.1f}ms", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,388 @@
+"""Load scenarios for the trading flows, run against FakeDiscord.
+
+Starts the real bot (main.CustomBot with every cog) against the fake gateway
+and REST server in benchmarks/fake_discord.py, then drives it the way members
+do: pressing the listing buttons, filling in modals, uploading screenshots and
+opening trade tickets. The nightly cleanup scenario seeds old listings and
+runs the daily cleanup through the job queue. The carousel scenario has
+viewers flip through a listing's screenshots with bursts of clicks.
+
+For each flow it reports throughput, end-to-end latency percentiles (from the
+first click to the bot's final reply) and the REST calls the flow made, per
+route, as JSON. Every scenario runs in its own process with a fresh data
+directory. Members and the bot share one event loop, so absolute throughput
+is a lower bound; compare runs against each other.
+
+Usage:
+    python -m benchmarks.trade_load --accounts 500 --tickets 200 --cleanup 5000
+    python -m benchmarks.trade_load --scenarios gp --gp 300 --concurrency 100 --rest-latency 80
+    python -m benchmarks.trade_load --scenarios carousel --viewers 200 --clicks 5
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.render_bench import summarize, peak_rss_mb, make_avatar_bytes, make_screenshot_bytes
+
+SCENARIOS = ("accounts", "gp", "tickets", "cleanup", "carousel")
+
+GUILD_ID = 1300000000000000000
+CREATE_TRADE_CHANNEL = 1395778950353129472
+PUBLIC_GP_CHANNEL = 1393727911743193239
+PUBLIC_MAIN_CHANNEL = 1393407626490024038
+TICKETS_CATEGORY = 1307491683461763132
+
+# Final replies of each flow; anything else the bot sends along the way is progress
+FINAL_REPLY = ("✅", "❌", "⏳", "📨")
+
+
+def guild_channels():
+    from config import CHANNELS
+
+    channels = [(TICKETS_CATEGORY, "tickets", 4)]
+    for tier in ("trusted", "public"):
+        for name, channel_id in CHANNELS[tier].items():
+            channels.append((channel_id, f"{tier}-{name}", 0))
+    for name in ("create_trade", "archive", "vouch_post"):
+        channels.append((CHANNELS[name], name.replace("_", "-"), 0))
+    return channels
+
+
+def is_final(message):
+    return message["content"].startswith(FINAL_REPLY)
+
+
+def is_success(reply):
+    return reply["content"].startswith(("✅", "📨"))
+
+
+def button_id(message, suffix):
+    """custom_id of the first button on a message whose custom_id ends with suffix"""
+    for row in message["components"]:
+        for component in row.get("components", []):
+            if component.get("custom_id", "").endswith(suffix):
+                return component["custom_id"]
+    return None
+
+
+def listing_id_of(message):
+    """Listing id from the screenshots button of a posted account listing, or None"""
+    for row in message["components"]:
+        for component in row.get("components", []):
+            if component.get("custom_id", "").startswith("photos_"):
+                return component["custom_id"].split("_")[1]
+    return None
+
+
+def footer(message):
+    embeds = message["embeds"]
+    return embeds[0].get("footer", {}).get("text") if embeds else None
+
+
+class Harness:
+    """The bot, the fake Discord it talks to and the members driving it"""
+
+    def __init__(self, args):
+        self.args = args
+        self.fake = None
+        self.bot = None
+        self.bot_task = None
+        self.buttons = None
+
+    async def start(self):
+        self.fake = FakeDiscord(
+            GUILD_ID, guild_channels(),
+            roles=[(GUILD_ID + 1, "Moderator", 8), (GUILD_ID + 2, "Admin", 8), (GUILD_ID + 3, "Trusted Trader", 0)],
+            latency=self.args["rest_latency"] / 1000,
+        )
+        self.fake.avatar_bytes = make_avatar_bytes()
+        await self.fake.start()
+        self.fake.install()
+
+        # Imported here so config picks up this process's DATA_DIR and worker counts
+        from main import CustomBot
+        from cogs.listings import ListingButtonsView
+
+        self.bot = CustomBot()
+        self.bot_task = asyncio.create_task(self.bot.start("fake-token"))
+        ready = asyncio.create_task(self.bot.wait_until_ready())
+        await asyncio.wait([ready, self.bot_task], timeout=60, return_when=asyncio.FIRST_COMPLETED)
+        if not ready.done():
+            ready.cancel()
+            raise RuntimeError("bot did not become ready") from (self.bot_task.exception() if self.bot_task.done() else None)
+
+        # Don't bill template decoding to the first members
+        listing_cog = self.bot.get_cog("Listings")
+        while listing_cog.prewarm_task is None:
+            await asyncio.sleep(0.05)
+        await listing_cog.prewarm_task
+
+        message = await self.bot.get_channel(CREATE_TRADE_CHANNEL).send("Choose what you want to list:", view=ListingButtonsView())
+        self.buttons = self.fake.messages[message.id]
+
+    async def close(self):
+        await self.bot.close()
+        await asyncio.gather(self.bot_task, return_exceptions=True)
+        await self.fake.close()
+
+    def members(self, count, prefix):
+        return [self.fake.add_member(f"{prefix}{i}") for i in range(count)]
+
+    # -- flows ------------------------------------------------------------
+
+    async def list_account(self, user, screenshots):
+        fake = self.fake
+        step = await fake.click(user, self.buttons, custom_id="list_account")
+        step = await fake.click(user, await step.wait_reply(), label="Main")
+        step = await fake.click(user, await step.wait_reply(), label="Jagex")
+        step = await fake.click(user, await step.wait_reply(), label="No Bans")
+        await step.wait_modal()
+        submit = await fake.submit_modal(user, step, {
+            "Left Side Achievements/Items": "Full graceful\nFire cape\nDragon defender\nMA2 cape",
+            "Right Side Achievements/Items": "Quest cape\n99 strength\nBarrows gloves\nVoid set",
+            "Price / Value": "250",
+        })
+        await submit.wait_for(lambda m: m["content"].startswith("📸 Please upload") or is_final(m))
+        await fake.post_as(user, CREATE_TRADE_CHANNEL, files=[(f"screenshot{i}.jpg", data) for i, data in enumerate(screenshots)])
+        return await submit.wait_for(is_final, timeout=120)
+
+    async def list_gp(self, user):
+        fake = self.fake
+        step = await fake.click(user, self.buttons, custom_id="list_gp")
+        step = await fake.click(user, await step.wait_reply(), label="SELLING")
+        await step.wait_modal()
+        submit = await fake.submit_modal(user, step, {"Price per M": "0.18", "Amount": "2B", "Payment Method": "Crypto"})
+        return await submit.wait_for(is_final, timeout=120)
+
+    async def open_ticket(self, buyer, listing):
+        lister_id = listing["components"][0]["components"][0]["custom_id"].split("_")[1]
+        step = await self.fake.click(buyer, listing, custom_id=f"buy_{lister_id}")
+        return await step.wait_for(is_final, timeout=120)
+
+    async def browse_carousel(self, viewer, listing, clicks):
+        """Open a listing's screenshots and press next `clicks` times without waiting for the edits"""
+        opened = await self.fake.click(viewer, listing, custom_id=f"photos_{listing_id_of(listing)}")
+        carousel = await opened.wait_reply()
+        count = int(footer(carousel).split("/")[1])
+        for _ in range(clicks):
+            await self.fake.click(viewer, carousel, custom_id=button_id(self.fake.messages[int(carousel["id"])], "_next"))
+        expected = f"Image {clicks % count + 1}/{count}"
+        return await opened.wait_for(lambda message: footer(message) == expected, timeout=60)
+
+    async def run_flow(self, name, flows, ok=is_success):
+        """Run coroutine factories with at most --concurrency in flight; returns the flow's report"""
+        semaphore = asyncio.Semaphore(self.args["concurrency"])
+        latencies, errors = [], []
+
+        async def one(flow):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    reply = await flow()
+                except Exception as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+                    return
+                if ok(reply):
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors.append(reply["content"][:200])
+
+        self.fake.reset_counts()
+        start = time.perf_counter()
+        await asyncio.gather(*(one(flow) for flow in flows))
+        return name, self.report(latencies, errors, time.perf_counter() - start)
+
+    def report(self, latencies, errors, seconds):
+        calls = self.fake.reset_counts()
+        return {
+            "count": len(latencies) + len(errors),
+            "ok": len(latencies),
+            "errors": len(errors),
+            "error_samples": sorted(set(errors))[:5],
+            "seconds": round(seconds, 3),
+            "throughput_per_s": round(len(latencies) / seconds, 2) if seconds else 0.0,
+            "latency": summarize(latencies),
+            "rest_calls": calls,
+            "rest_total": sum(calls.values()),
+            "unhandled_routes": dict(self.fake.unhandled),
+        }
+
+    # -- scenarios --------------------------------------------------------
+
+    async def accounts(self):
+        screenshot = make_screenshot_bytes((1170, 2532))
+        users = self.members(self.args["accounts"], "seller")
+        return [await self.run_flow("account_listing", [lambda u=u: self.list_account(u, [screenshot]) for u in users])]
+
+    async def gp(self):
+        users = self.members(self.args["gp"], "gp")
+        return [await self.run_flow("gp_listing", [lambda u=u: self.list_gp(u) for u in users])]
+
+    async def tickets(self):
+        # Listings to buy from are posted first, outside the measurement
+        listers = self.members(self.args["listers"], "lister")
+        await asyncio.gather(*(self.list_gp(lister) for lister in listers))
+        lister_ids = {lister["id"] for lister in listers}
+        listings = [
+            message for message in map(self.fake.messages.get, self.fake.history.get(PUBLIC_GP_CHANNEL, []))
+            if message and message["components"]
+            and message["components"][0]["components"][0]["custom_id"].split("_")[1] in lister_ids
+        ]
+        if not listings:
+            raise RuntimeError("no GP listings were posted to open tickets on")
+
+        buyers = self.members(self.args["tickets"], "buyer")
+        flows = [lambda b=b, i=i: self.open_ticket(b, listings[i % len(listings)]) for i, b in enumerate(buyers)]
+        return [await self.run_flow("ticket_open", flows)]
+
+    async def carousel(self):
+        # One listing with three screenshots, posted outside the measurement
+        lister = self.members(1, "lister")[0]
+        await self.list_account(lister, [make_screenshot_bytes((1170, 2532))] * 3)
+        listing = next((
+            message for message in map(self.fake.messages.get, reversed(self.fake.history.get(PUBLIC_MAIN_CHANNEL, [])))
+            if message and listing_id_of(message)
+        ), None)
+        if listing is None:
+            raise RuntimeError("no account listing with screenshots was posted")
+
+        viewers = self.members(self.args["viewers"], "viewer")
+        clicks = self.args["clicks"]
+        flows = [lambda v=v: self.browse_carousel(v, listing, clicks) for v in viewers]
+        return [await self.run_flow("carousel_browse", flows, ok=lambda reply: True)]
+
+    async def cleanup(self):
+        from cogs import listings
+        from cogs.jobs import job_queue
+
+        count = self.args["cleanup"]
+        listers = self.members(max(1, count // 20), "stale")
+        listing_data = {
+            'gp_type': 'SELLING', 'price': '0.18', 'amount': '2B',
+            'price_value': 0.18, 'amount_value': 2_000_000_000, 'payment_method': 'Crypto',
+        }
+        rows = []
+        for i in range(count):
+            lister = listers[i % len(listers)]
+            message = self.fake.store_message(PUBLIC_GP_CHANNEL, self.fake.bot_user, {"content": ""})
+            rows.append((int(lister["id"]), PUBLIC_GP_CHANNEL, int(message["id"])))
+
+        def seed():
+            for user_id, channel_id, message_id in rows:
+                listings.store_listing(user_id, channel_id, message_id, None, b"", None, listing_data)
+            stale = datetime.now() - timedelta(days=11)
+            with sqlite3.connect(listings.DB_PATH) as conn:
+                conn.execute("UPDATE listings SET created_at = ?, last_interaction = ?", (stale, stale))
+        await asyncio.to_thread(seed)
+
+        self.fake.reset_counts()
+        start = time.perf_counter()
+        await self.bot.daily_cleanup()
+        expected = 1 + 2 * count  # the cleanup job, then one expiry and one DM per listing
+        while True:
+            counts, _ = await asyncio.to_thread(job_queue.stats)
+            finished = counts.get("done", 0) + counts.get("failed", 0)
+            if finished >= expected and not counts.get("pending") and not counts.get("running"):
+                break
+            await asyncio.sleep(0.1)
+        seconds = time.perf_counter() - start
+
+        with sqlite3.connect(job_queue.db_path) as conn:
+            jobs = conn.execute("SELECT kind, status, last_error, updated_at - created_at FROM jobs").fetchall()
+        expired = [elapsed for kind, status, _, elapsed in jobs if kind == "listing_expire" and status == "done"]
+        errors = [f"{kind}: {error}" for kind, status, error, _ in jobs if status == "failed"]
+        result = self.report(expired, errors, seconds)
+        result["jobs"] = {
+            kind: summarize([elapsed for k, status, _, elapsed in jobs if k == kind and status == "done"])
+            for kind in ("listing_cleanup", "listing_expire", "dm")
+        }
+        return [("nightly_cleanup", result)]
+
+
+async def run_scenario(scenario, args):
+    harness = Harness(args)
+    await harness.start()
+    try:
+        flows = await getattr(harness, scenario)()
+    finally:
+        await harness.close()
+    return {"flows": dict(flows), "peak_rss_mb": peak_rss_mb()}
+
+
+def _scenario_worker(scenario, args, queue):
+    data_dir = tempfile.mkdtemp(prefix="trade_load_")
+    # Set before the bot's modules are imported; config reads them once
+    os.environ.update({
+        "DATA_DIR": data_dir,
+        "METRICS_PORT": "0",
+        "CACHE_POLICY": args["cache_policy"],
+        "RENDER_CONCURRENCY": str(args["render_concurrency"]),
+        "JOB_WORKERS": str(args["job_workers"]),
+    })
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    try:
+        queue.put(asyncio.run(run_scenario(scenario, args)))
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def run_isolated(scenario, args):
+    """Run one scenario in a fresh process with its own databases"""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_scenario_worker, args=(scenario, args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive the bot's trading flows against a fake Discord")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--accounts", type=int, default=50, help="members listing an account")
+    parser.add_argument("--gp", type=int, default=50, help="members listing GP")
+    parser.add_argument("--tickets", type=int, default=50, help="trade tickets opened")
+    parser.add_argument("--listers", type=int, default=10, help="GP listings the tickets are opened on")
+    parser.add_argument("--cleanup", type=int, default=500, help="stale listings for the nightly cleanup")
+    parser.add_argument("--viewers", type=int, default=50, help="members browsing a listing's screenshots")
+    parser.add_argument("--clicks", type=int, default=5, help="next presses per viewer, sent back to back")
+    parser.add_argument("--concurrency", type=int, default=50, help="members acting at the same time")
+    parser.add_argument("--rest-latency", type=float, default=0.0, help="milliseconds added to every REST call")
+    parser.add_argument("--render-concurrency", type=int, default=4)
+    parser.add_argument("--job-workers", type=int, default=4)
+    parser.add_argument("--cache-policy", default="lean")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    params = {key: value for key, value in vars(args).items() if key not in ("scenarios", "output")}
+    results = {"params": params, "scenarios": {}}
+    for scenario in args.scenarios:
+        results["scenarios"][scenario] = run_isolated(scenario, params)
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 1 if any("error" in result for result in results["scenarios"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+from PIL import Image, ImageChops, ImageDraw, ImageOps
+from collections import OrderedDict
+import functools
+import threading
+from config.layout import PFP_CONFIG
+
+# (avatar URL, side) -> finished circular tile, least recently used first
+_tiles = OrderedDict()
+_tiles_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=16)
+def circular_mask(size, supersample=PFP_CONFIG['mask_supersample']):
+    """Antialiased circle mask, drawn once per size at supersample x and box-reduced; shared, never draw on it"""
+    width, height = size
+    large = Image.new('L', (width * supersample, height * supersample), 0)
+    ImageDraw.Draw(large).ellipse((0, 0, width * supersample - 1, height * supersample - 1), fill=255)
+    return large.reduce(supersample)
+
+
+def zone_side(zone):
+    """Side of the largest square that fits in a zone"""
+    return min(zone[2] - zone[0], zone[3] - zone[1])
+
+
+def avatar_tile(avatar, side):
+    """An RGBA avatar cropped to a side x side square and cut to a circle, keeping its own transparency"""
+    # Non-square avatars are cropped rather than squashed
+    tile = ImageOps.fit(avatar, (side, side), Image.LANCZOS)
+    tile.putalpha(ImageChops.multiply(tile.getchannel('A'), circular_mask((side, side))))
+    return tile
+
+
+def cached_tile(url, side):
+    with _tiles_lock:
+        tile = _tiles.get((url, side))
+        if tile is not None:
+            _tiles.move_to_end((url, side))
+        return tile
+
+
+def remember_tile(url, side, tile, max_tiles=PFP_CONFIG['cache_size']):
+    """Keep a finished tile; avatar URLs change with the avatar, so entries never go stale"""
+    with _tiles_lock:
+        _tiles[(url, side)] = tile
+        _tiles.move_to_end((url, side))
+        while len(_tiles) > max_tiles:
+            _tiles.popitem(last=False)
+
+
+def composite_tile(template, tile, zone):
+    """Blend a tile centred in a zone of an RGBA template, in place; only the tile's square is touched"""
+    x = zone[0] + (zone[2] - zone[0] - tile.width) // 2
+    y = zone[1] + (zone[3] - zone[1] - tile.height) // 2
+    template.alpha_composite(tile, dest=(x, y))
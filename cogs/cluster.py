@@ -0,0 +1,78 @@
+import discord
+from discord.ext import commands
+from config import SHARDED, SHARD_COUNT, SHARD_IDS, CLUSTER_ID, CLUSTER_IPC_PATH, EMBED_COLOR
+from .cluster_ipc import cluster_ipc
+from .reputation import reputation
+from .gp_rates import gp_order_book
+from .jobs import job_queue
+from .logs import get_logger
+
+log = get_logger("cluster")
+
+
+def shard_options():
+    """AutoShardedBot kwargs for this process; empty when not sharded"""
+    if not SHARDED:
+        return {}
+    options = {"shard_count": SHARD_COUNT}
+    if SHARD_IDS is not None:
+        options["shard_ids"] = SHARD_IDS
+    return options
+
+
+def is_primary_cluster():
+    """Whether this process does once-per-bot work such as command sync"""
+    return CLUSTER_ID in (None, 0)
+
+
+class ClusterCog(commands.Cog):
+    """Keeps per-process caches in step with the other clusters"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        if SHARD_IDS is not None:
+            # Jobs for guilds on other clusters' shards are left to those clusters
+            job_queue.route_shards(SHARD_IDS, SHARD_COUNT)
+        if CLUSTER_IPC_PATH:
+            cluster_ipc.subscribe("reputation", self.on_reputation)
+            cluster_ipc.subscribe("gp_order", self.on_gp_order)
+            cluster_ipc.start(CLUSTER_IPC_PATH, CLUSTER_ID)
+
+    async def cog_unload(self):
+        cluster_ipc.unsubscribe("reputation", self.on_reputation)
+        cluster_ipc.unsubscribe("gp_order", self.on_gp_order)
+        await cluster_ipc.stop()
+
+    async def on_reputation(self, data):
+        # Another cluster recorded a vouch; keeps leaderboards and renders here current
+        reputation.apply_remote(data["user_id"], data["total_stars"], data["count"])
+
+    async def on_gp_order(self, data):
+        if "added" in data:
+            gp_order_book.add(*data["added"])
+        if "removed" in data:
+            gp_order_book.remove(data["removed"])
+
+    @commands.command(name="cluster")
+    @commands.has_permissions(administrator=True)
+    async def cluster(self, ctx):
+        """Show this cluster's shards and their gateway latency"""
+        embed = discord.Embed(title="🛰️ Cluster", color=EMBED_COLOR)
+        embed.add_field(name="Cluster", value=str(CLUSTER_ID if CLUSTER_ID is not None else "-"), inline=True)
+        embed.add_field(name="Shard count", value=str(self.bot.shard_count or 1), inline=True)
+        embed.add_field(name="IPC", value="connected" if cluster_ipc.writer else "off", inline=True)
+        latencies = getattr(self.bot, "latencies", None) or [(0, self.bot.latency)]
+        embed.add_field(
+            name="Shards here",
+            value="\n".join(f"`{shard_id}` {latency * 1000:.0f} ms" for shard_id, latency in latencies),
+            inline=False
+        )
+        if ctx.guild:
+            embed.set_footer(text=f"This guild is on shard {ctx.guild.shard_id}")
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(ClusterCog(bot))
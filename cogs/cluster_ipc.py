@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+from .logs import get_logger
+
+log = get_logger("cluster")
+
+
+class ClusterIPC:
+    """Messages between the cluster processes of one bot, through the launcher's hub.
+
+    Each message is one line of JSON ({"topic", "cluster", "data"}) on a
+    Unix socket. The hub forwards it to every other cluster. publish() never
+    blocks and is a no-op when the bot isn't running under the launcher, so
+    callers don't need to care whether they are clustered.
+    """
+
+    def __init__(self):
+        self.cluster_id = None
+        self.path = None
+        # topic -> [async handler(data)]
+        self.handlers = {}
+        self.loop = None
+        self.writer = None
+        self.task = None
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def subscribe(self, topic, handler):
+        self.handlers.setdefault(topic, []).append(handler)
+
+    def unsubscribe(self, topic, handler):
+        handlers = self.handlers.get(topic, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def start(self, path, cluster_id):
+        """Connect to the hub in the background and keep reconnecting"""
+        if self.task is not None:
+            return
+        self.path = path
+        self.cluster_id = cluster_id
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        self.writer = None
+
+    def publish(self, topic, **data):
+        """Send to every other cluster; safe to call from worker threads"""
+        if self.writer is None:
+            return
+        line = json.dumps({"topic": topic, "cluster": self.cluster_id, "data": data}).encode() + b"\n"
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self.writer.write(line)
+        else:
+            self.loop.call_soon_threadsafe(self._write, line)
+
+    def _write(self, line):
+        if self.writer is not None:
+            self.writer.write(line)
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                log.warning("Cluster hub unavailable at %s: %s", self.path, e)
+                await asyncio.sleep(1)
+                continue
+
+            self.writer = writer
+            log.info("Cluster %s connected to hub at %s", self.cluster_id, self.path)
+            try:
+                while line := await reader.readline():
+                    await self.dispatch(json.loads(line))
+            except (OSError, ValueError) as e:
+                log.warning("Cluster hub connection lost: %s", e)
+            finally:
+                self.writer = None
+                writer.close()
+            await asyncio.sleep(1)
+
+    async def dispatch(self, message):
+        for handler in self.handlers.get(message["topic"], ()):
+            try:
+                await handler(message["data"])
+            except Exception:
+                log.exception("Cluster message handler for %s failed", message["topic"])
+
+
+class ClusterHub:
+    """Runs in the launcher: relays every line from one cluster to all the others"""
+
+    def __init__(self, path):
+        self.path = path
+        self.clients = set()
+        self.handlers = set()
+        self.server = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._handle, self.path)
+        log.info("Cluster hub listening on %s", self.path)
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for writer in list(self.clients):
+            writer.close()
+        # Closing the writers ends each client loop at EOF
+        if self.handlers:
+            await asyncio.wait(self.handlers, timeout=5)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _handle(self, reader, writer):
+        self.clients.add(writer)
+        self.handlers.add(asyncio.current_task())
+        try:
+            while line := await reader.readline():
+                for client in self.clients:
+                    if client is not writer:
+                        client.write(line)
+        except OSError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            self.handlers.discard(asyncio.current_task())
+            writer.close()
+
+
+cluster_ipc = ClusterIPC()
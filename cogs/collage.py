@@ -0,0 +1,126 @@
+from PIL import Image
+import io
+from config.layout import SHOWCASE_LAYOUT
+from .showcase_ingest import decode_showcase_image, probe_image
+
+# Zones are (left, top, right, bottom) with width right - left, like the zones found in color maps
+
+
+def grid_zones(count, layout=SHOWCASE_LAYOUT):
+    """Rows of equal cells for count images, row sizes from the layout's grid_rows table"""
+    row_sizes = layout['grid_rows'][count]
+    left, top, right, bottom = layout['area']
+    gutter = layout['gutter']
+
+    row_height = (bottom - top - gutter * (len(row_sizes) - 1)) / len(row_sizes)
+    zones = []
+    for row, cells in enumerate(row_sizes):
+        y = top + row * (row_height + gutter)
+        cell_width = (right - left - gutter * (cells - 1)) / cells
+        for cell in range(cells):
+            x = left + cell * (cell_width + gutter)
+            zones.append((round(x), round(y), round(x + cell_width), round(y + row_height)))
+    return zones
+
+
+def _masonry(aspects, columns, layout):
+    """Zones for a fixed column count, plus the area the fitted images would cover"""
+    left, top, right, bottom = layout['area']
+    gutter = layout['gutter']
+    width = (right - left - gutter * (columns - 1)) / columns
+
+    # Each image goes to the shortest column, at full column width
+    stacks = [[] for _ in range(columns)]
+    heights = [0.0] * columns
+    for i, aspect in enumerate(aspects):
+        column = heights.index(min(heights))
+        stacks[column].append(i)
+        heights[column] += width / aspect
+
+    zones = [None] * len(aspects)
+    covered = 0.0
+    for column, stack in enumerate(stacks):
+        if not stack:
+            continue
+        # Stretch or squeeze the column's tiles so the column fills the area's height
+        scale = (bottom - top - gutter * (len(stack) - 1)) / heights[column]
+        x = left + column * (width + gutter)
+        y = top
+        for i in stack:
+            tile_height = width / aspects[i] * scale
+            zones[i] = (round(x), round(y), round(x + width), round(y + tile_height))
+            covered += width * width / aspects[i] * min(1.0, scale) ** 2
+            y += tile_height + gutter
+    return zones, covered
+
+
+def masonry_zones(aspects, layout=SHOWCASE_LAYOUT):
+    """Columns of tiles sized to each image's aspect ratio (width / height).
+
+    Every column count is tried and the one whose fitted images cover the
+    most of the area wins, so wide screenshots end up in few columns and
+    phone screenshots in many.
+    """
+    best_zones, best_covered = None, -1.0
+    for columns in range(1, len(aspects) + 1):
+        zones, covered = _masonry(aspects, columns, layout)
+        if covered > best_covered:
+            best_zones, best_covered = zones, covered
+    return best_zones
+
+
+def tile_bound(count, style=None, layout=SHOWCASE_LAYOUT):
+    """Largest (width, height) any tile can get in a showcase of count images"""
+    style = style or layout['style']
+    if style == 'grid':
+        zones = grid_zones(count, layout)
+    else:
+        # Masonry tiles depend on every image's shape; one column can span the whole area
+        zones = [layout['area']]
+    return (max(zone[2] - zone[0] for zone in zones), max(zone[3] - zone[1] for zone in zones))
+
+
+def image_size(image):
+    """(width, height) of a decoded image or of upload bytes, reading only the header"""
+    if isinstance(image, Image.Image):
+        return image.size
+    return probe_image(image).size
+
+
+def layout_zones(images, style=None, layout=SHOWCASE_LAYOUT):
+    """One zone per image, in the same order"""
+    style = style or layout['style']
+    if style == 'grid':
+        return grid_zones(len(images), layout)
+    if style == 'masonry':
+        sizes = [image_size(image) for image in images]
+        return masonry_zones([width / height for width, height in sizes], layout)
+    raise ValueError(f"Unknown showcase layout '{style}'")
+
+
+def fit_to_zone(image, zone):
+    """Scale an upload (raw bytes or a decoded image) to fit inside a zone (runs in a worker thread)"""
+    zone_width = zone[2] - zone[0]
+    zone_height = zone[3] - zone[1]
+
+    if not isinstance(image, Image.Image):
+        # Decoded straight at tile size, so small tiles cost less than big ones
+        image = decode_showcase_image(image, (zone_width, zone_height))
+
+    scale = min(zone_width / image.width, zone_height / image.height)
+    size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    # reducing_gap does most of a large shrink with a cheap box filter first
+    return image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+
+def paste_centered(canvas, tile, zone):
+    x = zone[0] + (zone[2] - zone[0] - tile.width) // 2
+    y = zone[1] + (zone[3] - zone[1] - tile.height) // 2
+    canvas.paste(tile, (x, y))
+
+
+def encode_png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import discord
+from .logs import get_logger
+
+log = get_logger("command_sync")
+
+GLOBAL_SCOPE = "global"
+
+
+def _digest(value):
+    encoded = json.dumps(value, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _scope_name(guild_id):
+    return GLOBAL_SCOPE if guild_id is None else f"guild:{guild_id}"
+
+
+class CommandSyncManager:
+    """Pushes the app-command tree to Discord only for scopes that changed.
+
+    Each scope (global, or one guild) is serialized into per-command hashes
+    of the payload tree.sync() would upload, and compared with the hashes
+    stored after the last successful sync; those stored hashes are the only
+    sync state. Unchanged scopes are skipped, so restarts and reconnects
+    never spend sync rate limit, and every sync logs which commands were
+    added, removed or changed.
+    """
+
+    def __init__(self, tree, state_path, guild_ids=()):
+        self.tree = tree
+        self.state_path = state_path
+        # Guilds that may have guild-only commands (COMMAND_GUILD_IDS)
+        self.configured_guild_ids = set(guild_ids)
+
+    def load_state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring unreadable command sync state %s: %s", self.state_path, e)
+            return {}
+
+    def save_state(self, state):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def guild_ids(self, state):
+        """Configured guilds, plus guilds synced before (their commands may need clearing)"""
+        guild_ids = set(self.configured_guild_ids)
+        guild_ids.update(int(scope.split(":", 1)[1]) for scope in state if scope.startswith("guild:"))
+        return sorted(guild_ids)
+
+    def snapshot(self, guild_id=None):
+        """{"<type>:<name>": hash} for the commands tree.sync() would upload to a scope"""
+        guild = discord.Object(id=guild_id) if guild_id is not None else None
+        commands = {}
+        for command in self.tree.get_commands(guild=guild):
+            payload = command.to_dict(self.tree)
+            commands[f"{payload.get('type', 1)}:{payload['name']}"] = _digest(payload)
+        return commands
+
+    def diff(self, old, new):
+        """(added, removed, changed) command names between two snapshots"""
+        def names(keys):
+            return sorted(key.split(":", 1)[1] for key in keys)
+
+        added = names(new.keys() - old.keys())
+        removed = names(old.keys() - new.keys())
+        changed = names(key for key in new.keys() & old.keys() if new[key] != old[key])
+        return added, removed, changed
+
+    def pending(self, state, force=False):
+        """[(guild_id, snapshot)] for every scope whose commands differ from state"""
+        scopes = []
+        for guild_id in [None] + self.guild_ids(state):
+            snapshot = self.snapshot(guild_id)
+            # A scope with no stored entry has nothing on Discord, so an empty one is unchanged
+            stored = state.get(_scope_name(guild_id), {})
+            if force or snapshot != stored.get("commands", {}):
+                scopes.append((guild_id, snapshot))
+        return scopes
+
+    async def sync(self, force=False):
+        """Sync changed scopes (every scope if force). Returns {scope: commands synced}."""
+        state = self.load_state()
+        results = {}
+        for guild_id, snapshot in self.pending(state, force):
+            scope = _scope_name(guild_id)
+            old = state.get(scope, {}).get("commands", {})
+            added, removed, changed = self.diff(old, snapshot)
+            log.info(
+                "Syncing %s commands: added %s, removed %s, changed %s",
+                scope, ", ".join(added) or "none", ", ".join(removed) or "none", ", ".join(changed) or "none"
+            )
+
+            guild = discord.Object(id=guild_id) if guild_id is not None else None
+            synced = await self.tree.sync(guild=guild)
+
+            # Stored only once Discord accepted the scope, so a failed sync is retried next time
+            if snapshot:
+                state[scope] = {"commands": snapshot}
+            else:
+                state.pop(scope, None)
+            self.save_state(state)
+            results[scope] = len(synced)
+            log.info("Synced %d %s commands", len(synced), scope)
+
+        if not results:
+            log.info("Command tree unchanged, skipping sync")
+        return results
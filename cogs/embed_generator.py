@@ -1,13 +1,40 @@
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageChops, ImageDraw, ImageFont
 import discord
 import io
+import asyncio
 import aiohttp
 import os
 import unicodedata
-import sqlite3
-from config.layout import TEXT_CONFIG, PFP_CONFIG, GP_TEXT_CONFIG  # Removed SHOWCASE_CONFIG from import
+import time
+import threading
+from contextlib import contextmanager
+from config.layout import TEXT_CONFIG, PFP_CONFIG, GP_TEXT_CONFIG, SHOWCASE_UPLOAD_CONFIG
+from . import collage
+from . import avatars
+from .template_compiler import load_compiled_layouts, TemplateError
+from .metrics import metrics
+from .reputation import reputation
+from .logs import get_logger
+
+log = get_logger("render")
+
+# Templates and maps decoded once and shared by every render: (path, mode, size) -> (mtime, image)
+_images = {}
+# id() of a shared map -> (cache key, mtime); only these maps get their zones cached
+_map_keys = {}
+# (cache key, mtime, color) -> zone
+_zones = {}
+_cache_lock = threading.Lock()
+# Layout name -> zone name -> zone, from templates/layout.compiled.json; loaded once per process
+_compiled = None
+_compiled_lock = threading.Lock()
 
 class EmbedGenerator:
+    ACCOUNT_TYPES = ("MAIN", "PVP", "HCIM", "IRON", "SPECIAL")
+    LISTING_ZONES = ('pfp', 'name', 'value', 'header', 'details_left', 'details_right', 'vouches')
+    GP_ZONES = ('gp_pfp', 'gp_name', 'gp_price', 'gp_vouches', 'gp_amount', 'gp_payment')
+    GP_SIZE = (1200, 800)
+
     def __init__(self):
         self.template_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates"))
         self.font_path = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "fonts", "Roboto-Bold.ttf"))
@@ -21,9 +48,6 @@ class EmbedGenerator:
             'details_left': (0, 180, 255), # #00b4ff - Left side account details
             'details_right': (255, 0, 0),  # #ff0000 - Right side account details
             'vouches': (121, 119, 121), # #797779 - User vouches
-            'image1': (252, 0, 6),      # #fc0006 - Image 1 location
-            'image2': (0, 24, 255),     # #0018ff - Image 2 location
-            'image3': (156, 0, 255),    # #9c00ff - Image 3 location (changed from yellow)
             # GP Listing color mappings
             'gp_pfp': (255, 255, 255),  # #ffffff - Discord user pfp
             'gp_name': (128, 128, 128), # #808080 - Discord server name
@@ -36,8 +60,23 @@ class EmbedGenerator:
         # Create fonts directory if it doesn't exist
         os.makedirs(os.path.dirname(self.font_path), exist_ok=True)
         
-        # Database path for vouches
-        self.db_path = "/app/data/vouches.db"
+        # Vouch totals come from the in-memory reputation cache, never from SQLite
+        self.reputation = reputation
+
+        # Seconds spent per render stage for one generator; set to a dict to start collecting
+        self.stage_timings = None
+
+    @contextmanager
+    def stage(self, name):
+        """Time a render stage into render_stage_seconds (and stage_timings when enabled)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.histogram('render_stage_seconds', stage=name).observe(elapsed)
+            if self.stage_timings is not None:
+                self.stage_timings[name] = self.stage_timings.get(name, 0.0) + elapsed
 
     def normalize_text(self, text):
         """Handle special characters in text"""
@@ -50,45 +89,137 @@ class EmbedGenerator:
             ascii_text = normalized.encode('ascii', 'ignore').decode()
             return ascii_text if ascii_text.strip() else text
 
+    def load_image(self, path, mode, size=None):
+        """Decoded template or map shared across renders; callers must copy() before drawing on it"""
+        mtime = os.path.getmtime(path)
+        key = (path, mode, size)
+        entry = _images.get(key)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        with Image.open(path) as source:
+            image = source.convert(mode)
+        if size:
+            image = image.resize(size, Image.LANCZOS)
+
+        with _cache_lock:
+            stale = _images.get(key)
+            if stale is not None:
+                _map_keys.pop(id(stale[1]), None)
+            _images[key] = (mtime, image)
+            _map_keys[id(image)] = (key, mtime)
+        return image
+
     def find_color_zone(self, map_image, target_color):
-        """Find the bounding box of a specific color zone"""
-        width, height = map_image.size
-        left = width
-        top = height
-        right = 0
-        bottom = 0
-        found = False
-
-        # Convert target_color to RGB if it's not already
-        if len(target_color) > 3:
-            target_color = target_color[:3]
-
-        # Scan the image for matching pixels
-        for y in range(height):
-            for x in range(width):
-                pixel = map_image.getpixel((x, y))
-                # Convert pixel to RGB if it's not already
-                if len(pixel) > 3:
-                    pixel = pixel[:3]
-                
-                if pixel == target_color:
-                    found = True
-                    left = min(left, x)
-                    top = min(top, y)
-                    right = max(right, x)
-                    bottom = max(bottom, y)
-
-        if not found:
+        """Find the bounding box of a specific color zone (renders use compiled_zones instead)"""
+        with self.stage('zone_lookup'):
+            cache_key = _map_keys.get(id(map_image))
+            if cache_key is None:
+                return self._scan_color_zone(map_image, target_color)
+            zone_key = cache_key + (tuple(target_color[:3]),)
+            if zone_key not in _zones:
+                _zones[zone_key] = self._scan_color_zone(map_image, target_color)
+            return _zones[zone_key]
+
+    def _scan_color_zone(self, map_image, target_color):
+        # Per-band lookup tables and a multiply build the match mask in C,
+        # instead of a getpixel() call for every pixel
+        mask = None
+        for band, value in zip(map_image.split()[:3], target_color[:3]):
+            band_mask = band.point([255 if level == value else 0 for level in range(256)])
+            mask = band_mask if mask is None else ImageChops.multiply(mask, band_mask)
+
+        bbox = mask.getbbox()
+        if bbox is None:
             return None
 
-        return (left, top, right, bottom)
+        # getbbox() is exclusive on the right and bottom; zones are inclusive
+        left, top, right, bottom = bbox
+        return (left, top, right - 1, bottom - 1)
+
+    def listing_paths(self, account_type):
+        """Template and map for an account listing"""
+        # Handle special case for HCIM template naming
+        if account_type.upper() == "HCIM":
+            return (os.path.join(self.template_dir, "HCIM_TEMPLATE.png"),
+                    os.path.join(self.template_dir, "HCIM_TEMPLATE_MAP.png"))
+        return (os.path.join(self.template_dir, f"TEMPLATE_{account_type.upper()}.png"),
+                os.path.join(self.template_dir, f"TEMPLATE_{account_type.upper()}_MAP.png"))
+
+    def showcase_path(self):
+        """Showcase template; its tiles come from SHOWCASE_LAYOUT, not a color map"""
+        return os.path.join(self.template_dir, "IMAGE_TEMPLATE.png")
 
-    def create_circular_mask(self, size):
-        """Create a circular mask for the avatar"""
-        mask = Image.new('L', size, 0)
-        draw = ImageDraw.Draw(mask)
-        draw.ellipse((0, 0) + size, fill=255)
-        return mask
+    def template_layouts(self):
+        """(name, template path, map path, map mode, size, zone names) for every color-mapped template"""
+        layouts = [(account_type, *self.listing_paths(account_type), 'RGB', None, self.LISTING_ZONES)
+                   for account_type in self.ACCOUNT_TYPES]
+        for gp_type in ("BUYER", "SELLER"):
+            layouts.append((f"GP_{gp_type}", os.path.join(self.template_dir, f"GPLISTING_{gp_type}.png"),
+                            os.path.join(self.template_dir, "GPLISTING_MAP.png"), 'RGBA', self.GP_SIZE, self.GP_ZONES))
+        return layouts
+
+    def template_layout(self, layout_name):
+        """The template_layouts() entry for one layout"""
+        for layout in self.template_layouts():
+            if layout[0] == layout_name:
+                return layout
+        raise KeyError(layout_name)
+
+    def compiled_zones(self, layout_name):
+        """Zones of a template as validated by the template compiler; renders trust these as is"""
+        global _compiled
+        if _compiled is None:
+            with _compiled_lock:
+                if _compiled is None:
+                    _compiled = load_compiled_layouts(self)
+        return _compiled[layout_name]
+
+    def prewarm(self):
+        """Decode every template and load the compiled zones (runs in a worker thread)"""
+        start = time.perf_counter()
+        warmed = 0
+        layouts = self.template_layouts()
+        for _, template_path, _, _, size, _ in layouts:
+            try:
+                self.load_image(template_path, 'RGBA', size)
+            except OSError as e:
+                log.warning("Skipping prewarm of %s: %s", template_path, e)
+                continue
+            warmed += 1
+        try:
+            for name, *_ in layouts:
+                self.compiled_zones(name)
+        except TemplateError as e:
+            log.error("Renders will fail until the templates are fixed. %s", e)
+        except KeyError as e:
+            log.error("No compiled zones for layout %s; run python -m cogs.template_compiler", e)
+        try:
+            self.load_image(self.showcase_path(), 'RGBA')
+            warmed += 1
+        except OSError as e:
+            log.warning("Skipping prewarm of %s: %s", self.showcase_path(), e)
+        log.info("Prewarmed %d template layouts in %.2fs", warmed, time.perf_counter() - start)
+
+    def avatar_url(self, user):
+        """CDN URL of a user's avatar at the size renders need"""
+        return user.display_avatar.with_size(PFP_CONFIG['fetch_size']).url
+
+    async def draw_avatar(self, template, user, zone):
+        """Composite the user's avatar as a circle in a zone; finished circles are cached per avatar URL and size"""
+        url = self.avatar_url(user)
+        side = avatars.zone_side(zone)
+        tile = avatars.cached_tile(url, side)
+        if tile is None:
+            with self.stage('avatar_download'):
+                avatar_bytes = await self.download_avatar(url)
+            if not avatar_bytes:
+                return
+            with self.stage('decode'):
+                tile = avatars.avatar_tile(Image.open(avatar_bytes).convert('RGBA'), side)
+            avatars.remember_tile(url, side, tile)
+        with self.stage('paste'):
+            avatars.composite_tile(template, tile, zone)
 
     async def download_avatar(self, avatar_url):
         """Download user's avatar"""
@@ -144,40 +275,22 @@ class EmbedGenerator:
             draw.text((zone[0], y_position), line, font=font, fill=(255, 255, 255))
 
     def get_user_vouches(self, user_id):
-        """Get the total number of vouches for a user"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get total vouches for the user from the count column
-            cursor.execute("SELECT count FROM vouches WHERE user_id = ?", (user_id,))
-            result = cursor.fetchone()
-            
-            conn.close()
-            return result[0] if result else 0
-        except Exception as e:
-            print(f"Error getting vouches for user {user_id}: {e}")
-            return 0
+        """Get the total number of vouches for a user from the preloaded reputation cache"""
+        return self.reputation.count(user_id)
 
+    @metrics.timed('render_seconds', kind='listing')
     async def generate_listing_image(self, account_type, user, account_header, details_left, details_right, price, payment_methods):
         """Generate a listing using the template and mapping system with header and split details"""
         try:
             # Load both the clean template and its mapping
-            # Handle special case for HCIM template naming
-            if account_type.upper() == "HCIM":
-                template_path = os.path.join(self.template_dir, "HCIM_TEMPLATE.png")
-                map_path = os.path.join(self.template_dir, "HCIM_TEMPLATE_MAP.png")
-            else:
-                template_path = os.path.join(self.template_dir, f"TEMPLATE_{account_type.upper()}.png")
-                map_path = os.path.join(self.template_dir, f"TEMPLATE_{account_type.upper()}_MAP.png")
+            template_path, _ = self.listing_paths(account_type)
             
             if not os.path.exists(template_path):
                 raise FileNotFoundError(f"Template file not found: {template_path}")
-            if not os.path.exists(map_path):
-                raise FileNotFoundError(f"Map file not found: {map_path}")
             
-            template = Image.open(template_path).convert('RGBA')
-            map_image = Image.open(map_path).convert('RGB')
+            with self.stage('decode'):
+                template = self.load_image(template_path, 'RGBA').copy()
+            zones = self.compiled_zones(account_type.upper())
             
             draw = ImageDraw.Draw(template)
             
@@ -189,11 +302,9 @@ class EmbedGenerator:
                 price_font = ImageFont.truetype(self.font_path, TEXT_CONFIG['price']['font_size'])
                 desc_font = ImageFont.truetype(self.font_path, TEXT_CONFIG['description']['font_size'])
                 type_font = ImageFont.truetype(self.font_path, TEXT_CONFIG['account_type']['font_size'])
-                print(f"✅ Successfully loaded Roboto font from: {self.font_path}")
+                log.debug("Loaded Roboto font from %s", self.font_path)
             except Exception as e:
-                print(f"❌ Roboto font loading failed: {str(e)}")
-                print(f"Font path attempted: {self.font_path}")
-                print("Falling back to system fonts...")
+                log.warning("Roboto font loading failed (%s) from %s, falling back to system fonts", e, self.font_path)
                 try:
                     username_font_size = TEXT_CONFIG['username']['font_size']
                     username_font = ImageFont.truetype("arial", username_font_size)
@@ -201,7 +312,7 @@ class EmbedGenerator:
                     desc_font = ImageFont.truetype("arial", TEXT_CONFIG['description']['font_size'])
                     type_font = ImageFont.truetype("arial", TEXT_CONFIG['account_type']['font_size'])
                 except Exception as e2:
-                    print(f"System font loading also failed: {str(e2)}, using default font")
+                    log.warning("System font loading also failed: %s, using default font", e2)
                     username_font = ImageFont.load_default()
                     price_font = ImageFont.load_default()
                     desc_font = ImageFont.load_default()
@@ -210,18 +321,12 @@ class EmbedGenerator:
             # Process each zone based on the mapping colors
             
             # 1. Profile Picture
-            pfp_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['pfp'])
+            pfp_zone = zones.get('pfp')
             if pfp_zone:
-                avatar_bytes = await self.download_avatar(user.display_avatar.url)
-                if avatar_bytes:
-                    avatar = Image.open(avatar_bytes).convert('RGBA')
-                    size = (pfp_zone[2] - pfp_zone[0], pfp_zone[3] - pfp_zone[1])
-                    avatar = avatar.resize(size)
-                    mask = self.create_circular_mask(size)
-                    template.paste(avatar, (pfp_zone[0], pfp_zone[1]), mask)
+                await self.draw_avatar(template, user, pfp_zone)
 
             # 2. Username (using server nickname with special character handling)
-            name_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['name'])
+            name_zone = zones.get('name')
             if name_zone:
                 # Get display name and handle special characters
                 display_name = user.display_name
@@ -230,7 +335,7 @@ class EmbedGenerator:
                          font=username_font, fill=(255, 255, 255))
 
             # 3. Account Value
-            value_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['value'])
+            value_zone = zones.get('value')
             if value_zone:
                 price_text = f"${price}"  # Just show the price, no extra text
                 
@@ -242,7 +347,7 @@ class EmbedGenerator:
                 draw.text((text_x, text_y), price_text, font=price_font, fill=(255, 255, 255))
 
             # 4. Account Header
-            header_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['header'])
+            header_zone = zones.get('header')
             if header_zone:
                 # Handle special characters in header
                 account_header = self.normalize_text(account_header)
@@ -258,14 +363,14 @@ class EmbedGenerator:
                          font=header_font, fill=(231, 185, 57))
 
             # 5. Left Side Details
-            details_left_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['details_left'])
+            details_left_zone = zones.get('details_left')
             if details_left_zone:
                 # Split details_left into lines and add bullet points
                 details_left_lines = [f"• {line.strip()}" for line in details_left.split('\n') if line.strip()]
                 self.draw_multiline_text(draw, details_left_lines, desc_font, details_left_zone, max_lines=4)
 
             # 6. Right Side Details
-            details_right_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['details_right'])
+            details_right_zone = zones.get('details_right')
             if details_right_zone:
                 # Split details_right into lines and add bullet points
                 details_right_lines = [f"• {line.strip()}" for line in details_right.split('\n') if line.strip()]
@@ -274,7 +379,7 @@ class EmbedGenerator:
 
 
             # 6. User Vouches
-            vouch_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['vouches'])
+            vouch_zone = zones.get('vouches')
             if vouch_zone:
                 vouch_count = self.get_user_vouches(user.id)
                 vouch_text = str(vouch_count)  # Just the number, no "Vouches:" prefix
@@ -298,124 +403,60 @@ class EmbedGenerator:
 
             # Convert to bytes for Discord upload
             final_buffer = io.BytesIO()
-            template.save(final_buffer, format='PNG')
+            with self.stage('encode'):
+                template.save(final_buffer, format='PNG')
             final_buffer.seek(0)
             
             return final_buffer
             
         except Exception as e:
-            print(f"Error generating listing image: {str(e)}")
+            log.error("Error generating listing image: %s", e)
             raise
 
-    async def generate_image_template(self, image_bytes_list):
-        """Generate an image template based on the number of images (1-3)"""
+    def showcase_tile_size(self, count):
+        """Largest tile in a showcase of count images; uploads never need to be decoded larger than this"""
+        return collage.tile_bound(count)
+
+    async def compose_showcase(self, image_bytes_list, style=None):
+        """Lay out 1-10 uploads on the showcase template; returns the composed image or None
+
+        Items may be raw upload bytes or images already decoded by ShowcaseIngest.
+        """
+        images = [image for image in image_bytes_list if image is not None][:SHOWCASE_UPLOAD_CONFIG['max_images']]
+        if not images:
+            return None
+
+        template_path = self.showcase_path()
+        if not os.path.exists(template_path):
+            raise FileNotFoundError(f"Image template file not found: {template_path}")
+
+        with self.stage('decode'):
+            template = self.load_image(template_path, 'RGBA').copy()
+        with self.stage('zone_lookup'):
+            zones = collage.layout_zones(images, style)
+
+        # Resampling releases the GIL, so worker threads fit all tiles concurrently
+        with self.stage('decode'):
+            tiles = await asyncio.gather(*(
+                asyncio.to_thread(collage.fit_to_zone, image, zone) for image, zone in zip(images, zones)
+            ))
+
+        with self.stage('paste'):
+            for tile, zone in zip(tiles, zones):
+                collage.paste_centered(template, tile, zone)
+        return template
+
+    @metrics.timed('render_seconds', kind='showcase')
+    async def generate_image_template(self, image_bytes_list, style=None):
+        """Generate the showcase collage for 1-10 images as a PNG"""
         try:
-            num_images = len(image_bytes_list)
-            if num_images == 0:
+            showcase = await self.compose_showcase(image_bytes_list, style)
+            if showcase is None:
                 return None
-            if num_images > 3:
-                num_images = 3  # Limit to 3 images
-                image_bytes_list = image_bytes_list[:3]
-            
-            # Load the appropriate template and map based on number of images
-            template_path = os.path.join(self.template_dir, "IMAGE_TEMPLATE.png")
-            map_path = os.path.join(self.template_dir, f"IMAGE_TEMPLATE_MAP{num_images}.png")
-            
-            print(f"Debug: Loading template from: {template_path}")
-            print(f"Debug: Loading map from: {map_path}")
-            
-            if not os.path.exists(template_path):
-                raise FileNotFoundError(f"Image template file not found: {template_path}")
-            if not os.path.exists(map_path):
-                raise FileNotFoundError(f"Image map file not found: {map_path}")
-            
-            template = Image.open(template_path).convert('RGBA')
-            map_image = Image.open(map_path).convert('RGB')
-            
-            print(f"Debug: Template size: {template.size}")
-            print(f"Debug: Map size: {map_image.size}")
-            print(f"Debug: Processing {num_images} images")
-            
-            # Process each image based on the number of images
-            for i, image_bytes in enumerate(image_bytes_list):
-                if i >= 3:  # Safety check
-                    break
-                
-                # Determine which color mapping to use based on image position
-                if i == 0:
-                    color_key = 'image1'
-                elif i == 1:
-                    color_key = 'image2'
-                elif i == 2:
-                    color_key = 'image3'
-                else:
-                    continue
-                
-                # Find the zone for this image
-                image_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS[color_key])
-                print(f"Debug: Image {i+1} zone for color {color_key}: {image_zone}")
-                
-                if image_zone and image_bytes:
-                    image_io = io.BytesIO(image_bytes)
-                    image = Image.open(image_io).convert('RGBA')
-                    
-                    # Calculate dimensions to fit within the zone
-                    zone_width = image_zone[2] - image_zone[0]
-                    zone_height = image_zone[3] - image_zone[1]
-                    
-                    print(f"Debug: Image {i+1} original size: {image.size}, zone size: {zone_width}x{zone_height}")
-                    
-                    scale_x = zone_width / image.width
-                    scale_y = zone_height / image.height
-                    scale_factor = min(scale_x, scale_y)  # Stay within bounds
-                    
-                    new_width = int(image.width * scale_factor)
-                    new_height = int(image.height * scale_factor)
-                    image = image.resize((new_width, new_height), Image.LANCZOS)
-                    
-                    # Center the image in the zone
-                    x_offset = image_zone[0] + (zone_width - new_width) // 2
-                    y_offset = image_zone[1] + (zone_height - new_height) // 2
-                    
-                    print(f"Debug: Image {i+1} final size: {image.size}, position: ({x_offset}, {y_offset})")
-                    print(f"Debug: Image {i+1} zone bounds: ({image_zone[0]}, {image_zone[1]}) to ({image_zone[2]}, {image_zone[3]})")
-                    
-                    # Check if image is within template bounds
-                    template_width, template_height = template.size
-                    if (x_offset + new_width > template_width or y_offset + new_height > template_height or 
-                        x_offset < 0 or y_offset < 0):
-                        print(f"Debug: Image {i+1} would be outside template bounds! Template: {template.size}")
-                    else:
-                        print(f"Debug: Image {i+1} is within template bounds")
-                    
-                    # Check for zone overlap with previous images
-                    for j in range(i):
-                        prev_color_key = f'image{j+1}'
-                        prev_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS[prev_color_key])
-                        if prev_zone:
-                            # Check if current image overlaps with previous image's zone
-                            if (x_offset < prev_zone[2] and x_offset + new_width > prev_zone[0] and
-                                y_offset < prev_zone[3] and y_offset + new_height > prev_zone[1]):
-                                print(f"Debug: WARNING - Image {i+1} overlaps with Image {j+1}!")
-                    
-                    template.paste(image, (x_offset, y_offset))
-                    print(f"Debug: Image {i+1} pasted successfully")
-                else:
-                    print(f"Debug: No zone found for image {i+1} or no image bytes")
-                    if not image_zone:
-                        print(f"Debug: Color {color_key} ({self.COLOR_MAPPINGS[color_key]}) not found in map")
-                    if not image_bytes:
-                        print(f"Debug: No image bytes for image {i+1}")
-            
-            # Convert to bytes
-            final_buffer = io.BytesIO()
-            template.save(final_buffer, format='PNG')
-            final_buffer.seek(0)
-            
-            return final_buffer
-            
+            with self.stage('encode'):
+                return collage.encode_png(showcase)
         except Exception as e:
-            print(f"Error generating image template: {str(e)}")
+            log.error("Error generating image template: %s", e)
             raise
 
     async def send_listing(self, channel, account_template_file, image_template_file=None):
@@ -432,32 +473,27 @@ class EmbedGenerator:
             listing_msg = await channel.send(files=[discord.File(account_template_file, filename="account_details.png")])
             return listing_msg, account_msg
 
+    @metrics.timed('render_seconds', kind='gp')
     async def generate_gp_listing_image(self, gp_type, user, price, amount, payment_method):
         """Generate a GP listing image based on the template"""
         try:
             # Determine template based on GP type
             if gp_type.upper() == "BUYING":
-                template_name = "GPLISTING_BUYER.png"
+                layout_name = "GP_BUYER"
             elif gp_type.upper() == "SELLING":
-                template_name = "GPLISTING_SELLER.png"
+                layout_name = "GP_SELLER"
             else:
                 raise ValueError(f"Invalid GP type: {gp_type}")
             
-            template_path = os.path.join(self.template_dir, template_name)
-            map_path = os.path.join(self.template_dir, "GPLISTING_MAP.png")
+            template_path = self.template_layout(layout_name)[1]
             
             if not os.path.exists(template_path):
                 raise FileNotFoundError(f"GP template file not found: {template_path}")
-            if not os.path.exists(map_path):
-                raise FileNotFoundError(f"GP map file not found: {map_path}")
-            
-            # Load template and map
-            template = Image.open(template_path).convert('RGBA')
-            map_image = Image.open(map_path).convert('RGBA')
             
-            # Scale template to 800x1200 (HxW) for optimal Discord display
-            template = template.resize((1200, 800), Image.LANCZOS)
-            map_image = map_image.resize((1200, 800), Image.LANCZOS)
+            # Load the template scaled to 800x1200 (HxW) for optimal Discord display
+            with self.stage('decode'):
+                template = self.load_image(template_path, 'RGBA', self.GP_SIZE).copy()
+            zones = self.compiled_zones(layout_name)
             
             # Load font
             try:
@@ -465,7 +501,7 @@ class EmbedGenerator:
                 font_medium = ImageFont.truetype(self.font_path, 36)
                 font_small = ImageFont.truetype(self.font_path, 24)
             except OSError:
-                print("Font loading error: cannot open resource, using default font")
+                log.warning("Font loading error: cannot open resource, using default font")
                 font_large = ImageFont.load_default()
                 font_medium = ImageFont.load_default()
                 font_small = ImageFont.load_default()
@@ -473,36 +509,16 @@ class EmbedGenerator:
             # Get user vouches
             vouches = self.get_user_vouches(user.id)
             
-            # Download and process user avatar
-            avatar_bytes = await self.download_avatar(user.avatar)
-            if avatar_bytes:
-                avatar = Image.open(avatar_bytes).convert('RGBA')
-                
-                # Find PFP zone and resize avatar to fit the entire zone
-                pfp_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['gp_pfp'])
-                if pfp_zone:
-                    # Calculate zone dimensions
-                    zone_width = pfp_zone[2] - pfp_zone[0]
-                    zone_height = pfp_zone[3] - pfp_zone[1]
-                    
-                    # Resize avatar to fit the entire zone (assuming it's circular)
-                    avatar_size = min(zone_width, zone_height)
-                    avatar = avatar.resize((avatar_size, avatar_size), Image.LANCZOS)
-                    
-                    # Create circular mask
-                    mask = self.create_circular_mask((avatar_size, avatar_size))
-                    avatar.putalpha(mask)
-                    
-                    # Center the avatar in the zone
-                    x_offset = pfp_zone[0] + (zone_width - avatar_size) // 2
-                    y_offset = pfp_zone[1] + (zone_height - avatar_size) // 2
-                    template.paste(avatar, (x_offset, y_offset), avatar)
+            # User avatar, as a circle centred in the PFP zone
+            pfp_zone = zones.get('gp_pfp')
+            if pfp_zone:
+                await self.draw_avatar(template, user, pfp_zone)
             
             # Draw text elements
             draw = ImageDraw.Draw(template)
             
             # User server name
-            name_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['gp_name'])
+            name_zone = zones.get('gp_name')
             if name_zone:
                 name_text = self.normalize_text(user.display_name)
                 name_font_size = GP_TEXT_CONFIG['username']['font_size']
@@ -536,7 +552,7 @@ class EmbedGenerator:
                 draw.text((name_x, name_y), name_text, fill=GP_TEXT_CONFIG['username']['color'], font=name_font)
             
             # Price
-            price_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['gp_price'])
+            price_zone = zones.get('gp_price')
             if price_zone:
                 price_text = f"${price}"  # Only show the price value
                 price_font_size = GP_TEXT_CONFIG['price']['font_size']
@@ -569,7 +585,7 @@ class EmbedGenerator:
                 draw.text((price_x, price_y), price_text, fill=GP_TEXT_CONFIG['price']['color'], font=price_font)
             
             # Vouch count (just the number)
-            vouch_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['gp_vouches'])
+            vouch_zone = zones.get('gp_vouches')
             if vouch_zone:
                 vouch_text = str(vouches)
                 vouch_font_size = GP_TEXT_CONFIG['vouches']['font_size']
@@ -602,7 +618,7 @@ class EmbedGenerator:
                 draw.text((vouch_x, vouch_y), vouch_text, fill=GP_TEXT_CONFIG['vouches']['color'], font=vouch_font)
             
             # Amount
-            amount_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['gp_amount'])
+            amount_zone = zones.get('gp_amount')
             if amount_zone:
                 amount_text = self.normalize_text(amount)
                 amount_font_size = GP_TEXT_CONFIG['amount']['font_size']
@@ -635,7 +651,7 @@ class EmbedGenerator:
                 draw.text((amount_x, amount_y), amount_text, fill=GP_TEXT_CONFIG['amount']['color'], font=amount_font)
             
             # Payment method
-            payment_zone = self.find_color_zone(map_image, self.COLOR_MAPPINGS['gp_payment'])
+            payment_zone = zones.get('gp_payment')
             if payment_zone:
                 payment_text = self.normalize_text(payment_method)
                 payment_font_size = GP_TEXT_CONFIG['payment']['font_size']
@@ -669,13 +685,14 @@ class EmbedGenerator:
             
             # Convert to bytes
             final_buffer = io.BytesIO()
-            template.save(final_buffer, format='PNG')
+            with self.stage('encode'):
+                template.save(final_buffer, format='PNG')
             final_buffer.seek(0)
             
             return final_buffer
             
         except Exception as e:
-            print(f"Error generating GP listing image: {str(e)}")
+            log.error("Error generating GP listing image: %s", e)
             raise
 
     async def send_gp_listing(self, channel, gp_template_file):
@@ -0,0 +1,76 @@
+import bisect
+from .listing_index import active_gp_listings
+from .logs import get_logger
+
+log = get_logger("listings")
+
+
+class GPOrder:
+    __slots__ = ("listing_id", "user_id", "channel_id", "side", "rate", "amount", "payment_method")
+
+    def __init__(self, listing_id, user_id, channel_id, side, rate, amount, payment_method):
+        self.listing_id = listing_id
+        self.user_id = user_id
+        self.channel_id = channel_id
+        self.side = side
+        self.rate = rate
+        self.amount = amount
+        self.payment_method = payment_method
+
+
+class GPOrderBook:
+    """Active GP listings kept sorted by rate, per side.
+
+    "selling" orders are asks (a buyer wants the lowest rate) and "buying"
+    orders are bids (a seller wants the highest rate). Each side is a sorted
+    list of (sort_key, listing_id), so the best N are a slice and add/remove
+    are a bisect. Listings are added and removed as they are stored and
+    deleted, so /gprates never touches the database.
+    """
+
+    def __init__(self):
+        self.orders = {}
+        self.sides = {"selling": [], "buying": []}
+
+    def _key(self, order):
+        # Best first: lowest ask, highest bid
+        return (order.rate if order.side == "selling" else -order.rate, order.listing_id)
+
+    def load(self, db_path):
+        self.replace(active_gp_listings(db_path))
+
+    def replace(self, rows):
+        """Rebuild from (listing_id, user_id, channel_id, side, rate, amount, payment_method) rows"""
+        fresh = GPOrderBook()
+        for row in rows:
+            fresh.add(*row)
+        self.orders, self.sides = fresh.orders, fresh.sides
+        log.info("Loaded %d GP orders", len(self.orders))
+
+    def add(self, listing_id, user_id, channel_id, side, rate, amount=None, payment_method=None):
+        side = (side or "").lower()
+        if side not in self.sides or rate is None:
+            return
+        self.remove(listing_id)
+        order = GPOrder(listing_id, user_id, channel_id, side, rate, amount, payment_method)
+        self.orders[listing_id] = order
+        bisect.insort(self.sides[side], (self._key(order), listing_id))
+
+    def remove(self, listing_id):
+        order = self.orders.pop(listing_id, None)
+        if order is None:
+            return
+        entries = self.sides[order.side]
+        index = bisect.bisect_left(entries, (self._key(order), listing_id))
+        if index < len(entries) and entries[index][1] == listing_id:
+            del entries[index]
+
+    def best(self, side, limit=5):
+        """Best orders on one side, best rate first"""
+        return [self.orders[listing_id] for _, listing_id in self.sides[side][:limit]]
+
+    def __len__(self):
+        return len(self.orders)
+
+
+gp_order_book = GPOrderBook()
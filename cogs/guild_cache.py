@@ -0,0 +1,114 @@
+import discord
+from discord.ext import commands
+from config import STAFF_ROLES, TRUSTED_ROLE_MATCH
+from .logs import get_logger
+
+log = get_logger("guild_cache")
+
+# Shared, never mutated: every ticket gets the same overwrite objects
+HIDDEN = discord.PermissionOverwrite(view_channel=False)
+PARTICIPANT = discord.PermissionOverwrite(view_channel=True, send_messages=True)
+BOT_MEMBER = discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)
+
+
+class GuildMetadata:
+    """Role lookups and ticket overwrite templates for one guild"""
+    __slots__ = ("guild_id", "role_ids_by_name", "staff_role_ids", "trusted_role_ids", "staff_overwrites")
+
+    def __init__(self, guild):
+        self.guild_id = guild.id
+        self.role_ids_by_name = {}
+        for role in guild.roles:
+            # Keep the first role for a duplicated name, as discord.utils.get did
+            self.role_ids_by_name.setdefault(role.name, role.id)
+
+        self.staff_role_ids = [self.role_ids_by_name[name] for name in STAFF_ROLES if name in self.role_ids_by_name]
+        self.trusted_role_ids = frozenset(
+            role.id for role in guild.roles if TRUSTED_ROLE_MATCH in role.name.lower()
+        )
+
+        # default_role hidden, staff can read and write; participants are added per ticket
+        self.staff_overwrites = {guild.default_role: HIDDEN}
+        for role_id in self.staff_role_ids:
+            self.staff_overwrites[guild.get_role(role_id)] = PARTICIPANT
+
+
+class GuildMetadataCache:
+    """Per-guild role metadata built once and rebuilt only when roles change.
+
+    Replaces discord.utils.get(guild.roles, name=...) scans and per-submit
+    scans of a member's roles with dict and set lookups. GuildCacheCog keeps
+    entries current from the on_guild_role_* events.
+    """
+
+    def __init__(self):
+        self.guilds = {}
+
+    def get(self, guild):
+        metadata = self.guilds.get(guild.id)
+        if metadata is None:
+            metadata = self.guilds[guild.id] = GuildMetadata(guild)
+        return metadata
+
+    def invalidate(self, guild):
+        self.guilds.pop(guild.id, None)
+
+    def role(self, guild, name):
+        """Role by exact name, or None"""
+        role_id = self.get(guild).role_ids_by_name.get(name)
+        return guild.get_role(role_id) if role_id else None
+
+    def staff_roles(self, guild):
+        return [guild.get_role(role_id) for role_id in self.get(guild).staff_role_ids]
+
+    def is_trusted(self, member):
+        """Whether a member has any role whose name marks them as trusted"""
+        trusted_role_ids = self.get(member.guild).trusted_role_ids
+        return any(member.get_role(role_id) for role_id in trusted_role_ids)
+
+    def ticket_overwrites(self, guild, *participants, include_bot=False):
+        """Overwrites for a private ticket: hidden from @everyone, open to staff and participants"""
+        overwrites = dict(self.get(guild).staff_overwrites)
+        for participant in participants:
+            overwrites[participant] = PARTICIPANT
+        if include_bot:
+            overwrites[guild.me] = BOT_MEMBER
+        return overwrites
+
+
+guild_metadata = GuildMetadataCache()
+
+
+class GuildCacheCog(commands.Cog):
+    """Keeps guild_metadata in step with role changes"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            guild_metadata.get(guild)
+        log.info("Cached role metadata for %d guilds", len(self.bot.guilds))
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        guild_metadata.invalidate(role.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        guild_metadata.invalidate(role.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        # Only names matter for the cache; permission or colour edits leave it valid
+        if before.name != after.name:
+            guild_metadata.invalidate(after.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        guild_metadata.invalidate(guild)
+
+
+async def setup(bot):
+    await bot.add_cog(GuildCacheCog(bot))
@@ -1,62 +1,138 @@
+import asyncio
+import io
 import discord
 from discord.ui import View, Button
+from config.layout import CAROUSEL_CONFIG
+from .metrics import metrics
+from .logs import get_logger
 
-class ImageCarousel(View):
-    def __init__(self, images: list, user: discord.User):
-        super().__init__(timeout=None)  # Carousel never times out
-        self.images = images
-        self.current_index = 0
-        self.user = user
-        self.message = None
-        
-        # Add navigation buttons
-        self.add_item(Button(emoji="⬅️", custom_id="prev", style=discord.ButtonStyle.secondary))
-        self.add_item(Button(emoji="➡️", custom_id="next", style=discord.ButtonStyle.secondary))
-        
-    async def update_message(self):
-        """Updates the carousel message with current image"""
-        if not self.message:
-            return
-            
-        # Create embed for current image
-        embed = discord.Embed(color=discord.Color.gold())
-        embed.set_image(url=self.images[self.current_index].url)
-        embed.set_footer(text=f"Image {self.current_index + 1}/{len(self.images)}")
-        
-        await self.message.edit(embed=embed, view=self)
-        
-    @discord.ui.button(custom_id="prev", label="", style=discord.ButtonStyle.secondary)
-    async def previous_button(self, interaction: discord.Interaction, button: Button):
-        # Only allow the listing owner to change images
-        if interaction.user.id != self.user.id:
-            await interaction.response.send_message("Only the listing owner can change images.", ephemeral=True)
+log = get_logger("carousel")
+
+CAROUSEL_PREFIX = "carousel_"
+STEPS = {"prev": -1, "next": 1}
+
+
+def carousel_id(listing_id, index, count, direction):
+    """custom_id carrying everything a click needs: carousel_<listing>_<index>_<count>_<prev|next>"""
+    return f"{CAROUSEL_PREFIX}{listing_id}_{index}_{count}_{direction}"
+
+
+def parse_carousel_id(custom_id):
+    """(listing_id, index, count, step) from a carousel custom_id, or None"""
+    try:
+        _, listing_id, index, count, direction = custom_id.split("_")
+        return int(listing_id), int(index), int(count), STEPS[direction]
+    except (ValueError, KeyError):
+        return None
+
+
+def carousel_embed(index, count):
+    embed = discord.Embed(color=discord.Color.gold())
+    embed.set_image(url="attachment://carousel.jpg")
+    embed.set_footer(text=f"Image {index + 1}/{count}")
+    return embed
+
+
+def carousel_view(listing_id, index, count):
+    """Navigation buttons for one frame; never registered with discord.py's view store"""
+    view = View(timeout=None)
+    view.add_item(Button(emoji="⬅️", style=discord.ButtonStyle.secondary,
+                         custom_id=carousel_id(listing_id, index, count, "prev")))
+    view.add_item(Button(emoji="➡️", style=discord.ButtonStyle.secondary,
+                         custom_id=carousel_id(listing_id, index, count, "next")))
+    # A finished view is still sent as components but is not kept per message;
+    # clicks reach ImageCarousel through the interaction router instead
+    view.stop()
+    return view
+
+
+class PendingEdit:
+    """Clicks on one carousel message waiting to be shown by a single edit"""
+    __slots__ = ("listing_id", "index", "count", "interaction", "task")
+
+    def __init__(self, listing_id, index, count):
+        self.listing_id = listing_id
+        self.index = index
+        self.count = count
+        self.interaction = None
+        # The flush task; held here because the event loop only keeps a weak reference
+        self.task = None
+
+
+class ImageCarousel:
+    """Ephemeral screenshot carousels that hold no state between clicks.
+
+    The listing id, current index and image count live in the buttons'
+    custom_ids and the images are thumbnails read from a ListingImageStore,
+    so an open carousel costs nothing in memory. Clicks landing within
+    debounce_seconds of each other on the same message are folded into one
+    edit that shows where the last click would have ended up.
+    """
+
+    def __init__(self, store, debounce=CAROUSEL_CONFIG['debounce_seconds']):
+        self.store = store
+        self.debounce = debounce
+        # message_id -> PendingEdit, only while clicks on that message are being debounced
+        self.pending = {}
+
+    async def frame(self, listing_id, index, count):
+        """Message kwargs showing one thumbnail, or None if it is gone"""
+        thumbnail = await asyncio.to_thread(self.store.thumbnail, listing_id, index)
+        if thumbnail is None:
+            return None
+        return {
+            "embed": carousel_embed(index, count),
+            "attachments": [discord.File(io.BytesIO(thumbnail), filename="carousel.jpg")],
+            "view": carousel_view(listing_id, index, count),
+        }
+
+    async def open(self, interaction: discord.Interaction, listing_id):
+        """Show the first screenshot of a listing to the user who asked"""
+        count = await asyncio.to_thread(self.store.count, listing_id)
+        content = await self.frame(listing_id, 0, count) if count else None
+        if content is None:
+            await interaction.response.send_message("❌ This listing has no screenshots.", ephemeral=True)
             return
-            
-        self.current_index = (self.current_index - 1) % len(self.images)
-        await self.update_message()
-        await interaction.response.defer()
-        
-    @discord.ui.button(custom_id="next", label="", style=discord.ButtonStyle.secondary)
-    async def next_button(self, interaction: discord.Interaction, button: Button):
-        # Only allow the listing owner to change images
-        if interaction.user.id != self.user.id:
-            await interaction.response.send_message("Only the listing owner can change images.", ephemeral=True)
+        content["files"] = content.pop("attachments")
+        await interaction.response.send_message(ephemeral=True, **content)
+
+    async def handle_click(self, interaction: discord.Interaction):
+        parsed = parse_carousel_id(interaction.data.get("custom_id", ""))
+        if parsed is None:
+            await interaction.response.send_message("❌ Invalid carousel button.", ephemeral=True)
             return
-            
-        self.current_index = (self.current_index + 1) % len(self.images)
-        await self.update_message()
+        listing_id, index, count, step = parsed
+
+        # Acknowledge right away; the message is edited once the burst of clicks is over
         await interaction.response.defer()
 
-    async def start(self, channel: discord.TextChannel):
-        """Starts the image carousel"""
-        if not self.images:
-            return None
-            
-        # Create initial embed
-        embed = discord.Embed(color=discord.Color.gold())
-        embed.set_image(url=self.images[0].url)
-        embed.set_footer(text=f"Image {self.current_index + 1}/{len(self.images)}")
-        
-        # Send carousel message
-        self.message = await channel.send(embed=embed, view=self)
-        return self.message
\ No newline at end of file
+        message_id = interaction.message.id
+        pending = self.pending.get(message_id)
+        if pending is None:
+            pending = self.pending[message_id] = PendingEdit(listing_id, index, count)
+            pending.task = asyncio.create_task(self._flush(message_id, pending))
+        else:
+            # The user still sees the old buttons, so count on from the pending position
+            metrics.counter("carousel_clicks_coalesced_total").inc()
+        pending.index = (pending.index + step) % pending.count
+        pending.interaction = interaction
+
+    async def _flush(self, message_id, pending):
+        """Edit the message until it shows the latest pending index, then forget it"""
+        shown = None
+        try:
+            while True:
+                await asyncio.sleep(self.debounce)
+                if pending.index == shown:
+                    break
+                shown = pending.index
+                content = await self.frame(pending.listing_id, shown, pending.count)
+                if content is None:
+                    await pending.interaction.followup.send("❌ This listing is no longer available.", ephemeral=True)
+                    break
+                metrics.counter("carousel_edits_total").inc()
+                await pending.interaction.edit_original_response(**content)
+        except discord.HTTPException as e:
+            log.warning("Could not update carousel %s: %s", message_id, e)
+        finally:
+            self.pending.pop(message_id, None)
@@ -0,0 +1,87 @@
+import time
+import discord
+from .metrics import metrics
+from .logs import get_logger
+from .member_cache import member_resolver
+
+log = get_logger("interactions")
+
+
+class InteractionRouter:
+    """Dispatch component interactions to exactly one handler based on custom_id.
+
+    Exact custom_ids (e.g. ``list_account``) are looked up first, then the text
+    before the first underscore is used as the prefix key (``buy_123`` -> ``buy_``).
+    Both lookups are plain dict hits, so routing cost does not grow with the
+    number of registered routes. Handler latency is recorded per route in the
+    interaction_handler_seconds histogram.
+    """
+
+    def __init__(self):
+        self.exact_routes = {}
+        self.prefix_routes = {}
+        # custom_ids whose buttons already have a view callback attached
+        self.ignored = set()
+
+    def add_route(self, custom_id, handler):
+        """Route an exact custom_id to a handler"""
+        self.exact_routes[custom_id] = handler
+
+    def add_prefix(self, prefix, handler):
+        """Route every custom_id starting with ``prefix`` (which must end in '_')"""
+        if not prefix.endswith("_"):
+            raise ValueError(f"Route prefix must end with '_': {prefix}")
+        self.prefix_routes[prefix] = handler
+
+    def ignore(self, *custom_ids):
+        """Leave these custom_ids to their view callbacks"""
+        self.ignored.update(custom_ids)
+
+    def remove_routes(self, *keys):
+        """Remove exact routes, prefix routes or ignored ids"""
+        for key in keys:
+            self.exact_routes.pop(key, None)
+            self.prefix_routes.pop(key, None)
+            self.ignored.discard(key)
+
+    def resolve(self, custom_id):
+        """Return (route_key, handler) for a custom_id, or (None, None)"""
+        if custom_id in self.ignored:
+            return None, None
+
+        handler = self.exact_routes.get(custom_id)
+        if handler:
+            return custom_id, handler
+
+        head, sep, _ = custom_id.partition("_")
+        if sep:
+            route_key = head + sep
+            handler = self.prefix_routes.get(route_key)
+            if handler:
+                return route_key, handler
+
+        return None, None
+
+    async def dispatch(self, interaction: discord.Interaction):
+        """Run the handler for a component interaction. Returns True if one ran."""
+        if interaction.type != discord.InteractionType.component:
+            return False
+
+        # Anyone pressing listing buttons is an active trader worth keeping cached
+        member_resolver.remember(interaction.user)
+
+        custom_id = interaction.data.get("custom_id", "")
+        route_key, handler = self.resolve(custom_id)
+        if handler is None:
+            return False
+
+        start = time.perf_counter()
+        try:
+            await handler(interaction)
+        except Exception as e:
+            metrics.counter("interaction_errors_total", route=route_key).inc()
+            log.exception("Error handling interaction %s", custom_id)
+        finally:
+            metrics.histogram("interaction_handler_seconds", route=route_key).observe(time.perf_counter() - start)
+
+        return True
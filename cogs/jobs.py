@@ -0,0 +1,413 @@
+import asyncio
+import io
+import json
+import os
+import random
+import secrets
+import sqlite3
+import time
+from contextlib import closing
+import discord
+from discord.ext import commands
+from config import JOB_WORKERS, EMBED_COLOR, DATA_DIR
+from .metrics import metrics
+from .logs import get_logger
+
+log = get_logger("jobs")
+
+JOB_DB_PATH = os.path.join(DATA_DIR, "jobs.db")
+
+# Finished jobs are kept this long so their idempotency keys keep deduplicating
+JOB_RETENTION = 7 * 24 * 3600
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying can't help; the job fails without further attempts"""
+
+
+class LeaseLost(Exception):
+    """Raised when a job's lease expired and another worker has claimed it"""
+
+
+class Job:
+    """A claimed job as handed to its handler"""
+    __slots__ = ("queue", "id", "kind", "payload", "attempts", "max_attempts", "steps", "token", "lost")
+
+    def __init__(self, queue, job_id, kind, payload, attempts, max_attempts, steps, token):
+        self.queue = queue
+        self.id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.steps = steps
+        # Identifies this claim; every write about the job must still match it
+        self.token = token
+        self.lost = False
+
+    def done(self, step):
+        """Whether an earlier attempt already finished this step"""
+        return step in self.steps
+
+    async def checkpoint(self, step):
+        """Record a finished step so a retry after a crash or error skips it"""
+        self.steps.append(step)
+        if not await asyncio.to_thread(self.queue.save_steps, self):
+            raise LeaseLost(f"job {self.id} was claimed by another worker")
+
+
+class JobQueue:
+    """Persistent job queue in SQLite with at-least-once delivery.
+
+    enqueue() stores a row before anything runs, once per idempotency key.
+    Workers claim due jobs by taking a lease, which is renewed while the
+    handler runs; a job whose worker crashed is claimed again once the lease
+    expires, and failures are retried with exponential backoff until
+    max_attempts. Each claim has its own token, and status and step updates
+    only apply while the token still matches, so a worker that lost its
+    lease can't overwrite the new owner's progress. A job can still run more
+    than once, so handlers must be safe to repeat: multi-step handlers record
+    each finished step with Job.checkpoint() and skip it on the next attempt.
+    """
+
+    def __init__(self, db_path=JOB_DB_PATH, lease=300, base_delay=5, max_delay=3600, poll_interval=5):
+        self.db_path = db_path
+        self.lease = lease
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        # kind -> async handler(job)
+        self.handlers = {}
+        self.workers = []
+        self.wakeup = None
+        self.initialized = False
+        # (shard_ids, shard_count) when this process only runs some shards
+        self.shards = None
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        if not self.initialized:
+            self._init_db(conn)
+            self.initialized = True
+        return conn
+
+    def _init_db(self, conn):
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                idempotency_key TEXT UNIQUE,
+                guild_id INTEGER,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                steps TEXT NOT NULL DEFAULT '[]',
+                run_at REAL NOT NULL,
+                locked_until REAL,
+                lease_token TEXT,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+        if 'guild_id' not in columns:
+            conn.execute('ALTER TABLE jobs ADD COLUMN guild_id INTEGER')
+        if 'lease_token' not in columns:
+            conn.execute('ALTER TABLE jobs ADD COLUMN lease_token TEXT')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (status, run_at)')
+
+    def route_shards(self, shard_ids, shard_count):
+        """Only claim jobs for guilds on these shards (plus jobs without a guild)"""
+        self.shards = (list(shard_ids), shard_count)
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    def unregister(self, *kinds):
+        for kind in kinds:
+            self.handlers.pop(kind, None)
+
+    def _insert(self, kind, payload, key, guild_id, delay, max_attempts):
+        now = time.time()
+        with closing(self.connect()) as conn:
+            cursor = conn.execute('''
+                INSERT INTO jobs (kind, payload, idempotency_key, guild_id, max_attempts, run_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (idempotency_key) DO NOTHING
+            ''', (kind, json.dumps(payload), key, guild_id, max_attempts, now + delay, now, now))
+            if cursor.rowcount:
+                return cursor.lastrowid, True
+            return conn.execute('SELECT id FROM jobs WHERE idempotency_key = ?', (key,)).fetchone()[0], False
+
+    async def enqueue(self, kind, payload, key=None, guild_id=None, delay=0, max_attempts=5):
+        """Persist a job and wake a worker. Returns its id; a key seen before returns the existing job.
+
+        Jobs with a guild_id only run in the cluster that has that guild's shard.
+        """
+        job_id, created = await asyncio.to_thread(self._insert, kind, payload, key, guild_id, delay, max_attempts)
+        if created:
+            metrics.counter('jobs_enqueued_total', kind=kind).inc()
+            if self.wakeup is not None:
+                self.wakeup.set()
+        else:
+            log.debug("Job %s already queued as %d", key, job_id)
+        return job_id
+
+    def _shard_filter(self):
+        """SQL condition and params limiting jobs to this process's shards"""
+        if self.shards is None:
+            return '', []
+        # discord.py's shard formula: (guild_id >> 22) % shard_count
+        shard_ids, shard_count = self.shards
+        return (f" AND (guild_id IS NULL OR (guild_id >> 22) % ? IN ({', '.join('?' * len(shard_ids))}))",
+                [shard_count, *shard_ids])
+
+    def _claim(self):
+        """Lease the next due job, or None"""
+        now = time.time()
+        shard_sql, shard_params = self._shard_filter()
+        sql = '''
+            SELECT id, kind, payload, attempts, max_attempts, steps FROM jobs
+            WHERE ((status = 'pending' AND run_at <= ?)
+                   OR (status = 'running' AND locked_until <= ? AND attempts < max_attempts))
+        ''' + shard_sql + ' ORDER BY run_at, id LIMIT 1'
+        token = secrets.token_hex(8)
+
+        with closing(self.connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # A lease that expired on the last attempt is a failure, not another try
+                expired = conn.execute('''
+                    UPDATE jobs SET status = 'failed', locked_until = NULL, lease_token = NULL,
+                        last_error = 'lease expired on the last attempt', updated_at = ?
+                    WHERE status = 'running' AND locked_until <= ? AND attempts >= max_attempts
+                ''' + shard_sql, [now, now, *shard_params]).rowcount
+                if expired:
+                    log.error("Failed %d jobs whose last attempt never finished", expired)
+
+                row = conn.execute(sql, [now, now, *shard_params]).fetchone()
+                if row is None:
+                    conn.execute('COMMIT')
+                    return None
+                job_id, kind, payload, attempts, max_attempts, steps = row
+                conn.execute('''
+                    UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_until = ?, lease_token = ?,
+                        updated_at = ?
+                    WHERE id = ?
+                ''', (now + self.lease, token, now, job_id))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return Job(self, job_id, kind, json.loads(payload), attempts + 1, max_attempts, json.loads(steps), token)
+
+    def _update_leased(self, job, assignments, params):
+        """Apply an update only while job still holds its lease. Returns False if it was lost."""
+        with closing(self.connect()) as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ? AND lease_token = ? AND status = 'running'",
+                (*params, time.time(), job.id, job.token)
+            )
+            return cursor.rowcount == 1
+
+    def save_steps(self, job):
+        return self._update_leased(job, 'steps = ?', (json.dumps(job.steps),))
+
+    def _renew(self, job):
+        return self._update_leased(job, 'locked_until = ?', (time.time() + self.lease,))
+
+    def _finish(self, job, status, error=None):
+        if not self._update_leased(job, 'status = ?, locked_until = NULL, lease_token = NULL, last_error = ?',
+                                   (status, error)):
+            raise LeaseLost(f"job {job.id} was claimed by another worker")
+
+    def _retry(self, job, error):
+        """Schedule another attempt with backoff; returns False once attempts are used up"""
+        if job.attempts >= job.max_attempts:
+            self._finish(job, 'failed', error)
+            return False
+        delay = min(self.max_delay, self.base_delay * 2 ** (job.attempts - 1)) * random.uniform(0.8, 1.2)
+        if not self._update_leased(
+            job, "status = 'pending', run_at = ?, locked_until = NULL, lease_token = NULL, last_error = ?",
+            (time.time() + delay, error)
+        ):
+            raise LeaseLost(f"job {job.id} was claimed by another worker")
+        return True
+
+    async def _heartbeat(self, job, work):
+        """Renew job's lease while work runs; cancel work if another worker took the job over"""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                renewed = await asyncio.to_thread(self._renew, job)
+            except sqlite3.Error as e:
+                # Still ours until the lease runs out; the next beat tries again
+                log.warning("Could not renew the lease of job %d: %s", job.id, e)
+                continue
+            if not renewed:
+                job.lost = True
+                work.cancel()
+                return
+
+    async def _attempt(self, handler, job):
+        """Run the handler once and record the outcome. Returns 'done', 'retry' or 'failed'."""
+        try:
+            if handler is None:
+                raise LookupError(f"no handler registered for '{job.kind}'")
+            await handler(job)
+        except LeaseLost:
+            raise
+        except PermanentJobError as e:
+            log.error("Job %d (%s) failed: %s", job.id, job.kind, e)
+            await asyncio.to_thread(self._finish, job, 'failed', str(e))
+            return 'failed'
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if await asyncio.to_thread(self._retry, job, error):
+                log.warning("Job %d (%s) attempt %d/%d failed, retrying: %s",
+                            job.id, job.kind, job.attempts, job.max_attempts, error)
+                return 'retry'
+            log.exception("Job %d (%s) failed after %d attempts", job.id, job.kind, job.attempts)
+            return 'failed'
+        await asyncio.to_thread(self._finish, job, 'done')
+        return 'done'
+
+    async def run(self, job):
+        handler = self.handlers.get(job.kind)
+        start = time.perf_counter()
+        work = asyncio.create_task(self._attempt(handler, job))
+        heartbeat = asyncio.create_task(self._heartbeat(job, work))
+        try:
+            outcome = await work
+        except asyncio.CancelledError:
+            if not job.lost:
+                # The worker itself is being stopped
+                raise
+            outcome = 'lost'
+        except LeaseLost:
+            outcome = 'lost'
+        finally:
+            heartbeat.cancel()
+            metrics.histogram('job_seconds', kind=job.kind).observe(time.perf_counter() - start)
+        if outcome == 'lost':
+            log.warning("Job %d (%s) lost its lease to another worker; leaving the job to it", job.id, job.kind)
+        metrics.counter('jobs_total', kind=job.kind, outcome=outcome).inc()
+
+    async def worker(self):
+        while True:
+            self.wakeup.clear()
+            try:
+                job = await asyncio.to_thread(self._claim)
+            except sqlite3.Error as e:
+                log.error("Could not claim a job: %s", e)
+                job = None
+            if job is None:
+                # Enqueue wakes us immediately; the timeout picks up retries coming due
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.run(job)
+
+    def start(self, concurrency):
+        """Start the worker pool on the running loop"""
+        if self.workers:
+            return
+        self.wakeup = asyncio.Event()
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(concurrency)]
+        log.info("Started %d job workers", concurrency)
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running are claimed again after their lease"""
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def purge(self, older_than=JOB_RETENTION):
+        """Delete finished jobs (and their idempotency keys) older than older_than seconds"""
+        with closing(self.connect()) as conn:
+            cursor = conn.execute('''
+                DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?
+            ''', (time.time() - older_than,))
+            return cursor.rowcount
+
+    def stats(self):
+        """({status: count}, recent failures as (id, kind, last_error))"""
+        with closing(self.connect()) as conn:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+            failures = conn.execute('''
+                SELECT id, kind, last_error FROM jobs WHERE status = 'failed' ORDER BY updated_at DESC LIMIT 5
+            ''').fetchall()
+        return counts, failures
+
+
+job_queue = JobQueue()
+
+
+class JobsCog(commands.Cog):
+    """Runs the job worker pool and delivers queued DMs"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.start_task = None
+
+    async def cog_load(self):
+        job_queue.register("dm", self.send_dm)
+        removed = await asyncio.to_thread(job_queue.purge)
+        if removed:
+            log.info("Purged %d finished jobs", removed)
+        self.start_task = asyncio.create_task(self.start_workers())
+
+    async def cog_unload(self):
+        job_queue.unregister("dm")
+        if self.start_task:
+            self.start_task.cancel()
+        await job_queue.stop()
+
+    async def start_workers(self):
+        # Handlers look up channels and users, so nothing runs before the cache is ready
+        await self.bot.wait_until_ready()
+        job_queue.start(JOB_WORKERS)
+
+    async def send_dm(self, job):
+        """payload: user_id, content, and optionally filename + text for an attached file"""
+        payload = job.payload
+        try:
+            user = self.bot.get_user(payload["user_id"]) or await self.bot.fetch_user(payload["user_id"])
+        except discord.NotFound:
+            raise PermanentJobError(f"user {payload['user_id']} not found")
+
+        file = None
+        if payload.get("text") is not None:
+            file = discord.File(io.BytesIO(payload["text"].encode()), filename=payload["filename"])
+        try:
+            await user.send(content=payload["content"], file=file)
+        except discord.Forbidden:
+            # DMs closed; retrying won't change that
+            log.info("Could not DM user %s, DMs are closed", payload["user_id"])
+
+    @commands.command(name="jobs")
+    @commands.has_permissions(administrator=True)
+    async def jobs(self, ctx):
+        """Show queued, running and failed background jobs"""
+        counts, failures = await asyncio.to_thread(job_queue.stats)
+        embed = discord.Embed(title="🧰 Background Jobs", color=EMBED_COLOR)
+        for status in ("pending", "running", "done", "failed"):
+            embed.add_field(name=status.title(), value=str(counts.get(status, 0)), inline=True)
+        if failures:
+            embed.add_field(
+                name="Recent failures",
+                value="\n".join(f"`#{job_id}` {kind}: {(error or '')[:80]}" for job_id, kind, error in failures),
+                inline=False
+            )
+        embed.set_footer(text=f"{len(job_queue.workers)} workers")
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(JobsCog(bot))
@@ -0,0 +1,175 @@
+from PIL import Image, ImageDraw, ImageFont
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from config.layout import SHOWCASE_UPLOAD_CONFIG
+from . import collage
+from .logs import get_logger
+
+log = get_logger("layout")
+
+SHOWCASE = "SHOWCASE"
+# Cached lookups take microseconds, so they are averaged over this many calls
+CACHED_RUNS = 100
+
+# (layout name, template mtime, map mtime) -> (overlay PNG bytes, zone reports)
+_overlays = {}
+_overlays_lock = threading.Lock()
+
+
+class ZoneReport:
+    """Where one zone of a template was found and what finding it costs"""
+    __slots__ = ("name", "color", "zone", "scan_seconds", "cached_seconds")
+
+    def __init__(self, name, color, zone, scan_seconds, cached_seconds):
+        self.name = name
+        self.color = color
+        self.zone = zone
+        # A full scan of the map, as on a cold cache
+        self.scan_seconds = scan_seconds
+        # A lookup once the zone is cached, as on every warm render
+        self.cached_seconds = cached_seconds
+
+    def to_dict(self):
+        return {
+            "zone": list(self.zone) if self.zone else None,
+            "color": "#%02x%02x%02x" % tuple(self.color[:3]),
+            "scan_ms": round(self.scan_seconds * 1000, 3),
+            "cached_us": round(self.cached_seconds * 1_000_000, 2),
+        }
+
+
+def layouts(generator):
+    """Every inspectable layout by name: the color-mapped templates plus the showcase"""
+    table = {layout[0]: layout for layout in generator.template_layouts()}
+    table[SHOWCASE] = (SHOWCASE, generator.showcase_path(), None, None, None, ())
+    return table
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def inspect_zones(generator, layout):
+    """ZoneReport for every zone of a layout, in the order renderers look them up"""
+    name, _, map_path, map_mode, size, zone_names = layout
+    if name == SHOWCASE:
+        # Tiles come from SHOWCASE_LAYOUT; show the fullest grid
+        count = SHOWCASE_UPLOAD_CONFIG['max_images']
+        zones, seconds = _timed(collage.grid_zones, count)
+        return [ZoneReport(str(i + 1), (255, 165, 0), zone, seconds / count, seconds / count)
+                for i, zone in enumerate(zones)]
+
+    map_image = generator.load_image(map_path, map_mode, size)
+    reports = []
+    for zone_name in zone_names:
+        color = generator.COLOR_MAPPINGS[zone_name]
+        zone, scan_seconds = _timed(generator._scan_color_zone, map_image, color)
+        generator.find_color_zone(map_image, color)
+        _, cached_seconds = _timed(lambda: [generator.find_color_zone(map_image, color) for _ in range(CACHED_RUNS)])
+        reports.append(ZoneReport(zone_name, color, zone, scan_seconds, cached_seconds / CACHED_RUNS))
+    return reports
+
+
+def label_font(generator, size=18):
+    try:
+        return ImageFont.truetype(generator.font_path, size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+def render_overlay(generator, layout, reports):
+    """The template with each zone filled and outlined in its map color and labelled with its box"""
+    _, template_path, _, _, size, _ = layout
+    template = generator.load_image(template_path, 'RGBA', size)
+    overlay = Image.new('RGBA', template.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    font = label_font(generator)
+
+    for report in reports:
+        if report.zone is None:
+            continue
+        left, top, right, bottom = report.zone
+        color = tuple(report.color[:3])
+        draw.rectangle(report.zone, fill=color + (70,), outline=color + (255,), width=2)
+        draw.text((left + 4, top + 2), f"{report.name} ({left},{top})-({right},{bottom})", font=font,
+                  fill=(255, 255, 255, 255), stroke_width=2, stroke_fill=(0, 0, 0, 255))
+    return Image.alpha_composite(template, overlay)
+
+
+def _mtime(path):
+    return os.path.getmtime(path) if path else None
+
+
+def overlay_png(generator, layout):
+    """(PNG bytes, zone reports) for a layout, rendered once per version of its template and map"""
+    name, template_path, map_path = layout[:3]
+    key = (name, _mtime(template_path), _mtime(map_path))
+    cached = _overlays.get(key)
+    if cached is not None:
+        return cached
+
+    reports = inspect_zones(generator, layout)
+    buffer = io.BytesIO()
+    render_overlay(generator, layout, reports).save(buffer, format='PNG')
+    with _overlays_lock:
+        # Older versions of this template are never shown again
+        for stale in [stale for stale in _overlays if stale[0] == name]:
+            del _overlays[stale]
+        _overlays[key] = (buffer.getvalue(), reports)
+    return _overlays[key]
+
+
+def describe(name, reports):
+    """Text summary of a layout's zones, with missing zones flagged"""
+    lines = [f"**{name}**"]
+    for report in reports:
+        if report.zone is None:
+            lines.append(f"⚠️ `{report.name}` not found in map")
+            continue
+        left, top, right, bottom = report.zone
+        lines.append(f"`{report.name}` ({left},{top})-({right},{bottom}) {right - left}x{bottom - top} · "
+                     f"scan {report.scan_seconds * 1000:.1f}ms · cached {report.cached_seconds * 1_000_000:.1f}µs")
+    return "\n".join(lines)
+
+
+def export_layouts(generator, out_dir):
+    """Write every layout's overlay and a layouts.json report of zones and lookup timings"""
+    os.makedirs(out_dir, exist_ok=True)
+    summary = {}
+    for name, layout in layouts(generator).items():
+        try:
+            png, reports = overlay_png(generator, layout)
+        except OSError as e:
+            log.warning("Skipping %s: %s", name, e)
+            summary[name] = {"error": str(e)}
+            continue
+        with open(os.path.join(out_dir, f"{name.lower()}.png"), "wb") as f:
+            f.write(png)
+        summary[name] = {report.name: report.to_dict() for report in reports}
+
+    with open(os.path.join(out_dir, "layouts.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export zone overlays and lookup timings for every template")
+    parser.add_argument("--out", default="layout_overlays", help="directory for the PNGs and layouts.json")
+    args = parser.parse_args(argv)
+
+    from .embed_generator import EmbedGenerator
+    summary = export_layouts(EmbedGenerator(), args.out)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return 1 if any("error" in zones or any(z["zone"] is None for z in zones.values())
+                    for zones in summary.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
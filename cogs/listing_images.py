@@ -0,0 +1,70 @@
+import sqlite3
+from .metrics import metrics
+
+
+class ListingImageStore:
+    """Carousel thumbnails of each listing's screenshots, stored as SQLite blobs.
+
+    Thumbnails are encoded once when the listing is posted, so a carousel
+    click is one primary-key read and nothing about a carousel stays in
+    memory between clicks.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS listing_images (
+                listing_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                thumbnail BLOB NOT NULL,
+                PRIMARY KEY (listing_id, position)
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    @metrics.timed('db_query_seconds', query='store_listing_images')
+    def store(self, listing_id, thumbnails):
+        """Replace a listing's thumbnails with the given JPEG bytes, in display order"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('DELETE FROM listing_images WHERE listing_id = ?', (listing_id,))
+        conn.executemany(
+            'INSERT INTO listing_images (listing_id, position, thumbnail) VALUES (?, ?, ?)',
+            [(listing_id, position, thumbnail) for position, thumbnail in enumerate(thumbnails)]
+        )
+        conn.commit()
+        conn.close()
+
+    def move(self, old_listing_id, new_listing_id):
+        """Hand an edited listing's thumbnails over to the listing that replaces it"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('UPDATE listing_images SET listing_id = ? WHERE listing_id = ?', (new_listing_id, old_listing_id))
+        conn.commit()
+        conn.close()
+
+    def delete(self, listing_id):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('DELETE FROM listing_images WHERE listing_id = ?', (listing_id,))
+        conn.commit()
+        conn.close()
+
+    @metrics.timed('db_query_seconds', query='count_listing_images')
+    def count(self, listing_id):
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT COUNT(*) FROM listing_images WHERE listing_id = ?', (listing_id,)).fetchone()
+        conn.close()
+        return row[0]
+
+    @metrics.timed('db_query_seconds', query='get_listing_image')
+    def thumbnail(self, listing_id, position):
+        """JPEG bytes of one thumbnail, or None"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            'SELECT thumbnail FROM listing_images WHERE listing_id = ? AND position = ?', (listing_id, position)
+        ).fetchone()
+        conn.close()
+        return row[0] if row else None
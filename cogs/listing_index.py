@@ -0,0 +1,172 @@
+import json
+import sqlite3
+from .prices import parse_usd, parse_rate, parse_amount, PriceFormatError
+
+# Columns extracted from listing_data so /search never has to parse JSON
+INDEXED_COLUMNS = {
+    'kind': 'TEXT',
+    'account_type': 'TEXT',
+    'ban_status': 'TEXT',
+    'email_status': 'TEXT',
+    # USD for accounts, USD per million for GP
+    'price_value': 'REAL',
+    'gp_amount': 'REAL',
+    'payment_method': 'TEXT',
+}
+
+
+def _parsed(parser, text):
+    try:
+        return parser(text)
+    except PriceFormatError:
+        return None
+
+
+def init_listing_index(conn):
+    """Add the search columns, indexes and FTS table to an existing listings table"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(listings)')}
+    for column, column_type in INDEXED_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f'ALTER TABLE listings ADD COLUMN {column} {column_type}')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_listings_search
+        ON listings (kind, account_type, ban_status, email_status, price_value)
+        WHERE is_active = TRUE
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_listings_price ON listings (kind, price_value) WHERE is_active = TRUE')
+    conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS listings_fts USING fts5(details)')
+
+    # Listings stored before the index existed
+    rows = conn.execute('''
+        SELECT id, listing_data FROM listings
+        WHERE is_active = TRUE AND (kind IS NULL OR (kind = 'gp' AND payment_method IS NULL))
+    ''').fetchall()
+    for listing_id, listing_data in rows:
+        try:
+            data = json.loads(listing_data) if listing_data else {}
+        except ValueError:
+            data = {}
+        index_listing(conn, listing_id, data)
+
+
+def extract_attributes(listing_data):
+    """Indexed column values for one listing_data dict.
+
+    Values normalised at submit time (price_value, amount_value) are used as
+    is; older listings are parsed from their free-text fields.
+    """
+    selections = listing_data.get('user_selections') or {}
+    is_gp = 'gp_type' in listing_data
+    price_value = listing_data.get('price_value')
+    if price_value is None:
+        price_value = _parsed(parse_rate if is_gp else parse_usd, listing_data.get('price'))
+    gp_amount = listing_data.get('amount_value')
+    if gp_amount is None and is_gp:
+        gp_amount = _parsed(parse_amount, listing_data.get('amount'))
+
+    return {
+        'kind': 'gp' if is_gp else 'account',
+        'account_type': (listing_data.get('account_type') or listing_data.get('gp_type') or '').lower() or None,
+        'ban_status': (selections.get('ban_status') or '').lower().strip() or None,
+        'email_status': (selections.get('email_status') or '').lower().strip() or None,
+        'price_value': price_value,
+        'gp_amount': gp_amount,
+        'payment_method': listing_data.get('payment_method'),
+    }
+
+
+def index_listing(conn, listing_id, listing_data):
+    """Write the extracted columns and FTS row for a listing (call inside the storing transaction).
+
+    Returns the extracted attributes.
+    """
+    attributes = extract_attributes(listing_data)
+    conn.execute(
+        f'UPDATE listings SET {", ".join(f"{column} = ?" for column in attributes)} WHERE id = ?',
+        (*attributes.values(), listing_id)
+    )
+    details = '\n'.join(filter(None, (listing_data.get('details_left'), listing_data.get('details_right'))))
+    conn.execute('DELETE FROM listings_fts WHERE rowid = ?', (listing_id,))
+    if details:
+        conn.execute('INSERT INTO listings_fts (rowid, details) VALUES (?, ?)', (listing_id, details))
+    return attributes
+
+
+def unindex_listing(conn, listing_id):
+    conn.execute('DELETE FROM listings_fts WHERE rowid = ?', (listing_id,))
+
+
+def search_listings(db_path, kind='account', account_type=None, ban_status=None, email_status=None,
+                    min_price=None, max_price=None, keywords=None, before_id=None, limit=5):
+    """One page of active listings matching every filter, newest first.
+
+    Returns dicts with the fields needed for a result embed. Pages with keyset
+    pagination: pass the last id of the previous page as before_id.
+    """
+    clauses = ['l.is_active = TRUE', 'l.kind = ?']
+    params = [kind]
+    for column, value in (('account_type', account_type), ('ban_status', ban_status), ('email_status', email_status)):
+        if value:
+            clauses.append(f'l.{column} = ?')
+            params.append(value.lower())
+    if min_price is not None:
+        clauses.append('l.price_value >= ?')
+        params.append(min_price)
+    if max_price is not None:
+        clauses.append('l.price_value <= ?')
+        params.append(max_price)
+    if before_id:
+        clauses.append('l.id < ?')
+        params.append(before_id)
+
+    source = 'listings l'
+    if keywords:
+        terms = [term.replace('"', '""') for term in keywords.split()]
+        source = 'listings_fts f JOIN listings l ON l.id = f.rowid'
+        clauses.append('listings_fts MATCH ?')
+        params.append(' '.join(f'"{term}"' for term in terms))
+
+    sql = f'''
+        SELECT l.id, l.user_id, l.channel_id, l.account_message_id, l.account_type,
+               l.ban_status, l.email_status, l.price_value, l.listing_data
+        FROM {source}
+        WHERE {' AND '.join(clauses)}
+        ORDER BY l.id DESC LIMIT ?
+    '''
+    params.append(limit)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+    results = []
+    for listing_id, user_id, channel_id, message_id, account_type, ban, email, price_value, listing_data in rows:
+        data = json.loads(listing_data) if listing_data else {}
+        results.append({
+            'id': listing_id,
+            'user_id': user_id,
+            'channel_id': channel_id,
+            'message_id': message_id,
+            'account_type': data.get('account_type') or account_type,
+            'ban_status': ban,
+            'email_status': email,
+            'price': data.get('price') or (f"{price_value:g}" if price_value is not None else "?"),
+            'details': '\n'.join(filter(None, (data.get('details_left'), data.get('details_right')))),
+        })
+    return results
+
+
+def active_gp_listings(db_path):
+    """(id, user_id, channel_id, side, rate, amount, payment_method) for every active GP listing"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('''
+            SELECT id, user_id, channel_id, account_type, price_value, gp_amount, payment_method
+            FROM listings
+            WHERE is_active = TRUE AND kind = 'gp' AND price_value IS NOT NULL
+        ''').fetchall()
+    finally:
+        conn.close()
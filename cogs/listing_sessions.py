@@ -0,0 +1,189 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ListingSession:
+    """Choices a user has made so far in the account listing flow"""
+    __slots__ = ("user_id", "account_type", "ban_status", "email_status", "updated_at")
+
+    FIELDS = ("account_type", "ban_status", "email_status")
+
+    def __init__(self, user_id, account_type=None, ban_status=None, email_status=None, updated_at=None):
+        self.user_id = user_id
+        self.account_type = account_type
+        self.ban_status = ban_status
+        self.email_status = email_status
+        self.updated_at = updated_at or time.time()
+
+    def to_dict(self):
+        """Selections in the shape stored in listing_data['user_selections']"""
+        return {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not None}
+
+
+class ListingSessionStore:
+    """In-flight listing sessions with TTL expiry and a hard size cap.
+
+    Sessions are kept in an OrderedDict in least-recently-updated order, so
+    expired or excess entries are always popped from the front. Persistence
+    is optional: with a db_path, live sessions are reloaded by load() after a
+    restart and changes are written behind in batches by flush(), on one
+    connection in a worker thread, so clicks never wait on SQLite.
+    """
+
+    def __init__(self, ttl=900, max_sessions=1000, db_path=None, flush_delay=2.0):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.db_path = db_path
+        self.flush_delay = flush_delay
+        self.sessions = OrderedDict()
+        # user_id -> session to write, or None to delete it; only used with a db_path
+        self.dirty = {}
+        self.flush_task = None
+        self.flush_lock = asyncio.Lock()
+        self.conn = None
+        self.conn_lock = threading.Lock()
+
+    def _connect(self):
+        """The store's one connection, created with its table on first use (call with conn_lock held)"""
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS listing_sessions (
+                    user_id INTEGER PRIMARY KEY,
+                    account_type TEXT,
+                    ban_status TEXT,
+                    email_status TEXT,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            self.conn.commit()
+        return self.conn
+
+    def _expired(self, session, now):
+        return now - session.updated_at > self.ttl
+
+    def _evict(self, now):
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if len(self.sessions) > self.max_sessions or self._expired(oldest, now):
+                self.sessions.popitem(last=False)
+            else:
+                break
+
+    def _read_live(self, since):
+        with self.conn_lock:
+            rows = self._connect().execute('''
+                SELECT user_id, account_type, ban_status, email_status, updated_at
+                FROM listing_sessions WHERE updated_at >= ? ORDER BY updated_at DESC
+            ''', (since,)).fetchall()
+        return [ListingSession(*row) for row in rows]
+
+    def _write(self, batch, expired_before=None):
+        with self.conn_lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO listing_sessions
+                    (user_id, account_type, ban_status, email_status, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', [(session.user_id, session.account_type, session.ban_status,
+                       session.email_status, session.updated_at) for session in batch.values() if session])
+                conn.executemany('DELETE FROM listing_sessions WHERE user_id = ?',
+                                 [(user_id,) for user_id, session in batch.items() if session is None])
+                if expired_before is not None:
+                    conn.execute('DELETE FROM listing_sessions WHERE updated_at < ?', (expired_before,))
+
+    async def load(self):
+        """Reload sessions still live from the database after a restart"""
+        if not self.db_path:
+            return
+        now = time.time()
+        for session in await asyncio.to_thread(self._read_live, now - self.ttl):
+            # Newest first, each moved to the front, so memory ends up oldest first
+            if session.user_id not in self.sessions:
+                self.sessions[session.user_id] = session
+                self.sessions.move_to_end(session.user_id, last=False)
+        self._evict(now)
+
+    def _mark(self, user_id, session):
+        """Queue a session write (or a delete, for None) for the next batch"""
+        if not self.db_path:
+            return
+        self.dirty[user_id] = session
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        # Changes from here on schedule the next batch
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self, expired_before=None):
+        """Write queued changes in one transaction off the event loop"""
+        if not self.db_path:
+            return
+        async with self.flush_lock:
+            batch, self.dirty = self.dirty, {}
+            if batch or expired_before is not None:
+                await asyncio.to_thread(self._write, batch, expired_before)
+
+    def get(self, user_id):
+        """Return the user's live session, or None if missing or expired"""
+        session = self.sessions.get(user_id)
+        if session is None:
+            return None
+        if self._expired(session, time.time()):
+            self.discard(user_id)
+            return None
+        return session
+
+    def start(self, user_id, **fields):
+        """Begin a fresh session, dropping choices left over from an earlier flow"""
+        self.sessions.pop(user_id, None)
+        return self.update(user_id, _fresh=True, **fields)
+
+    def update(self, user_id, _fresh=False, **fields):
+        """Set fields on the user's session, creating it if needed"""
+        now = time.time()
+        session = None if _fresh else self.get(user_id)
+        if session is None:
+            session = ListingSession(user_id)
+        for field, value in fields.items():
+            if field in ListingSession.FIELDS:
+                setattr(session, field, value)
+        session.updated_at = now
+
+        self.sessions[user_id] = session
+        self.sessions.move_to_end(user_id)
+        self._evict(now)
+        self._mark(user_id, session)
+        return session
+
+    def discard(self, user_id):
+        """Forget a session once the listing has been posted or abandoned"""
+        self.sessions.pop(user_id, None)
+        self._mark(user_id, None)
+
+    async def purge_expired(self):
+        """Drop expired sessions from memory and the database"""
+        now = time.time()
+        self._evict(now)
+        await self.flush(expired_before=now - self.ttl)
+
+    async def close(self):
+        """Write anything still queued and close the connection"""
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        await self.flush()
+        with self.conn_lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def __len__(self):
+        return len(self.sessions)
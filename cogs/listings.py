@@ -1,23 +1,46 @@
 import discord
 from discord.ext import commands
+from discord import app_commands
 from discord.ui import View, Button, Modal, TextInput
 import asyncio
 import sqlite3
 import json
 import io
+import os
+import inspect
 from datetime import datetime, timedelta
-from .embed_generator import EmbedGenerator
-
-# Store user selections temporarily
-user_selections = {}
+from config import RENDER_CONCURRENCY, DATA_DIR, PERSIST_LISTING_SESSIONS
+from config.layout import SHOWCASE_UPLOAD_CONFIG
+from .upload_sessions import upload_sessions
+from .listing_sessions import ListingSessionStore
+from .listing_images import ListingImageStore
+from .image_carousel import ImageCarousel, CAROUSEL_PREFIX
+from .render_queue import RenderCoordinator, RenderBusy
+from .listing_index import init_listing_index, index_listing, unindex_listing
+from .prices import parse_usd, parse_rate, parse_amount, PriceFormatError
+from .gp_rates import gp_order_book
+from .jobs import job_queue
+from .cluster_ipc import cluster_ipc
+from .guild_cache import guild_metadata
+from .member_cache import member_resolver
+from .metrics import metrics
+from .logs import get_logger
+
+log = get_logger("listings")
+
+# Shown when screenshots can't be uploaded in chat because the message content intent is off
+ATTACH_WITH_COMMAND = ("📎 Screenshots can't be uploaded in chat on this server. "
+                       "Use **/listaccount** and attach them to the command instead.")
 
 # Database setup
-DB_PATH = "/app/data/listings.db"
+DB_PATH = os.path.join(DATA_DIR, "listings.db")
 
 def init_listings_db():
     """Initialize the listings database"""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
+    # WAL lets cluster processes read while another one writes
+    cursor.execute('PRAGMA journal_mode=WAL')
     
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS listings (
@@ -35,10 +58,12 @@ def init_listings_db():
             is_active BOOLEAN DEFAULT TRUE
         )
     ''')
+    init_listing_index(conn)
     
     conn.commit()
     conn.close()
 
+@metrics.timed('db_query_seconds', query='store_listing')
 def store_listing(user_id, channel_id, account_message_id, image_message_id, 
                   account_image_bytes, showcase_images_bytes, listing_data):
     """Store a new listing in the database"""
@@ -62,10 +87,18 @@ def store_listing(user_id, channel_id, account_message_id, image_message_id,
           datetime.now(), datetime.now(), datetime.now()))
     
     listing_id = cursor.lastrowid
+    attributes = index_listing(conn, listing_id, listing_data)
     conn.commit()
     conn.close()
+
+    if attributes['kind'] == 'gp':
+        order = [listing_id, user_id, channel_id, attributes['account_type'],
+                 attributes['price_value'], attributes['gp_amount'], attributes['payment_method']]
+        gp_order_book.add(*order)
+        cluster_ipc.publish("gp_order", added=order)
     return listing_id
 
+@metrics.timed('db_query_seconds', query='get_listing')
 def get_listing(listing_id):
     """Get a listing by ID"""
     conn = sqlite3.connect(DB_PATH)
@@ -94,6 +127,7 @@ def get_listing(listing_id):
         }
     return None
 
+@metrics.timed('db_query_seconds', query='can_bump_listing')
 def can_bump_listing(listing_id):
     """Check if a listing can be bumped (48-hour cooldown)"""
     conn = sqlite3.connect(DB_PATH)
@@ -111,6 +145,7 @@ def can_bump_listing(listing_id):
         return datetime.now() - last_bumped >= timedelta(hours=48)
     return False
 
+@metrics.timed('db_query_seconds', query='update_listing_interaction')
 def update_listing_interaction(listing_id):
     """Update the last interaction time for a listing"""
     conn = sqlite3.connect(DB_PATH)
@@ -125,6 +160,7 @@ def update_listing_interaction(listing_id):
     conn.commit()
     conn.close()
 
+@metrics.timed('db_query_seconds', query='get_old_listings')
 def get_old_listings():
     """Get listings older than 10 days with no recent interactions"""
     conn = sqlite3.connect(DB_PATH)
@@ -146,21 +182,81 @@ def get_old_listings():
     return [{'id': r[0], 'user_id': r[1], 'channel_id': r[2], 
              'account_message_id': r[3], 'image_message_id': r[4]} for r in results]
 
-def delete_listing_from_db(listing_id):
-    """Mark a listing as inactive in the database"""
+@metrics.timed('db_query_seconds', query='delete_listing_from_db')
+def delete_listing_from_db(listing_id, keep_images=False):
+    """Mark a listing as inactive in the database (keep_images leaves its thumbnails for an edit)"""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute('''
         UPDATE listings SET is_active = FALSE WHERE id = ?
     ''', (listing_id,))
+    unindex_listing(conn, listing_id)
     
     conn.commit()
     conn.close()
+    if not keep_images:
+        listing_images.delete(listing_id)
+    gp_order_book.remove(listing_id)
+    cluster_ipc.publish("gp_order", removed=listing_id)
 
 # Initialize database on module load
 init_listings_db()
 
+# In-progress selections for the account listing flow (expire after 15 minutes)
+listing_sessions = ListingSessionStore(ttl=900, max_sessions=1000,
+                                       db_path=DB_PATH if PERSIST_LISTING_SESSIONS else None)
+
+# Screenshot thumbnails live in the listings database; carousels read them per click
+listing_images = ListingImageStore(DB_PATH)
+image_carousel = ImageCarousel(listing_images)
+
+def new_embed_generator():
+    """EmbedGenerator, imported on first render so Pillow stays out of startup"""
+    from .embed_generator import EmbedGenerator
+    return EmbedGenerator()
+
+# Shared render slots plus de-duplication of double submits and repeated clicks
+render_coordinator = RenderCoordinator(max_concurrent=RENDER_CONCURRENCY, per_user_limit=1, per_user_queue=2)
+
+async def delete_message_quietly(message):
+    """Delete a message, ignoring failures (already deleted, missing permissions)"""
+    try:
+        await message.delete()
+    except Exception:
+        pass
+
+# Deletes still in flight; the event loop only keeps weak references to tasks
+_pending_deletes = set()
+
+def delete_in_background(message):
+    """Delete a message without waiting for Discord to confirm it"""
+    task = asyncio.create_task(delete_message_quietly(message))
+    _pending_deletes.add(task)
+    task.add_done_callback(_pending_deletes.discard)
+
+def screenshot_options(count=SHOWCASE_UPLOAD_CONFIG['max_images']):
+    """Give a slash command callback taking **screenshots the options screenshot1..screenshotN
+
+    Only the first is required. The callback's signature is rewritten before
+    app_commands reads it, so /listaccount accepts as many images as the
+    showcase template can show.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        params = [p for p in signature.parameters.values() if p.kind != inspect.Parameter.VAR_KEYWORD]
+        for number in range(1, count + 1):
+            params.append(inspect.Parameter(
+                f"screenshot{number}", inspect.Parameter.KEYWORD_ONLY, annotation=discord.Attachment,
+                default=inspect.Parameter.empty if number == 1 else None
+            ))
+        func.__signature__ = signature.replace(parameters=params)
+        return app_commands.describe(
+            screenshot1="Main screenshot for your listing",
+            **{f"screenshot{number}": "Optional extra screenshot" for number in range(2, count + 1)}
+        )(func)
+    return decorator
+
 class AccountTypeSelectView(View):
     def __init__(self, account_type: str, channel_type: str, channels: dict):
         super().__init__(timeout=60)
@@ -170,18 +266,12 @@ class AccountTypeSelectView(View):
 
     @discord.ui.button(label="Legacy", style=discord.ButtonStyle.primary)
     async def legacy_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_id = interaction.user.id
-        if user_id not in user_selections:
-            user_selections[user_id] = {}
-        user_selections[user_id]['account_type'] = 'legacy'
+        listing_sessions.start(interaction.user.id, account_type='legacy')
         await interaction.response.send_message("✅ Account Type: Legacy\n\n**Ban Status:**", view=BanStatusSelectView(self.account_type, self.channel_type, self.CHANNELS), ephemeral=True)
 
     @discord.ui.button(label="Jagex", style=discord.ButtonStyle.success)
     async def jagex_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_id = interaction.user.id
-        if user_id not in user_selections:
-            user_selections[user_id] = {}
-        user_selections[user_id]['account_type'] = 'jagex'
+        listing_sessions.start(interaction.user.id, account_type='jagex')
         await interaction.response.send_message("✅ Account Type: Jagex\n\n**Ban Status:**", view=BanStatusSelectView(self.account_type, self.channel_type, self.CHANNELS), ephemeral=True)
 
 class BanStatusSelectView(View):
@@ -193,11 +283,10 @@ class BanStatusSelectView(View):
 
     @discord.ui.button(label="No Bans", style=discord.ButtonStyle.success)
     async def no_bans_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_id = interaction.user.id
-        user_selections[user_id]['ban_status'] = 'no bans'
+        session = listing_sessions.update(interaction.user.id, ban_status='no bans')
         
         # Check if this is a Legacy account to show email status
-        if user_selections[user_id].get('account_type') == 'legacy':
+        if session.account_type == 'legacy':
             await interaction.response.send_message("✅ Ban Status: No Bans\n\n**Email Status:**", view=EmailStatusSelectView(self.account_type, self.channel_type, self.CHANNELS), ephemeral=True)
         else:
             # For Jagex accounts, proceed directly to modal
@@ -205,11 +294,10 @@ class BanStatusSelectView(View):
 
     @discord.ui.button(label="Temp ban", style=discord.ButtonStyle.danger)
     async def temp_banned_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_id = interaction.user.id
-        user_selections[user_id]['ban_status'] = 'temp ban'
+        session = listing_sessions.update(interaction.user.id, ban_status='temp ban')
         
         # Check if this is a Legacy account to show email status
-        if user_selections[user_id].get('account_type') == 'legacy':
+        if session.account_type == 'legacy':
             await interaction.response.send_message("✅ Ban Status: Temp ban\n\n**Email Status:**", view=EmailStatusSelectView(self.account_type, self.channel_type, self.CHANNELS), ephemeral=True)
         else:
             # For Jagex accounts, proceed directly to modal
@@ -217,19 +305,18 @@ class BanStatusSelectView(View):
 
     @discord.ui.button(label="Expired Ban", style=discord.ButtonStyle.secondary)
     async def expired_ban_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_id = interaction.user.id
-        user_selections[user_id]['ban_status'] = 'expired ban'
+        session = listing_sessions.update(interaction.user.id, ban_status='expired ban')
         
         # Check if this is a Legacy account to show email status
-        if user_selections[user_id].get('account_type') == 'legacy':
+        if session.account_type == 'legacy':
             await interaction.response.send_message("✅ Ban Status: Expired Ban\n\n**Email Status:**", view=EmailStatusSelectView(self.account_type, self.channel_type, self.CHANNELS), ephemeral=True)
         else:
             # For Jagex accounts, proceed directly to modal
             await self.proceed_to_modal(interaction)
 
     async def proceed_to_modal(self, interaction: discord.Interaction):
-        user_id = interaction.user.id
-        await interaction.response.send_modal(AccountListingModal(self.account_type, self.channel_type, self.CHANNELS, user_selections[user_id]))
+        session = listing_sessions.update(interaction.user.id)
+        await interaction.response.send_modal(AccountListingModal(self.account_type, self.channel_type, self.CHANNELS, session.to_dict()))
 
 class EmailStatusSelectView(View):
     def __init__(self, account_type: str, channel_type: str, channels: dict):
@@ -240,18 +327,16 @@ class EmailStatusSelectView(View):
 
     @discord.ui.button(label="Registered", style=discord.ButtonStyle.primary)
     async def registered_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_id = interaction.user.id
-        user_selections[user_id]['email_status'] = 'registered'
-        await interaction.response.send_modal(AccountListingModal(self.account_type, self.channel_type, self.CHANNELS, user_selections[user_id]))
+        session = listing_sessions.update(interaction.user.id, email_status='registered')
+        await interaction.response.send_modal(AccountListingModal(self.account_type, self.channel_type, self.CHANNELS, session.to_dict()))
 
     @discord.ui.button(label="Unregistered", style=discord.ButtonStyle.secondary)
     async def unregistered_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_id = interaction.user.id
-        user_selections[user_id]['email_status'] = 'unregistered'
-        await interaction.response.send_modal(AccountListingModal(self.account_type, self.channel_type, self.CHANNELS, user_selections[user_id]))
+        session = listing_sessions.update(interaction.user.id, email_status='unregistered')
+        await interaction.response.send_modal(AccountListingModal(self.account_type, self.channel_type, self.CHANNELS, session.to_dict()))
 
 class AccountListingModal(Modal):
-    def __init__(self, account_type: str, channel_type: str, channels: dict, user_selections: dict, is_edit_mode=False, existing_showcase_image=None):
+    def __init__(self, account_type: str, channel_type: str, channels: dict, user_selections: dict, is_edit_mode=False, existing_showcase_image=None, existing_listing_id=None):
         super().__init__(title=f"List an OSRS {account_type} Account")
         self.account_type = account_type
         self.channel_type = channel_type
@@ -259,6 +344,7 @@ class AccountListingModal(Modal):
         self.user_selections = user_selections
         self.is_edit_mode = is_edit_mode
         self.existing_showcase_image = existing_showcase_image
+        self.existing_listing_id = existing_listing_id
         
         # Left Side Details (1 text input with multiple lines)
         self.details_left = TextInput(
@@ -278,7 +364,7 @@ class AccountListingModal(Modal):
         
         self.price = TextInput(
             label="Price / Value",
-            placeholder="Enter your asking price in USD",
+            placeholder="USD, e.g. 250 or $250 (text like 'offers' is posted as-is)",
             max_length=50
         )
 
@@ -290,8 +376,31 @@ class AccountListingModal(Modal):
     async def on_submit(self, interaction: discord.Interaction):
         try:
             await interaction.response.defer(ephemeral=True)
-            
-            trusted = any("trusted" in role.name.lower() for role in interaction.user.roles)
+
+            try:
+                self.price_value = parse_usd(self.price.value)
+            except PriceFormatError:
+                # Free-text prices ("offers", "$50 obo") are still posted; they just can't be filtered on
+                self.price_value = None
+                await interaction.followup.send(
+                    f"ℹ️ Your price '{self.price.value}' is posted as written, but it isn't a plain USD amount "
+                    "so the listing won't show up in price-filtered searches. Use a format like 250 or $250 to include it.",
+                    ephemeral=True
+                )
+
+            # A double-submitted modal joins the first submission instead of posting twice
+            key = ("account", interaction.user.id, self.account_type, self.details_left.value,
+                   self.details_right.value, self.price.value)
+            _, shared = await render_coordinator.coalesce(key, lambda: self.post_listing(interaction))
+            if shared:
+                await interaction.followup.send("⏳ This listing is already being posted.", ephemeral=True)
+        except Exception as e:
+            log.exception("Error in on_submit")
+            await interaction.followup.send(f"❌ Something went wrong: {str(e)}. Please try again.", ephemeral=True)
+
+    async def post_listing(self, interaction: discord.Interaction):
+        try:
+            trusted = guild_metadata.is_trusted(interaction.user)
             target_channels = self.CHANNELS["trusted"] if trusted else self.CHANNELS["public"]
             target_channel_id = target_channels[self.channel_type]
             listing_channel = interaction.guild.get_channel(target_channel_id)
@@ -301,51 +410,66 @@ class AccountListingModal(Modal):
                 return
 
             # Handle image collection based on mode
+            embed_generator = new_embed_generator()
             image_bytes_list = []
+            thumbnails = []
             
             if self.is_edit_mode and self.existing_showcase_image:
                 # In edit mode, skip image collection and use existing showcase image
                 await interaction.followup.send("Editing your listing... Please wait.", ephemeral=True)
             else:
-                # Normal mode - collect new images
-                await interaction.followup.send("📸 Please upload up to 3 images for your listing.", ephemeral=True)
-            
-                def check(m):
-                    return (m.author == interaction.user and 
-                           m.channel == interaction.channel and 
-                           (m.attachments or m.content.lower() == 'done'))
+                # Attachments are downloaded and decoded in the background as soon as they arrive
+                from .showcase_ingest import ShowcaseIngest
+                ingest = ShowcaseIngest(embed_generator.showcase_tile_size)
+                staged = upload_sessions.take_staged(interaction.user.id)
+                session = None
+
+                if staged:
+                    # Screenshots came with /listaccount, so there is nothing to wait for
+                    ingest.add_batch(staged)
+                    await interaction.followup.send(f"📸 Using {ingest.count} attached image(s). Processing your listing...", ephemeral=True)
+                elif not interaction.client.intents.message_content:
+                    # The /listaccount attachments expired and there is no way to receive uploads in chat
+                    await interaction.followup.send(ATTACH_WITH_COMMAND, ephemeral=True)
+                    return
+                else:
+                    # Normal mode - collect new images
+                    await interaction.followup.send(f"📸 Please upload up to {ingest.max_images} images for your listing, all in one message.", ephemeral=True)
+                    session = upload_sessions.open(interaction.channel.id, interaction.user.id)
 
                 try:
-                    while len(image_bytes_list) < 3:
-                        msg = await interaction.client.wait_for("message", timeout=60.0, check=check)
+                    while session and not ingest.full:
+                        msg = await session.next_message(timeout=60.0)
                         
                         if msg.attachments:
                             # Process all attachments in the message
-                            for attachment in msg.attachments:
-                                if len(image_bytes_list) >= 3:
-                                    break
-                                image_bytes = await attachment.read()
-                                image_bytes_list.append(image_bytes)
+                            ingest.add_batch(msg.attachments)
                             
-                            # Clean up the message
-                            try:
-                                await msg.delete()
-                            except:
-                                pass
+                            # Clean up the message without holding up processing
+                            delete_in_background(msg)
                             
                             # Auto-process the listing after any image upload
-                            await interaction.followup.send(f"📸 {len(msg.attachments)} image(s) uploaded! Total: {len(image_bytes_list)}/3. Processing your listing...", ephemeral=True)
+                            await interaction.followup.send(f"📸 {len(msg.attachments)} image(s) uploaded! Total: {ingest.count}/{ingest.max_images}. Processing your listing...", ephemeral=True)
                             break
                         else:
                             await interaction.followup.send("❌ Please upload an image.", ephemeral=True)
-                            try:
-                                await msg.delete()
-                            except:
-                                pass
+                            delete_in_background(msg)
                                 
                 except asyncio.TimeoutError:
+                    ingest.cancel()
                     await interaction.followup.send("❌ No images were provided in time. Please try listing again.", ephemeral=True)
                     return
+                finally:
+                    if session:
+                        upload_sessions.close(session)
+
+                image_bytes_list, thumbnails, rejected = await ingest.collect()
+                if rejected:
+                    reasons = "\n".join(f"• {filename}: {reason}" for filename, reason in rejected)
+                    await interaction.followup.send(f"⚠️ Some uploads were skipped:\n{reasons}", ephemeral=True)
+                if not image_bytes_list:
+                    await interaction.followup.send("❌ None of your uploads could be used. Please try listing again.", ephemeral=True)
+                    return
 
             # Generate account header based on stored selections
             account_type = self.user_selections.get('account_type', '').lower().strip()
@@ -392,30 +516,31 @@ class AccountListingModal(Modal):
             
             # Generate the account details template (no images)
             try:
-                embed_generator = EmbedGenerator()
-                account_template = await embed_generator.generate_listing_image(
-                    self.account_type,
-                    interaction.user,
-                    account_header,
-                    details_left_text,
-                    details_right_text,
-                    self.price.value,
-                    "USD"  # Default payment method
-                )
+                # Renders wait behind this user's other renders before taking a shared slot
+                async with render_coordinator.slot(interaction.user.id):
+                    account_template = await embed_generator.generate_listing_image(
+                        self.account_type,
+                        interaction.user,
+                        account_header,
+                        details_left_text,
+                        details_right_text,
+                        self.price.value,
+                        "USD"  # Default payment method
+                    )
 
-                # Generate the image template if images were provided
-                image_template = None
-                if self.is_edit_mode and self.existing_showcase_image:
-                    # In edit mode, use the existing showcase image directly
-                    # Convert bytes to BytesIO object for Discord.File
-                    image_template = io.BytesIO(self.existing_showcase_image)
-                elif image_bytes_list:
-                    try:
-                        image_template = await embed_generator.generate_image_template(image_bytes_list)
-                    except FileNotFoundError as e:
-                        print(f"Warning: Image template files not found. Skipping image generation. Error: {e}")
-                        # Continue without image template
-                        pass
+                    # Generate the image template if images were provided
+                    image_template = None
+                    if self.is_edit_mode and self.existing_showcase_image:
+                        # In edit mode, use the existing showcase image directly
+                        # Convert bytes to BytesIO object for Discord.File
+                        image_template = io.BytesIO(self.existing_showcase_image)
+                    elif image_bytes_list:
+                        try:
+                            image_template = await embed_generator.generate_image_template(image_bytes_list)
+                        except FileNotFoundError as e:
+                            log.warning("Image template files not found, skipping image generation: %s", e)
+                            # Continue without image template
+                            pass
 
                 # Send both templates in one message
                 listing_msg, account_msg = await embed_generator.send_listing(listing_channel, account_template, image_template)
@@ -428,6 +553,7 @@ class AccountListingModal(Modal):
                     'details_left': self.details_left.value,
                     'details_right': self.details_right.value,
                     'price': self.price.value,
+                    'price_value': self.price_value,
                     'payment_method': 'USD'
                 }
                 
@@ -441,6 +567,10 @@ class AccountListingModal(Modal):
                     showcase_images_bytes=image_template if image_template else None,
                     listing_data=listing_data
                 )
+                if self.existing_listing_id:
+                    listing_images.move(self.existing_listing_id, listing_id)
+                if thumbnails:
+                    listing_images.store(listing_id, thumbnails)
                 
                 # Add the listing controls
                 view = ListingView(
@@ -451,23 +581,66 @@ class AccountListingModal(Modal):
                 )
                 await listing_msg.edit(view=view)
                 
+                listing_sessions.discard(interaction.user.id)
                 await interaction.followup.send("✅ Your listing has been posted!", ephemeral=True)
                 
+            except RenderBusy as e:
+                await interaction.followup.send(f"⏳ {str(e)}", ephemeral=True)
+                return
             except Exception as e:
-                print(f"Error generating listing: {str(e)}")
+                log.exception("Error generating listing")
                 await interaction.followup.send(f"❌ Error generating listing: {str(e)}. Please try again or contact an administrator.", ephemeral=True)
                 return
                 
         except Exception as e:
-            print(f"Error in on_submit: {str(e)}")
+            log.exception("Error in on_submit")
             await interaction.followup.send(f"❌ Something went wrong: {str(e)}. Please try again.", ephemeral=True)
             return
 
+class AccountTypeSelectionView(View):
+    def __init__(self, channels):
+        super().__init__(timeout=60)
+        self.CHANNELS = channels
+
+    @discord.ui.button(label="Main", style=discord.ButtonStyle.primary)
+    async def main_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_message("**Account Type:**", view=AccountTypeSelectView("Main", "main", self.CHANNELS), ephemeral=True)
+
+    @discord.ui.button(label="PvP", style=discord.ButtonStyle.danger)
+    async def pvp_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_message("**Account Type:**", view=AccountTypeSelectView("PvP", "pvp", self.CHANNELS), ephemeral=True)
+
+    @discord.ui.button(label="HCIM", style=discord.ButtonStyle.success)
+    async def hcim_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_message("**Account Type:**", view=AccountTypeSelectView("HCIM", "ironman", self.CHANNELS), ephemeral=True)
+
+    @discord.ui.button(label="Iron", style=discord.ButtonStyle.secondary)
+    async def iron_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_message("**Account Type:**", view=AccountTypeSelectView("Iron", "ironman", self.CHANNELS), ephemeral=True)
+
+    @discord.ui.button(label="Special", style=discord.ButtonStyle.primary)
+    async def special_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_message("**Account Type:**", view=AccountTypeSelectView("Special", "main", self.CHANNELS), ephemeral=True)
+
+class ListingButtonsView(View):
+    """Persistent buttons posted by !setup_listings; clicks are handled by the interaction router"""
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.button(label="List OSRS Account", style=discord.ButtonStyle.primary, custom_id="list_account")
+    async def account_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        pass
+
+    @discord.ui.button(label="List OSRS GP", style=discord.ButtonStyle.success, custom_id="list_gp")
+    async def gp_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        pass
+
 class ListingCog(commands.Cog, name="Listings"):
     """Commands for managing listings"""
     
     def __init__(self, bot):
         self.bot = bot
+        self.prewarm_task = None
         self.EMBED_COLOR = discord.Color.gold()
         self.BRANDING_IMAGE = "https://i.postimg.cc/ZYvXG4Ms/Runes-and-Relics.png"
         self.CHANNELS = {
@@ -492,154 +665,156 @@ class ListingCog(commands.Cog, name="Listings"):
     @commands.has_permissions(administrator=True)
     async def setup_listings(self, ctx):
         """Sets up the listing buttons in the create_trade channel"""
-        print(f"setup_listings command called by {ctx.author}")  # Debug print
+        log.debug("setup_listings command called by %s", ctx.author)
         
         if ctx.channel.id != self.CHANNELS["create_trade"]:
             await ctx.send("❌ Please run this command in the create_trade channel.")
             return
 
-        # Create persistent view for the buttons
-        class PersistentView(discord.ui.View):
-            def __init__(self):
-                super().__init__(timeout=None)
-
-            @discord.ui.button(label="List OSRS Account", style=discord.ButtonStyle.primary, custom_id="list_account")
-            async def account_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                pass
-
-            @discord.ui.button(label="List OSRS GP", style=discord.ButtonStyle.success, custom_id="list_gp")
-            async def gp_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                pass
-
-        view = PersistentView()
+        view = ListingButtonsView()
         await ctx.send("Choose what you want to list:", view=view)
         await ctx.send("✅ Listing buttons have been set up!")
 
-    @commands.Cog.listener()
-    async def on_interaction(self, interaction: discord.Interaction):
-        if interaction.type == discord.InteractionType.application_command:
-            return
-
-        if interaction.type == discord.InteractionType.component:
-            custom_id = interaction.data.get("custom_id", "")
-
-            if custom_id == "list_account":
-                # Create the account type selection view with all the buttons
-                class AccountTypeSelectionView(discord.ui.View):
-                    def __init__(self, channels):
-                        super().__init__(timeout=60)
-                        self.CHANNELS = channels
+    async def cog_load(self):
+        router = self.bot.interaction_router
+        router.add_route("list_account", self.handle_list_account)
+        router.add_route("list_gp", self.handle_list_gp)
+        router.add_prefix("buy_", self.handle_buy_interaction)
+        router.add_prefix("edit_", self.handle_edit_interaction)
+        router.add_prefix("bump_", self.handle_bump_interaction)
+        router.add_prefix("delete_", self.handle_delete_interaction)
+        router.add_prefix("photos_", self.handle_photos_interaction)
+        router.add_prefix(CAROUSEL_PREFIX, image_carousel.handle_click)
+        # These buttons carry their own callbacks on ListingView
+        router.ignore("edit_listing", "bump_listing")
+
+        await asyncio.to_thread(gp_order_book.load, DB_PATH)
+        await listing_sessions.load()
+
+        job_queue.register("listing_cleanup", self.cleanup_old_listings)
+        job_queue.register("listing_expire", self.expire_listing)
 
-                    @discord.ui.button(label="Main", style=discord.ButtonStyle.primary)
-                    async def main_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                        await interaction.response.send_message("**Account Type:**", view=AccountTypeSelectView("Main", "main", self.CHANNELS), ephemeral=True)
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # on_ready fires again after every reconnect; the caches only need warming once
+        if self.prewarm_task is None:
+            self.prewarm_task = asyncio.create_task(self.prewarm_templates())
 
-                    @discord.ui.button(label="PvP", style=discord.ButtonStyle.danger)
-                    async def pvp_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                        await interaction.response.send_message("**Account Type:**", view=AccountTypeSelectView("PvP", "pvp", self.CHANNELS), ephemeral=True)
+    async def prewarm_templates(self):
+        """Import Pillow and decode templates and zones off the event loop so the first listing renders warm"""
+        try:
+            await asyncio.to_thread(lambda: new_embed_generator().prewarm())
+        except Exception:
+            log.exception("Template prewarm failed")
+
+    async def cog_unload(self):
+        if self.prewarm_task is not None:
+            self.prewarm_task.cancel()
+        job_queue.unregister("listing_cleanup", "listing_expire")
+        await listing_sessions.close()
+        self.bot.interaction_router.remove_routes(
+            "list_account", "list_gp", "buy_", "edit_", "bump_", "delete_", "photos_", CAROUSEL_PREFIX,
+            "edit_listing", "bump_listing"
+        )
 
-                    @discord.ui.button(label="HCIM", style=discord.ButtonStyle.success)
-                    async def hcim_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                        await interaction.response.send_message("**Account Type:**", view=AccountTypeSelectView("HCIM", "ironman", self.CHANNELS), ephemeral=True)
+    async def handle_list_account(self, interaction: discord.Interaction):
+        if interaction.type == discord.InteractionType.component and not interaction.client.intents.message_content:
+            # Without message content the upload step would only ever see empty messages
+            await interaction.response.send_message(ATTACH_WITH_COMMAND, ephemeral=True)
+            return
 
-                    @discord.ui.button(label="Iron", style=discord.ButtonStyle.secondary)
-                    async def iron_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                        await interaction.response.send_message("**Account Type:**", view=AccountTypeSelectView("Iron", "ironman", self.CHANNELS), ephemeral=True)
+        view = AccountTypeSelectionView(self.CHANNELS)
+        await interaction.response.send_message(
+            "Select the type of account you want to list:",
+            view=view,
+            ephemeral=True
+        )
 
-                    @discord.ui.button(label="Special", style=discord.ButtonStyle.primary)
-                    async def special_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                        await interaction.response.send_message("**Account Type:**", view=AccountTypeSelectView("Special", "main", self.CHANNELS), ephemeral=True)
+    @app_commands.command(name="listaccount", description="List an account with your screenshots attached")
+    @screenshot_options()
+    async def list_account_command(self, interaction: discord.Interaction, **screenshots):
+        """Same flow as the List OSRS Account button, without the upload step"""
+        attachments = [screenshots.get(f"screenshot{number}") for number in range(1, SHOWCASE_UPLOAD_CONFIG['max_images'] + 1)]
+        attachments = [a for a in attachments if a is not None]
+        upload_sessions.stage(interaction.user.id, attachments)
+        await self.handle_list_account(interaction)
 
-                view = AccountTypeSelectionView(self.CHANNELS)
-                await interaction.response.send_message(
-                    "Select the type of account you want to list:",
-                    view=view,
-                    ephemeral=True
-                )
-                return
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if not message.author.bot:
+            upload_sessions.dispatch(message)
 
-            elif custom_id == "list_gp":
-                view = GPTypeSelectView(interaction.user, self.CHANNELS)
-                await interaction.response.send_message(
-                    "Please select if you are **BUYING** or **SELLING** OSRS GP:",
-                    view=view,
-                    ephemeral=True
-                )
-                return
+    async def handle_list_gp(self, interaction: discord.Interaction):
+        view = GPTypeSelectView(interaction.user, self.CHANNELS)
+        await interaction.response.send_message(
+            "Please select if you are **BUYING** or **SELLING** OSRS GP:",
+            view=view,
+            ephemeral=True
+        )
 
-            if custom_id.startswith("buy_"):
-                await self.handle_buy_interaction(interaction)
-            
-            elif custom_id.startswith("edit_"):
-                await self.handle_edit_interaction(interaction)
-            
-            elif custom_id.startswith("bump_"):
-                await self.handle_bump_interaction(interaction)
-            
-            elif custom_id.startswith("delete_"):
-                await self.handle_delete_interaction(interaction)
+    async def cleanup_old_listings(self, job=None):
+        """Queue an expiry job for every listing older than 10 days with no interactions
+
+        As a job, only listings in the job's guild are queued; each cluster cleans up its own guilds.
+        """
+        await listing_sessions.purge_expired()
+        upload_sessions.purge_staged()
+        guild_id = job.payload.get("guild_id") if job else None
+        old_listings = await asyncio.to_thread(get_old_listings)
+        queued = 0
+        for listing in old_listings:
+            channel = self.bot.get_channel(listing['channel_id'])
+            if not channel or (guild_id is not None and channel.guild.id != guild_id):
+                continue
+            await job_queue.enqueue("listing_expire", listing, key=f"listing_expire:{listing['id']}",
+                                    guild_id=channel.guild.id)
+            queued += 1
+        log.info("Queued %d old listings for cleanup", queued)
+        return queued
+
+    async def expire_listing(self, job):
+        """Job: delete an old listing's messages and row, then tell the lister"""
+        listing = job.payload
+        channel = self.bot.get_channel(listing['channel_id'])
+        if not channel:
+            return
 
-    async def cleanup_old_listings(self):
-        """Clean up listings older than 10 days with no interactions"""
-        try:
-            old_listings = get_old_listings()
-            
-            for listing in old_listings:
-                try:
-                    # Get the channel
-                    channel = self.bot.get_channel(listing['channel_id'])
-                    if not channel:
-                        continue
-                    
-                    # Try to delete the Discord messages
-                    try:
-                        account_msg = await channel.fetch_message(listing['account_message_id'])
-                        await account_msg.delete()
-                    except:
-                        pass
-                    
-                    if listing['image_message_id']:
-                        try:
-                            image_msg = await channel.fetch_message(listing['image_message_id'])
-                            await image_msg.delete()
-                        except:
-                            pass
-                    
-                    # Delete from database
-                    delete_listing_from_db(listing['id'])
-                    
-                    # Send DM to user
-                    user = self.bot.get_user(listing['user_id'])
-                    if user:
-                        try:
-                            await user.send(
-                                f"Your listing in Runes & Relics has been deleted as it is older than 10 days without interactions. "
-                                f"Please make a new listing if you're still selling."
-                            )
-                        except:
-                            pass  # User might have DMs disabled
-                    
-                except Exception as e:
-                    print(f"Error cleaning up listing {listing['id']}: {str(e)}")
+        if not job.done("messages"):
+            for message_id in (listing['account_message_id'], listing['image_message_id']):
+                if not message_id:
                     continue
-                    
-        except Exception as e:
-            print(f"Error in cleanup_old_listings: {str(e)}")
+                try:
+                    await channel.get_partial_message(message_id).delete()
+                except (discord.NotFound, discord.Forbidden):
+                    pass
+            await job.checkpoint("messages")
+
+        # Delete from database
+        delete_listing_from_db(listing['id'])
+
+        # DM the user; retried by the queue, DMs disabled are skipped there
+        await job_queue.enqueue("dm", {
+            "user_id": listing['user_id'],
+            "content": (
+                "Your listing in Runes & Relics has been deleted as it is older than 10 days without interactions. "
+                "Please make a new listing if you're still selling."
+            ),
+        }, key=f"listing_expired_dm:{listing['id']}")
 
     @commands.command(name="cleanup_listings")
     @commands.has_permissions(administrator=True)
     async def cleanup_listings_command(self, ctx):
         """Manually trigger listing cleanup"""
         await ctx.send("🧹 Starting listing cleanup...")
-        await self.cleanup_old_listings()
-        await ctx.send("✅ Listing cleanup completed!")
+        queued = await self.cleanup_old_listings()
+        await ctx.send(f"✅ Queued cleanup for {queued} listings!")
 
     @commands.command(name="test_gp")
     @commands.has_permissions(administrator=True)
     async def test_gp_listing(self, ctx):
         """Test GP listing generation"""
         try:
-            embed_generator = EmbedGenerator()
+            embed_generator = new_embed_generator()
             gp_template = await embed_generator.generate_gp_listing_image(
                 "BUYING",
                 ctx.author,
@@ -661,7 +836,7 @@ class ListingCog(commands.Cog, name="Listings"):
             return
 
         buyer = interaction.user
-        lister = interaction.guild.get_member(lister_id)
+        lister = await member_resolver.resolve(interaction.guild, lister_id)
 
         if not lister or lister == buyer:
             await interaction.response.send_message("❌ Invalid buyer or listing owner.", ephemeral=True)
@@ -669,16 +844,7 @@ class ListingCog(commands.Cog, name="Listings"):
 
         await interaction.response.defer(ephemeral=True)
 
-        overwrites = {
-            interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            buyer: discord.PermissionOverwrite(view_channel=True, send_messages=True),
-            lister: discord.PermissionOverwrite(view_channel=True, send_messages=True),
-        }
-
-        for role_name in ["Moderator", "Admin"]:
-            role = discord.utils.get(interaction.guild.roles, name=role_name)
-            if role:
-                overwrites[role] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
+        overwrites = guild_metadata.ticket_overwrites(interaction.guild, buyer, lister)
 
         try:
             # Find the listing messages in the current channel
@@ -828,7 +994,7 @@ class ListingCog(commands.Cog, name="Listings"):
             await interaction.response.send_modal(modal)
             
         except Exception as e:
-            print(f"Error editing GP listing: {str(e)}")
+            log.exception("Error editing GP listing")
             await interaction.response.send_message(f"❌ Error editing GP listing: {str(e)}", ephemeral=True)
 
     async def handle_account_edit(self, interaction: discord.Interaction, listing):
@@ -860,6 +1026,18 @@ class ListingCog(commands.Cog, name="Listings"):
             await interaction.response.send_message("❌ You can only bump your listing once every 48 hours.", ephemeral=True)
             return
         
+        # Acknowledge now; a repeated click waits for the whole repost below
+        await interaction.response.defer(ephemeral=True)
+        
+        # Repeated clicks while a bump is in flight share it instead of reposting again
+        _, shared = await render_coordinator.coalesce(
+            ("bump", listing_id), lambda: self.repost_listing(interaction, listing, listing_id)
+        )
+        if shared:
+            await interaction.followup.send("⏳ This listing is already being bumped.", ephemeral=True)
+
+    async def repost_listing(self, interaction: discord.Interaction, listing, listing_id):
+        """Re-send a listing from its stored image data and attach fresh controls"""
         try:
             # Delete old message
             await interaction.message.delete()
@@ -906,13 +1084,22 @@ class ListingCog(commands.Cog, name="Listings"):
                 # Update database
                 update_listing_interaction(listing_id)
                 
-                await interaction.response.send_message("✅ Your listing has been bumped!", ephemeral=True)
+                await interaction.followup.send("✅ Your listing has been bumped!", ephemeral=True)
             else:
-                await interaction.response.send_message("❌ Could not retrieve listing image data.", ephemeral=True)
+                await interaction.followup.send("❌ Could not retrieve listing image data.", ephemeral=True)
                 
         except Exception as e:
-            print(f"Error bumping listing: {str(e)}")
-            await interaction.response.send_message(f"❌ Error bumping listing: {str(e)}", ephemeral=True)
+            log.exception("Error bumping listing")
+            await interaction.followup.send(f"❌ Error bumping listing: {str(e)}", ephemeral=True)
+
+    async def handle_photos_interaction(self, interaction: discord.Interaction):
+        """Open a private screenshot carousel for whoever clicked"""
+        try:
+            listing_id = int(interaction.data["custom_id"].split("_")[1])
+        except ValueError:
+            await interaction.response.send_message("❌ Invalid listing ID.", ephemeral=True)
+            return
+        await image_carousel.open(interaction, listing_id)
 
     async def handle_delete_interaction(self, interaction: discord.Interaction):
         """Handle delete button interactions for both account and GP listings"""
@@ -966,7 +1153,7 @@ class ListingCog(commands.Cog, name="Listings"):
             await interaction.response.send_message("✅ Listing has been deleted.", ephemeral=True)
             
         except Exception as e:
-            print(f"Error deleting listing: {str(e)}")
+            log.exception("Error deleting listing")
             await interaction.response.send_message(f"❌ Error deleting listing: {str(e)}", ephemeral=True)
 
 class ListingView(View):
@@ -1000,6 +1187,14 @@ class ListingView(View):
         bump_button.callback = self.bump_listing
         self.add_item(bump_button)
 
+        if listing_id:
+            photos_button = Button(
+                emoji="📸",
+                style=discord.ButtonStyle.secondary,
+                custom_id=f"photos_{listing_id}"
+            )
+            self.add_item(photos_button)
+
         delete_button = Button(
             emoji="❌",
             style=discord.ButtonStyle.secondary,
@@ -1041,6 +1236,15 @@ class ListingView(View):
         
         await interaction.response.defer(ephemeral=True)
         
+        # Repeated clicks while a bump is in flight share it instead of reposting again
+        _, shared = await render_coordinator.coalesce(
+            ("bump", self.listing_id), lambda: self.repost_listing(interaction)
+        )
+        if shared:
+            await interaction.followup.send("⏳ This listing is already being bumped.", ephemeral=True)
+
+    async def repost_listing(self, interaction: discord.Interaction):
+        """Re-send both listing messages from stored image data"""
         try:
             # Get the stored listing data
             listing = get_listing(self.listing_id)
@@ -1088,7 +1292,7 @@ class ListingView(View):
             await interaction.followup.send("✅ Your listing has been bumped!", ephemeral=True)
             
         except Exception as e:
-            print(f"Error bumping listing: {str(e)}")
+            log.exception("Error bumping listing")
             await interaction.followup.send(f"❌ Error bumping listing: {str(e)}", ephemeral=True)
 
 
@@ -1110,24 +1314,21 @@ class EditConfirmationView(View):
             if self.listing_view.listing_id:
                 try:
                     listing = get_listing(self.listing_view.listing_id)
-                    print(f"Debug: Retrieved listing {self.listing_view.listing_id}: {listing is not None}")
+                    log.debug("Retrieved listing %s: %s", self.listing_view.listing_id, listing is not None)
                     
                     if listing and listing.get('listing_data'):
                         listing_data = listing['listing_data']
-                        print(f"Debug: Listing data keys: {list(listing_data.keys())}")
+                        log.debug("Listing data keys: %s", list(listing_data))
                         
                         # Delete old messages
                         await self.listing_view.listing_message.delete()
                         await self.listing_view.account_message.delete()
                         
-                        # Delete from database
-                        delete_listing_from_db(self.listing_view.listing_id)
+                        # Delete from database; the screenshots carry over to the edited listing
+                        delete_listing_from_db(self.listing_view.listing_id, keep_images=True)
                         
-                        # Pre-fill user_selections for the modal
-                        user_id = interaction.user.id
-                        if user_id not in user_selections:
-                            user_selections[user_id] = {}
-                        user_selections[user_id].update(listing_data.get('user_selections', {}))
+                        # Pre-fill the listing session for the modal
+                        listing_sessions.update(interaction.user.id, **listing_data.get('user_selections', {}))
                         
                         # Get existing showcase image from the listing
                         existing_showcase_image = None
@@ -1141,7 +1342,8 @@ class EditConfirmationView(View):
                             channels=self.channels,
                             user_selections=listing_data.get('user_selections', {}),
                             is_edit_mode=True,
-                            existing_showcase_image=existing_showcase_image
+                            existing_showcase_image=existing_showcase_image,
+                            existing_listing_id=self.listing_view.listing_id
                         )
                         
                         # Pre-fill the text inputs
@@ -1153,12 +1355,12 @@ class EditConfirmationView(View):
                         await interaction.response.send_modal(modal)
                         return
                     else:
-                        print(f"Debug: No listing data found for ID {self.listing_view.listing_id}")
+                        log.warning("No listing data found for ID %s", self.listing_view.listing_id)
                         await interaction.response.send_message("❌ Could not retrieve listing data for editing. The listing may have been deleted or corrupted.", ephemeral=True)
                         return
                         
                 except Exception as e:
-                    print(f"Debug: Error retrieving listing {self.listing_view.listing_id}: {str(e)}")
+                    log.error("Error retrieving listing %s: %s", self.listing_view.listing_id, e)
                     await interaction.response.send_message(f"❌ Error retrieving listing data: {str(e)}", ephemeral=True)
                     return
             
@@ -1166,7 +1368,7 @@ class EditConfirmationView(View):
             await interaction.response.send_message("❌ Could not retrieve listing data for editing.", ephemeral=True)
             
         except Exception as e:
-            print(f"Error editing listing: {str(e)}")
+            log.exception("Error editing listing")
             await interaction.followup.send(f"❌ Error editing listing: {str(e)}", ephemeral=True)
 
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
@@ -1214,9 +1416,28 @@ class GPListingModal(Modal):
     async def on_submit(self, interaction: discord.Interaction):
         try:
             await interaction.response.defer(ephemeral=True)
-            
+
+            try:
+                self.price_value = parse_rate(self.price.value)
+                self.amount_value = parse_amount(self.amount.value)
+            except PriceFormatError as e:
+                await interaction.followup.send(f"❌ {e}", ephemeral=True)
+                return
+
+            # A double-submitted modal joins the first submission instead of posting twice
+            key = ("gp", interaction.user.id, self.gp_type, self.price.value,
+                   self.amount.value, self.payment_method.value)
+            _, shared = await render_coordinator.coalesce(key, lambda: self.post_listing(interaction))
+            if shared:
+                await interaction.followup.send("⏳ This GP listing is already being posted.", ephemeral=True)
+        except Exception as e:
+            log.exception("Error in GP listing on_submit")
+            await interaction.followup.send(f"❌ Something went wrong: {str(e)}. Please try again.", ephemeral=True)
+
+    async def post_listing(self, interaction: discord.Interaction):
+        try:
             # Determine channel based on user's trusted status
-            trusted = any("trusted" in role.name.lower() for role in interaction.user.roles)
+            trusted = guild_metadata.is_trusted(interaction.user)
             # GP channels
             trusted_gp_channel = 1393727788112154745
             public_gp_channel = 1393727911743193239
@@ -1228,14 +1449,15 @@ class GPListingModal(Modal):
                 return
             
             # Generate the GP listing image
-            embed_generator = EmbedGenerator()
-            gp_template = await embed_generator.generate_gp_listing_image(
-                self.gp_type,
-                interaction.user,
-                self.price.value,
-                self.amount.value,
-                self.payment_method.value
-            )
+            embed_generator = new_embed_generator()
+            async with render_coordinator.slot(interaction.user.id):
+                gp_template = await embed_generator.generate_gp_listing_image(
+                    self.gp_type,
+                    interaction.user,
+                    self.price.value,
+                    self.amount.value,
+                    self.payment_method.value
+                )
             
             # Send the listing
             listing_msg = await embed_generator.send_gp_listing(listing_channel, gp_template)
@@ -1245,6 +1467,8 @@ class GPListingModal(Modal):
                 'gp_type': self.gp_type,
                 'price': self.price.value,
                 'amount': self.amount.value,
+                'price_value': self.price_value,
+                'amount_value': self.amount_value,
                 'payment_method': self.payment_method.value
             }
             listing_id = store_listing(
@@ -1268,8 +1492,10 @@ class GPListingModal(Modal):
             
             await interaction.followup.send("✅ Your GP listing has been posted!", ephemeral=True)
             
+        except RenderBusy as e:
+            await interaction.followup.send(f"⏳ {str(e)}", ephemeral=True)
         except Exception as e:
-            print(f"Error in GP listing on_submit: {str(e)}")
+            log.exception("Error in GP listing on_submit")
             await interaction.followup.send(f"❌ Something went wrong: {str(e)}. Please try again.", ephemeral=True)
             return
 
@@ -1330,11 +1556,11 @@ class GPEditConfirmationView(View):
             if self.gp_listing_view.listing_id:
                 try:
                     listing = get_listing(self.gp_listing_view.listing_id)
-                    print(f"Debug: Retrieved GP listing {self.gp_listing_view.listing_id}: {listing is not None}")
+                    log.debug("Retrieved GP listing %s: %s", self.gp_listing_view.listing_id, listing is not None)
                     
                     if listing and listing.get('listing_data'):
                         listing_data = listing['listing_data']
-                        print(f"Debug: GP listing data keys: {list(listing_data.keys())}")
+                        log.debug("GP listing data keys: %s", list(listing_data))
                         
                         # Delete old message
                         await self.gp_listing_view.listing_message.delete()
@@ -1357,12 +1583,12 @@ class GPEditConfirmationView(View):
                         await interaction.response.send_modal(modal)
                         return
                     else:
-                        print(f"Debug: No GP listing data found for ID {self.gp_listing_view.listing_id}")
+                        log.warning("No GP listing data found for ID %s", self.gp_listing_view.listing_id)
                         await interaction.response.send_message("❌ Could not retrieve GP listing data for editing. The listing may have been deleted or corrupted.", ephemeral=True)
                         return
                         
                 except Exception as e:
-                    print(f"Debug: Error retrieving GP listing {self.gp_listing_view.listing_id}: {str(e)}")
+                    log.error("Error retrieving GP listing %s: %s", self.gp_listing_view.listing_id, e)
                     await interaction.response.send_message(f"❌ Error retrieving GP listing data: {str(e)}", ephemeral=True)
                     return
             
@@ -1370,7 +1596,7 @@ class GPEditConfirmationView(View):
             await interaction.response.send_message("❌ Could not retrieve GP listing data for editing.", ephemeral=True)
             
         except Exception as e:
-            print(f"Error editing GP listing: {str(e)}")
+            log.exception("Error editing GP listing")
             await interaction.followup.send(f"❌ Error editing GP listing: {str(e)}", ephemeral=True)
 
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
@@ -1404,7 +1630,5 @@ class GPTypeSelectView(discord.ui.View):
         self.stop()
 
 async def setup(bot):
-    print("Adding ListingCog...")  # Debug print
     cog = ListingCog(bot)
-    await bot.add_cog(cog)
-    print("ListingCog added successfully")  # Debug print
\ No newline at end of file
+    await bot.add_cog(cog)
\ No newline at end of file
@@ -0,0 +1,91 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+# Every bot logger lives under this namespace so levels can be set per subsystem
+ROOT_LOGGER = "relics"
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-8s %(name)s: %(message)s"
+
+_listener = None
+
+
+def get_logger(subsystem):
+    """Logger for one subsystem, e.g. get_logger("render") -> relics.render"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers"""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that hands the raw record to the listener thread.
+
+    The stock QueueHandler formats the message on the calling thread; here the
+    record itself is queued unformatted, so %-style arguments are formatted by
+    the listener, off the event loop. Only a traceback is rendered up front.
+    """
+
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            # Tracebacks reference frames that may be gone by the time the listener runs
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level="INFO", levels=None, json_output=False, stream=None):
+    """Route all logging through a background queue listener.
+
+    ``levels`` maps subsystem names (``"render"``) or full logger names
+    (``"discord.gateway"``) to level names. Calling again reconfigures.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if json_output else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+
+    for name, subsystem_level in (levels or {}).items():
+        logger_name = name if name.startswith(("discord", ROOT_LOGGER)) else f"{ROOT_LOGGER}.{name}"
+        logging.getLogger(logger_name).setLevel(str(subsystem_level).upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush anything still queued"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
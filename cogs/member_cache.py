@@ -0,0 +1,128 @@
+import time
+from collections import OrderedDict
+import discord
+from discord.ext import commands
+from .guild_cache import guild_metadata
+from .logs import get_logger
+
+log = get_logger("member_cache")
+
+# Gateway and cache settings per CACHE_POLICY
+CACHE_POLICIES = {
+    # Every member chunked at startup and kept current by member events
+    "full": {"members": True, "message_content": True, "cache_members": True},
+    # No member chunking or privileged member events; members the bot deals with
+    # are kept in MemberResolver. Message content stays on for the upload wait_for flow.
+    "lean": {"members": False, "message_content": True, "cache_members": False},
+    # lean without message content; the List Account button sends users to /listaccount's
+    # attachment options and prefix commands only answer when the bot is mentioned
+    "minimal": {"members": False, "message_content": False, "cache_members": False},
+}
+
+
+def gateway_options(policy):
+    """Client kwargs (intents, member cache flags, chunking) for a cache policy"""
+    if policy not in CACHE_POLICIES:
+        raise ValueError(f"Unknown cache policy '{policy}', expected one of {', '.join(CACHE_POLICIES)}")
+    settings = CACHE_POLICIES[policy]
+
+    intents = discord.Intents.default()
+    intents.guilds = True
+    intents.members = settings["members"]
+    intents.message_content = settings["message_content"]
+
+    if settings["cache_members"]:
+        member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+    else:
+        member_cache_flags = discord.MemberCacheFlags.none()
+
+    return {
+        "intents": intents,
+        "member_cache_flags": member_cache_flags,
+        "chunk_guilds_at_startup": settings["cache_members"],
+    }
+
+
+def command_prefix(policy, prefix):
+    """Prefix for text commands; without message content Discord only sends the text of mentions"""
+    if CACHE_POLICIES[policy]["message_content"]:
+        return prefix
+    log.warning("Message content intent disabled: prefix commands (!showgrid, !perf, ...) only work "
+                "as @mentions, and screenshots must be attached with /listaccount")
+    return commands.when_mentioned
+
+
+class MemberResolver:
+    """Members the bot actually deals with, for policies that don't cache the guild.
+
+    Lookups try discord.py's own cache, then pinned staff and a small LRU of
+    recently seen traders, and only then fetch_member. Entries
+    older than ttl are refetched because without the members intent nothing
+    tells us about role or nickname changes.
+    """
+
+    def __init__(self, max_members=2000, ttl=600):
+        self.max_members = max_members
+        self.ttl = ttl
+        # (guild_id, user_id) -> (member, cached_at), least recently used first
+        self.members = OrderedDict()
+        # Staff are few and looked up on every ticket, so they are never evicted
+        self.staff = {}
+
+    def __len__(self):
+        return len(self.members) + len(self.staff)
+
+    def _is_staff(self, member):
+        return any(member.get_role(role_id) for role_id in guild_metadata.get(member.guild).staff_role_ids)
+
+    def remember(self, member):
+        """Keep a member seen through an interaction or fetch"""
+        if not isinstance(member, discord.Member):
+            return
+        key = (member.guild.id, member.id)
+        entry = (member, time.monotonic())
+        if self._is_staff(member):
+            self.staff[key] = entry
+            self.members.pop(key, None)
+            return
+
+        self.staff.pop(key, None)
+        self.members[key] = entry
+        self.members.move_to_end(key)
+        while len(self.members) > self.max_members:
+            self.members.popitem(last=False)
+
+    def get(self, guild, user_id):
+        """Cached member or None, without any API call"""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+
+        key = (guild.id, user_id)
+        entry = self.staff.get(key) or self.members.get(key)
+        if entry is None:
+            return None
+        member, cached_at = entry
+        if time.monotonic() - cached_at > self.ttl:
+            return None
+        if key in self.members:
+            self.members.move_to_end(key)
+        return member
+
+    async def resolve(self, guild, user_id):
+        """Cached member, else fetch_member; None if they left the guild"""
+        member = self.get(guild, user_id)
+        if member is not None:
+            return member
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+        except discord.HTTPException as e:
+            log.warning("Could not fetch member %s: %s", user_id, e)
+            return None
+        self.remember(member)
+        return member
+
+
+member_resolver = MemberResolver()
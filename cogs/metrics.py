@@ -0,0 +1,211 @@
+import aiohttp
+import asyncio
+import functools
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Histogram buckets in seconds, from a fast dict lookup up to a slow render
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(label_key, extra=None):
+    pairs = list(label_key)
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """Monotonic counter for one label set"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Histogram:
+    """Bucketed histogram for one label set, plus a window of recent samples for !perf"""
+    __slots__ = ("buckets", "counts", "sum", "count", "recent")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=512):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def percentile(self, pct):
+        """Percentile over the recent window"""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, int(pct / 100 * len(ordered)))
+        return ordered[index]
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms, exportable in Prometheus text format"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.help = {}
+
+    def describe(self, name, help_text):
+        self.help[name] = help_text
+
+    def counter(self, name, **labels):
+        series = self.counters.setdefault(name, {})
+        key = _label_key(labels)
+        counter = series.get(key)
+        if counter is None:
+            counter = series[key] = Counter()
+        return counter
+
+    def histogram(self, name, **labels):
+        series = self.histograms.setdefault(name, {})
+        key = _label_key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        return histogram
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the wall time of a block into a histogram"""
+        histogram = self.histogram(name, **labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    def timed(self, name, **labels):
+        """Decorator form of timer() for both sync functions and coroutines"""
+        def decorator(func):
+            histogram = self.histogram(name, **labels)
+
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        histogram.observe(time.perf_counter() - start)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, series in sorted(self.counters.items()):
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for key, counter in series.items():
+                lines.append(f"{name}{_format_labels(key)} {counter.value}")
+
+        for name, series in sorted(self.histograms.items()):
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', bound))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, name):
+        """(labels, count, p50, p95, max) per series of a histogram, slowest p95 first"""
+        rows = []
+        for key, histogram in self.histograms.get(name, {}).items():
+            if not histogram.recent:
+                continue
+            rows.append((
+                dict(key),
+                histogram.count,
+                histogram.percentile(50),
+                histogram.percentile(95),
+                max(histogram.recent),
+            ))
+        rows.sort(key=lambda r: r[3], reverse=True)
+        return rows
+
+
+_SNOWFLAKE = re.compile(r"/\d{15,21}(?=/|$)")
+_TOKEN = re.compile(r"/[A-Za-z0-9_\-.]{40,}(?=/|$)")
+
+
+def _rest_route(path):
+    """Collapse IDs and interaction tokens so each endpoint is one series"""
+    path = _SNOWFLAKE.sub("/{id}", path)
+    path = _TOKEN.sub("/{token}", path)
+    return re.sub(r"^/api/v\d+", "", path)
+
+
+def discord_trace_config():
+    """aiohttp trace hooks that time every REST call discord.py makes (pass as http_trace)"""
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params):
+        context.start = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        route = _rest_route(params.url.path)
+        metrics.histogram("discord_rest_seconds", method=params.method, route=route).observe(
+            time.perf_counter() - context.start
+        )
+        metrics.counter("discord_rest_requests_total", method=params.method, status=params.response.status).inc()
+
+    async def on_request_exception(session, context, params):
+        metrics.counter("discord_rest_requests_total", method=params.method, status="error").inc()
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
+
+
+metrics = MetricsRegistry()
+metrics.describe("interaction_handler_seconds", "Time spent in routed component interaction handlers")
+metrics.describe("interaction_errors_total", "Routed interaction handlers that raised")
+metrics.describe("render_seconds", "Total time per listing image render")
+metrics.describe("render_stage_seconds", "Time per render stage")
+metrics.describe("db_query_seconds", "Time per database helper call")
+metrics.describe("discord_rest_seconds", "Discord REST request latency")
+metrics.describe("discord_rest_requests_total", "Discord REST requests by status code")
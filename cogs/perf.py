@@ -0,0 +1,74 @@
+import discord
+from discord.ext import commands
+from aiohttp import web
+from config import METRICS_HOST, METRICS_PORT, EMBED_COLOR
+from .metrics import metrics
+from .logs import get_logger
+
+log = get_logger("perf")
+
+# Sections shown by !perf: (title, histogram, label used to name each row)
+PERF_SECTIONS = (
+    ("Interactions", "interaction_handler_seconds", "route"),
+    ("Renders", "render_seconds", "kind"),
+    ("Render stages", "render_stage_seconds", "stage"),
+    ("Database", "db_query_seconds", "query"),
+    ("Discord REST", "discord_rest_seconds", "route"),
+)
+
+
+class PerfCog(commands.Cog):
+    """Serves /metrics locally and summarizes recent latency with !perf"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.runner = None
+
+    async def cog_load(self):
+        if not METRICS_PORT:
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self.metrics_endpoint)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        try:
+            await web.TCPSite(self.runner, METRICS_HOST, METRICS_PORT).start()
+            log.info("Metrics available at http://%s:%s/metrics", METRICS_HOST, METRICS_PORT)
+        except OSError as e:
+            log.error("Could not start metrics endpoint: %s", e)
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def cog_unload(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def metrics_endpoint(self, request):
+        return web.Response(text=metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    @commands.command(name="perf")
+    @commands.has_permissions(administrator=True)
+    async def perf(self, ctx):
+        """Show recent p50/p95 latency for interactions, renders, DB and REST calls"""
+        embed = discord.Embed(title="📈 Bot Performance", color=EMBED_COLOR)
+        embed.set_footer(text="p50 / p95 / max over the most recent 512 samples per series")
+
+        for title, histogram, label in PERF_SECTIONS:
+            rows = metrics.summary(histogram)[:8]
+            if not rows:
+                continue
+            lines = [
+                f"`{labels.get(label, '-')}` {p50 * 1000:.0f} / {p95 * 1000:.0f} / {worst * 1000:.0f} ms ({count})"
+                for labels, count, p50, p95, worst in rows
+            ]
+            embed.add_field(name=title, value="\n".join(lines)[:1024], inline=False)
+
+        if not embed.fields:
+            embed.description = "No samples recorded yet."
+
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(PerfCog(bot))
@@ -0,0 +1,70 @@
+import re
+
+# Multipliers for OSRS shorthand amounts
+SUFFIXES = {
+    '': 1,
+    'k': 1_000,
+    'm': 1_000_000,
+    'mil': 1_000_000,
+    'b': 1_000_000_000,
+    'bil': 1_000_000_000,
+}
+
+_AMOUNT = re.compile(r'^\s*(\d[\d,]*(?:\.\d+)?|\.\d+)\s*(k|m|mil|b|bil)?\s*(gp)?\s*$', re.IGNORECASE)
+_USD = re.compile(r'^\s*\$?\s*(\d[\d,]*(?:\.\d+)?|\.\d+)\s*(k)?\s*(?:\$|usd)?\s*$', re.IGNORECASE)
+_RATE = re.compile(
+    r'^\s*\$?\s*(\d[\d,]*(?:\.\d+)?|\.\d+)\s*(c|cents?)?\s*(?:\$|usd)?\s*'
+    r'(?:(?:/|per|a|p)\s*(k|m|mil|b|bil))?\s*$',
+    re.IGNORECASE
+)
+
+
+class PriceFormatError(ValueError):
+    """Raised when a price or amount can't be read"""
+
+
+def _number(text):
+    return float(text.replace(',', ''))
+
+
+def parse_amount(text):
+    """Gold amount in GP: "2B" -> 2_000_000_000, "500m" -> 500_000_000, "1,500k" -> 1_500_000
+
+    A unit is required: a bare "500" could mean 500 GP or 500M, so it is
+    rejected rather than guessed. Plain GP is written out as "2,000,000gp".
+    """
+    match = _AMOUNT.match(text or '')
+    if not match:
+        raise PriceFormatError(f"Couldn't read amount '{text}'. Use a format like 500M or 2B.")
+    suffix = (match.group(2) or '').lower()
+    if not suffix and not match.group(3):
+        raise PriceFormatError(f"Amount '{text}' needs a unit. Use a format like 500M or 2B.")
+    return _number(match.group(1)) * SUFFIXES[suffix]
+
+
+def parse_usd(text):
+    """Account price in USD: "$250", "250 usd", "1.2k" -> 1200.0"""
+    match = _USD.match(text or '')
+    if not match:
+        raise PriceFormatError(f"Couldn't read price '{text}'. Use a format like 250 or $250.")
+    return _number(match.group(1)) * (1_000 if match.group(2) else 1)
+
+
+def parse_rate(text):
+    """GP rate in USD per million: "0.21", "$0.21/m", "21c/m", "$210/b" -> 0.21"""
+    match = _RATE.match(text or '')
+    if not match:
+        raise PriceFormatError(f"Couldn't read rate '{text}'. Use a format like 0.21 or $0.21/m.")
+    value = _number(match.group(1))
+    if match.group(2):
+        value /= 100
+    unit = SUFFIXES[(match.group(3) or 'm').lower()]
+    return value * SUFFIXES['m'] / unit
+
+
+def format_amount(gp):
+    """Short OSRS notation: 2_000_000_000 -> "2B", 500_000_000 -> "500M" """
+    for suffix, size in (('B', 1_000_000_000), ('M', 1_000_000), ('K', 1_000)):
+        if gp >= size:
+            return f"{gp / size:.3g}{suffix}"
+    return f"{gp:.0f}"
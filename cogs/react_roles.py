@@ -2,6 +2,8 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from config import EMBED_COLOR
+from .guild_cache import guild_metadata
+from .member_cache import member_resolver
 
 class ReactRoles(commands.Cog):
     def __init__(self, bot):
@@ -61,14 +63,14 @@ class ReactRoles(commands.Cog):
         if not guild:
             return
             
-        member = guild.get_member(payload.user_id)
+        member = payload.member or await member_resolver.resolve(guild, payload.user_id)
         if not member or member.bot:
             return
             
         role_name = self.role_emojis[emoji_str]
         
         # Find the role in the guild
-        role = discord.utils.get(guild.roles, name=role_name)
+        role = guild_metadata.role(guild, role_name)
         if not role:
             # Try to create the role if it doesn't exist
             try:
@@ -101,12 +103,12 @@ class ReactRoles(commands.Cog):
         if not guild:
             return
             
-        role = discord.utils.get(guild.roles, name=role_name)
+        role = guild_metadata.role(guild, role_name)
         if not role:
             return
         
         # Get the member
-        member = guild.get_member(payload.user_id)
+        member = await member_resolver.resolve(guild, payload.user_id)
         if not member:
             return
         
@@ -0,0 +1,73 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class RenderBusy(Exception):
+    """Raised when a user already has the maximum number of renders queued"""
+
+
+class _UserSlots:
+    __slots__ = ("semaphore", "pending")
+
+    def __init__(self, limit):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.pending = 0
+
+
+class RenderCoordinator:
+    """Coalesce duplicate render jobs and share render slots fairly between users.
+
+    ``coalesce`` makes concurrent jobs with the same key (e.g. a double-submitted
+    modal) await one in-flight task instead of rendering and posting twice.
+    ``slot`` limits how many renders a single user can run at once and how many
+    they can queue behind those, before any global render slot is taken, so one
+    user can never hold every slot.
+    """
+
+    def __init__(self, max_concurrent=4, per_user_limit=1, per_user_queue=2):
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self.per_user_limit = per_user_limit
+        self.max_pending = per_user_limit + per_user_queue
+        self.users = {}
+        self.in_flight = {}
+
+    async def coalesce(self, key, job_factory):
+        """Run job_factory() unless a job with this key is already running.
+
+        Returns (result, shared) where shared is True if another caller's job
+        produced the result.
+        """
+        task = self.in_flight.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(job_factory())
+        self.in_flight[key] = task
+
+        def _done(finished):
+            if self.in_flight.get(key) is finished:
+                del self.in_flight[key]
+
+        task.add_done_callback(_done)
+        # Shield so a cancelled caller doesn't cancel the job others are waiting on
+        return await asyncio.shield(task), False
+
+    @asynccontextmanager
+    async def slot(self, user_id):
+        """Hold a render slot for user_id, waiting behind the user's own renders first"""
+        state = self.users.get(user_id)
+        if state is None:
+            state = self.users[user_id] = _UserSlots(self.per_user_limit)
+
+        if state.pending >= self.max_pending:
+            raise RenderBusy("You already have renders in progress. Please wait for them to finish.")
+
+        state.pending += 1
+        try:
+            async with state.semaphore:
+                async with self.slots:
+                    yield
+        finally:
+            state.pending -= 1
+            if state.pending == 0:
+                self.users.pop(user_id, None)
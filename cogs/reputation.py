@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import threading
+from config import DATA_DIR
+from .cluster_ipc import cluster_ipc
+from .logs import get_logger
+
+log = get_logger("vouch")
+
+VOUCH_DB_PATH = os.path.join(DATA_DIR, "vouches.db")
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching every word, ignoring FTS syntax"""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+class ReputationCache:
+    """Write-through cache of every user's vouch totals.
+
+    All rows are loaded once at startup; after that reads are dict lookups and
+    record_vouch() updates SQLite and the cache together, so renders and
+    leaderboards never touch the database. Writes share one connection,
+    opened by load(), which is also where the schema is created; call
+    record_vouch() from a worker thread.
+
+    Individual vouches are stored one row each in vouch_entries with an FTS5
+    index over the comments. history() and search() page through them with
+    keyset pagination (``id < before_id``) so only the displayed rows are read.
+    """
+
+    def __init__(self, db_path=VOUCH_DB_PATH):
+        self.db_path = db_path
+        # user_id (str) -> (total_stars, count)
+        self.totals = {}
+        self.loaded = False
+        self.conn = None
+        self.write_lock = threading.Lock()
+
+    def _init_db(self, conn):
+        # WAL lets cluster processes read while another one writes
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS vouches (
+                user_id TEXT PRIMARY KEY,
+                total_stars INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                comments TEXT
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS vouch_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                stars INTEGER,
+                comment TEXT NOT NULL DEFAULT '',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_vouch_entries_user ON vouch_entries (user_id, id)')
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS vouch_entries_fts
+            USING fts5(comment, content='vouch_entries', content_rowid='id')
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS vouch_entries_ai AFTER INSERT ON vouch_entries BEGIN
+                INSERT INTO vouch_entries_fts (rowid, comment) VALUES (new.id, new.comment);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS vouch_entries_ad AFTER DELETE ON vouch_entries BEGIN
+                INSERT INTO vouch_entries_fts (vouch_entries_fts, rowid, comment) VALUES ('delete', old.id, old.comment);
+            END
+        ''')
+
+    def _backfill_entries(self, conn):
+        """Split the legacy comments JSON into vouch_entries, once"""
+        if conn.execute('SELECT 1 FROM vouch_entries LIMIT 1').fetchone():
+            return
+
+        entries = []
+        for user_id, comments_json in conn.execute('SELECT user_id, comments FROM vouches WHERE comments IS NOT NULL'):
+            try:
+                comments = json.loads(comments_json) if comments_json else []
+            except ValueError:
+                continue
+            # Per-vouch stars were never stored, only the running total
+            entries.extend((user_id, None, str(comment)) for comment in comments)
+
+        if entries:
+            conn.executemany('INSERT INTO vouch_entries (user_id, stars, comment) VALUES (?, ?, ?)', entries)
+            log.info("Backfilled %d vouch comments into vouch_entries", len(entries))
+
+    def load(self):
+        """Create the schema, open the write connection and read every user's totals into memory"""
+        with self.write_lock:
+            if self.conn is None:
+                # Only used under write_lock, from whichever worker thread records the vouch
+                self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            with self.conn as conn:
+                self._init_db(conn)
+                self._backfill_entries(conn)
+                rows = conn.execute('SELECT user_id, total_stars, count FROM vouches').fetchall()
+        self.totals = {str(user_id): (total_stars, count) for user_id, total_stars, count in rows}
+        self.loaded = True
+        log.info("Loaded vouch totals for %d users", len(self.totals))
+
+    def get(self, user_id):
+        """(total_stars, count) for a user, (0, 0) if they have no vouches"""
+        return self.totals.get(str(user_id), (0, 0))
+
+    def count(self, user_id):
+        return self.get(user_id)[1]
+
+    def leaderboard(self, limit=10):
+        """Top users by average stars, then by count"""
+        rows = [(user_id, total_stars, count) for user_id, (total_stars, count) in self.totals.items() if count > 0]
+        rows.sort(key=lambda r: (r[1] / r[2], r[2]), reverse=True)
+        return rows[:limit]
+
+    def record_vouch(self, user_id, stars, comment):
+        """Add one vouch to SQLite, then to the cache once the write has committed (blocking)"""
+        if not self.loaded:
+            self.load()
+        user_id = str(user_id)
+        with self.write_lock, self.conn as conn:
+            # A single upsert, so clusters recording vouches for the same user can't lose an update.
+            # Comments live in vouch_entries; vouches.comments is only read by the one-off backfill.
+            total_stars, count = conn.execute('''
+                INSERT INTO vouches (user_id, total_stars, count) VALUES (?, ?, 1)
+                ON CONFLICT (user_id) DO UPDATE SET total_stars = total_stars + excluded.total_stars, count = count + 1
+                RETURNING total_stars, count
+            ''', (user_id, stars)).fetchone()
+            conn.execute('INSERT INTO vouch_entries (user_id, stars, comment) VALUES (?, ?, ?)',
+                         (user_id, stars, comment or ''))
+
+        self.totals[user_id] = (total_stars, count)
+        cluster_ipc.publish("reputation", user_id=user_id, total_stars=total_stars, count=count)
+        return total_stars, count
+
+    def apply_remote(self, user_id, total_stars, count):
+        """Totals recorded by another cluster; counts only grow, so an older message never wins"""
+        if count >= self.get(user_id)[1]:
+            self.totals[str(user_id)] = (total_stars, count)
+
+    def history(self, user_id, before_id=None, limit=5):
+        """One page of a user's vouches, newest first, as (id, user_id, stars, comment, created_at)"""
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute('''
+                SELECT id, user_id, stars, comment, created_at FROM vouch_entries
+                WHERE user_id = ? AND id < ?
+                ORDER BY id DESC LIMIT ?
+            ''', (str(user_id), before_id or 2 ** 63 - 1, limit)).fetchall()
+
+    def search(self, text, user_id=None, before_id=None, limit=5):
+        """One page of vouches whose comment matches every word of text, newest first"""
+        query = fts_query(text)
+        if not query:
+            return []
+
+        sql = '''
+            SELECT e.id, e.user_id, e.stars, e.comment, e.created_at
+            FROM vouch_entries_fts f JOIN vouch_entries e ON e.id = f.rowid
+            WHERE vouch_entries_fts MATCH ? AND f.rowid < ?
+        '''
+        params = [query, before_id or 2 ** 63 - 1]
+        if user_id is not None:
+            sql += ' AND e.user_id = ?'
+            params.append(str(user_id))
+        sql += ' ORDER BY f.rowid DESC LIMIT ?'
+        params.append(limit)
+
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(sql, params).fetchall()
+
+
+reputation = ReputationCache()
@@ -0,0 +1,164 @@
+import asyncio
+import functools
+import discord
+from discord.ext import commands
+from discord import app_commands
+from config import EMBED_COLOR
+from .listings import DB_PATH
+from .listing_index import search_listings
+from .gp_rates import gp_order_book
+from .prices import format_amount
+
+RESULTS_PER_PAGE = 5
+
+
+class SearchResultsView(discord.ui.View):
+    """Prev/Next pager over search_listings() using keyset cursors"""
+
+    def __init__(self, author_id, guild_id, fetch_page, summary):
+        super().__init__(timeout=300)
+        self.author_id = author_id
+        self.guild_id = guild_id
+        self.fetch_page = fetch_page
+        self.summary = summary
+        # before_id of every page visited so far; None is the first page
+        self.cursors = [None]
+        self.results = []
+        self.has_next = False
+
+    async def load_page(self):
+        results = await asyncio.to_thread(self.fetch_page, before_id=self.cursors[-1], limit=RESULTS_PER_PAGE + 1)
+        self.has_next = len(results) > RESULTS_PER_PAGE
+        self.results = results[:RESULTS_PER_PAGE]
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = not self.has_next
+
+    def build_embed(self):
+        embed = discord.Embed(title="🔎 Account Search", description=self.summary, color=EMBED_COLOR)
+        if not self.results:
+            embed.add_field(name="No listings found", value="Try removing a filter or raising the max price.", inline=False)
+
+        for result in self.results:
+            link = f"https://discord.com/channels/{self.guild_id}/{result['channel_id']}/{result['message_id']}"
+            status = " • ".join(filter(None, (
+                (result['ban_status'] or '').title(),
+                (result['email_status'] or '').title(),
+            )))
+            details = result['details'].replace('\n', ', ')
+            if len(details) > 200:
+                details = details[:197] + "..."
+            embed.add_field(
+                name=f"{result['account_type']} • ${str(result['price']).lstrip('$')}",
+                value=f"{status}\n{details}\n<@{result['user_id']}> • [View listing]({link})",
+                inline=False
+            )
+
+        embed.set_footer(text=f"Page {len(self.cursors)}")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Run /search yourself to page through results.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        await self.load_page()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.has_next and self.results:
+            self.cursors.append(self.results[-1]['id'])
+        await self.load_page()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+
+class SearchCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="search", description="Search active account listings")
+    @app_commands.describe(
+        account_type="Account type",
+        bans="Ban history",
+        email="Email registration status",
+        min_price="Minimum price in USD",
+        max_price="Maximum price in USD",
+        keywords="Words that must appear in the account details, e.g. \"fire cape\""
+    )
+    @app_commands.choices(
+        account_type=[app_commands.Choice(name=name, value=name.lower()) for name in ("Main", "PvP", "HCIM", "Iron", "Special")],
+        bans=[app_commands.Choice(name=name.title(), value=name) for name in ("no bans", "temp ban", "expired ban")],
+        email=[app_commands.Choice(name=name.title(), value=name) for name in ("registered", "unregistered")]
+    )
+    async def search(self, interaction: discord.Interaction,
+                     account_type: app_commands.Choice[str] = None,
+                     bans: app_commands.Choice[str] = None,
+                     email: app_commands.Choice[str] = None,
+                     min_price: float = None,
+                     max_price: float = None,
+                     keywords: str = None):
+        """Search active account listings by type, ban/email status, price and details"""
+        filters = []
+        if account_type:
+            filters.append(account_type.name)
+        if bans:
+            filters.append(bans.name)
+        if email:
+            filters.append(f"email {email.value}")
+        if min_price is not None:
+            filters.append(f"from ${min_price:g}")
+        if max_price is not None:
+            filters.append(f"under ${max_price:g}")
+        if keywords:
+            filters.append(f"\"{keywords[:50]}\"")
+
+        fetch_page = functools.partial(
+            search_listings,
+            DB_PATH,
+            kind='account',
+            account_type=account_type.value if account_type else None,
+            ban_status=bans.value if bans else None,
+            email_status=email.value if email else None,
+            min_price=min_price,
+            max_price=max_price,
+            keywords=keywords
+        )
+        view = SearchResultsView(
+            interaction.user.id,
+            interaction.guild_id,
+            fetch_page,
+            ", ".join(filters) or "All active listings"
+        )
+
+        try:
+            await view.load_page()
+        except Exception as e:
+            await interaction.response.send_message(f"❌ Search failed: {str(e)}", ephemeral=True)
+            return
+        await interaction.response.send_message(embed=view.build_embed(), view=view, ephemeral=True)
+
+    @app_commands.command(name="gprates", description="Show the best current GP buy and sell rates")
+    async def gprates(self, interaction: discord.Interaction):
+        """Best rates from the in-memory GP order book"""
+        embed = discord.Embed(title="💰 GP Rates", color=EMBED_COLOR)
+
+        for title, side in (("Cheapest sellers", "selling"), ("Best buyers", "buying")):
+            orders = gp_order_book.best(side, 5)
+            lines = []
+            for order in orders:
+                amount = f" • {format_amount(order.amount)}" if order.amount else ""
+                payment = f" • {order.payment_method}" if order.payment_method else ""
+                lines.append(f"**${order.rate:.3f}/M**{amount}{payment} • <@{order.user_id}> in <#{order.channel_id}>")
+            embed.add_field(name=title, value="\n".join(lines) or "No active listings", inline=False)
+
+        embed.set_footer(text=f"{len(gp_order_book)} active GP listings")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(SearchCog(bot))
@@ -0,0 +1,151 @@
+from PIL import Image
+import asyncio
+import io
+from config.layout import SHOWCASE_UPLOAD_CONFIG, CAROUSEL_CONFIG
+
+
+# Modes whose pixel values reduce() can average; palette and bilevel images are converted first
+REDUCIBLE_MODES = ('L', 'LA', 'RGB', 'RGBA', 'CMYK')
+
+
+class RejectedUpload(Exception):
+    """Raised when an uploaded attachment can't be used as a showcase image"""
+
+
+def probe_image(image_bytes, max_pixels=SHOWCASE_UPLOAD_CONFIG['max_pixels']):
+    """Read only the image header and reject non-images or oversized images"""
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+    except Exception:
+        raise RejectedUpload("not a supported image")
+
+    if image.format not in SHOWCASE_UPLOAD_CONFIG['formats']:
+        raise RejectedUpload(f"unsupported format {image.format}")
+
+    width, height = image.size
+    if width * height > max_pixels:
+        raise RejectedUpload(f"image is too large ({width}x{height})")
+
+    return image
+
+
+def has_alpha(image):
+    """Whether the image carries transparency that has to survive decoding"""
+    return image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def decode_showcase_image(image_bytes, target_size,
+                          max_decode_pixels=SHOWCASE_UPLOAD_CONFIG['max_decode_pixels']):
+    """Decode an upload close to target_size and shrink it to fit (runs in a worker thread)
+
+    JPEGs are decoded by libjpeg at 1/2, 1/4 or 1/8 scale via draft(), other
+    formats are brought near the target with a cheap integer reduce() in
+    their own mode before being converted and given the final LANCZOS pass,
+    so a 4000px phone screenshot is never copied at full size as RGBA.
+    Palette images are the exception, as reduce() can't average them.
+    """
+    image = probe_image(image_bytes)
+    target_width, target_height = target_size
+
+    if image.format == 'JPEG':
+        image.draft('RGB', target_size)
+
+    width, height = image.size
+    if width * height > max_decode_pixels:
+        raise RejectedUpload(f"image is too large to decode ({width}x{height})")
+
+    # Opaque images stay RGB; pasting them onto the RGBA template gives the same result
+    mode = 'RGBA' if has_alpha(image) else 'RGB'
+    if image.mode not in REDUCIBLE_MODES:
+        image = image.convert(mode)
+
+    factor = int(max(width / target_width, height / target_height))
+    if factor >= 2:
+        image = image.reduce(factor)
+    if image.mode != mode:
+        image = image.convert(mode)
+
+    image.thumbnail(target_size, Image.LANCZOS)
+    return image
+
+
+def prepare_upload(image_bytes, tile_size, thumbnail_size=CAROUSEL_CONFIG['thumbnail_size'],
+                   quality=CAROUSEL_CONFIG['thumbnail_quality']):
+    """(collage tile, carousel thumbnail JPEG bytes) from one upload (runs in a worker thread)
+
+    The upload is decoded once, near the larger of the two sizes; the
+    thumbnail is encoded from that and the tile is shrunk from it to the
+    biggest zone it can be drawn into.
+    """
+    image = decode_showcase_image(image_bytes, (max(tile_size[0], thumbnail_size[0]),
+                                                max(tile_size[1], thumbnail_size[1])))
+    thumbnail = image.copy()
+    thumbnail.thumbnail(thumbnail_size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    thumbnail.convert('RGB').save(buffer, format='JPEG', quality=quality)
+
+    image.thumbnail(tile_size, Image.LANCZOS)
+    return image, buffer.getvalue()
+
+
+class ShowcaseIngest:
+    """Download and decode showcase attachments concurrently as they arrive.
+
+    Each batch of attachments added starts one download + decode task per
+    attachment right away, so work for earlier uploads overlaps with the user
+    still sending later ones. tile_size(count) gives the largest collage tile
+    for count images; uploads are decoded for the layout of everything added
+    so far.
+    """
+
+    def __init__(self, tile_size, max_images=SHOWCASE_UPLOAD_CONFIG['max_images']):
+        self.tile_size = tile_size
+        self.max_images = max_images
+        self.tasks = []
+
+    @property
+    def count(self):
+        return len(self.tasks)
+
+    @property
+    def full(self):
+        return len(self.tasks) >= self.max_images
+
+    def add_batch(self, attachments):
+        """Start ingesting one message's attachments, up to max_images in total. Returns how many were taken."""
+        batch = list(attachments)[:self.max_images - self.count]
+        if not batch:
+            return 0
+        tile_size = self.tile_size(self.count + len(batch))
+        for attachment in batch:
+            self.tasks.append((attachment.filename, asyncio.create_task(self._ingest(attachment, tile_size))))
+        return len(batch)
+
+    async def _ingest(self, attachment, tile_size):
+        # attachment.size is known from the message payload, so oversized files are never downloaded
+        if attachment.size > SHOWCASE_UPLOAD_CONFIG['max_bytes']:
+            limit_mb = SHOWCASE_UPLOAD_CONFIG['max_bytes'] // (1024 * 1024)
+            raise RejectedUpload(f"file is larger than {limit_mb} MB")
+
+        image_bytes = await attachment.read()
+        return await asyncio.to_thread(prepare_upload, image_bytes, tile_size)
+
+    async def collect(self):
+        """Wait for all uploads. Returns (tiles, thumbnails, [(filename, reason)]), uploads in order"""
+        images = []
+        thumbnails = []
+        rejected = []
+        results = await asyncio.gather(*(task for _, task in self.tasks), return_exceptions=True)
+        for (filename, _), result in zip(self.tasks, results):
+            if isinstance(result, RejectedUpload):
+                rejected.append((filename, str(result)))
+            elif isinstance(result, Exception):
+                rejected.append((filename, "could not be read"))
+            else:
+                images.append(result[0])
+                thumbnails.append(result[1])
+        return images, thumbnails, rejected
+
+    def cancel(self):
+        for _, task in self.tasks:
+            task.cancel()
@@ -0,0 +1,230 @@
+from PIL import Image, ImageChops
+import argparse
+import hashlib
+import json
+import os
+import sys
+from config.layout import SHOWCASE_LAYOUT, SHOWCASE_UPLOAD_CONFIG
+from . import collage
+from .logs import get_logger
+
+log = get_logger("templates")
+
+ARTIFACT_NAME = "layout.compiled.json"
+ARTIFACT_VERSION = 1
+# Map pixels within this distance (per band) of a zone color but not equal to it are impure
+NEAR_TOLERANCE = 24
+# Fewer exact pixels than this share of a zone's bounding box means stray pixels stretched it
+MIN_FILL = 0.6
+
+
+class TemplateError(Exception):
+    """Raised when templates or color maps fail validation"""
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _color_mask(map_image, color, tolerance=0):
+    mask = None
+    for band, value in zip(map_image.split()[:3], color[:3]):
+        band_mask = band.point([255 if abs(level - value) <= tolerance else 0 for level in range(256)])
+        mask = band_mask if mask is None else ImageChops.multiply(mask, band_mask)
+    return mask
+
+
+def _overlaps(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def check_purity(map_image, name, color, zone):
+    """(warnings, errors) about how cleanly a zone's color was painted"""
+    warnings, errors = [], []
+    left, top, right, bottom = zone
+    exact = _color_mask(map_image, color)
+    filled = exact.crop((left, top, right + 1, bottom + 1)).histogram()[255]
+    fill = filled / ((right - left + 1) * (bottom - top + 1))
+    if fill < MIN_FILL:
+        errors.append(f"{name}: only {fill:.0%} of its box is {color}; stray pixels may be stretching the zone")
+
+    # Near-miss pixels hugging the zone are blended edges that the exact scan leaves out
+    margin = 3
+    box = (max(0, left - margin), max(0, top - margin),
+           min(map_image.width, right + 1 + margin), min(map_image.height, bottom + 1 + margin))
+    near = _color_mask(map_image.crop(box), color, NEAR_TOLERANCE)
+    fringe = near.histogram()[255] - exact.crop(box).histogram()[255]
+    if fringe:
+        near_left, near_top, near_right, near_bottom = near.getbbox()
+        spill = max(left - (box[0] + near_left), top - (box[1] + near_top),
+                    box[0] + near_right - 1 - right, box[1] + near_bottom - 1 - bottom)
+        warnings.append(f"{name}: {fringe} anti-aliased pixels around the zone, "
+                        f"painted up to {spill}px beyond what renders use")
+    return warnings, errors
+
+
+def compile_layout(generator, layout):
+    """(compiled entry, warnings, errors) for one color-mapped template"""
+    name, template_path, map_path, map_mode, size, zone_names = layout
+    warnings, errors = [], []
+    for path in (template_path, map_path):
+        if not os.path.exists(path):
+            return None, warnings, [f"{name}: {os.path.basename(path)} not found"]
+
+    with Image.open(template_path) as template, Image.open(map_path) as raw_map:
+        if template.size != raw_map.size:
+            errors.append(f"{name}: template is {template.size[0]}x{template.size[1]} "
+                          f"but its map is {raw_map.size[0]}x{raw_map.size[1]}")
+
+    # Zones are found exactly as renders used to find them, on the map as renders load it
+    map_image = generator.load_image(map_path, map_mode, size)
+    zones = {}
+    for zone_name in zone_names:
+        color = generator.COLOR_MAPPINGS[zone_name]
+        zone = generator._scan_color_zone(map_image, color)
+        if zone is None:
+            errors.append(f"{name}: color {color} for {zone_name} not found in {os.path.basename(map_path)}")
+            continue
+        zone_warnings, zone_errors = check_purity(map_image, zone_name, color, zone)
+        warnings += [f"{name}: {warning}" for warning in zone_warnings]
+        errors += [f"{name}: {error}" for error in zone_errors]
+        zones[zone_name] = list(zone)
+
+    names = list(zones)
+    for i, first in enumerate(names):
+        for second in names[i + 1:]:
+            if _overlaps(zones[first], zones[second]):
+                errors.append(f"{name}: {first} {zones[first]} overlaps {second} {zones[second]}")
+
+    entry = {
+        "template": os.path.basename(template_path),
+        "map": os.path.basename(map_path),
+        "size": list(map_image.size),
+        "sources": {os.path.basename(path): file_digest(path) for path in (template_path, map_path)},
+        "zones": zones,
+    }
+    return entry, warnings, errors
+
+
+def check_showcase(generator):
+    """Errors in SHOWCASE_LAYOUT against the showcase template"""
+    path = generator.showcase_path()
+    if not os.path.exists(path):
+        return [f"SHOWCASE: {os.path.basename(path)} not found"]
+    with Image.open(path) as template:
+        width, height = template.size
+
+    errors = []
+    left, top, right, bottom = SHOWCASE_LAYOUT['area']
+    if left < 0 or top < 0 or right > width or bottom > height:
+        errors.append(f"SHOWCASE: area {SHOWCASE_LAYOUT['area']} is outside the {width}x{height} template")
+    for count in range(1, SHOWCASE_UPLOAD_CONFIG['max_images'] + 1):
+        rows = SHOWCASE_LAYOUT['grid_rows'].get(count)
+        if rows is None or sum(rows) != count:
+            errors.append(f"SHOWCASE: grid_rows has no layout for {count} images")
+            continue
+        zones = collage.grid_zones(count)
+        if any(_overlaps(a, b) for i, a in enumerate(zones) for b in zones[i + 1:]):
+            errors.append(f"SHOWCASE: grid tiles for {count} images overlap")
+    return errors
+
+
+def compile_templates(generator):
+    """(artifact, warnings, errors) for every template the renderers use"""
+    artifact = {"version": ARTIFACT_VERSION, "layouts": {}}
+    warnings, errors = [], check_showcase(generator)
+    for layout in generator.template_layouts():
+        entry, layout_warnings, layout_errors = compile_layout(generator, layout)
+        warnings += layout_warnings
+        errors += layout_errors
+        if entry is not None:
+            artifact["layouts"][layout[0]] = entry
+    return artifact, warnings, errors
+
+
+def artifact_path(template_dir):
+    return os.path.join(template_dir, ARTIFACT_NAME)
+
+
+def is_stale(artifact, template_dir):
+    """Whether any template or map changed since the artifact was compiled"""
+    if artifact.get("version") != ARTIFACT_VERSION:
+        return True
+    digests = {}
+    for entry in artifact["layouts"].values():
+        for filename, digest in entry["sources"].items():
+            path = os.path.join(template_dir, filename)
+            if filename not in digests:
+                digests[filename] = file_digest(path) if os.path.exists(path) else None
+            if digests[filename] != digest:
+                return True
+    return False
+
+
+def load_compiled_layouts(generator):
+    """Zones by layout name from the compiled artifact, recompiled in memory if it is missing or stale.
+
+    Called once per process; renders only ever do dict lookups on the result.
+    """
+    path = artifact_path(generator.template_dir)
+    artifact = None
+    if os.path.exists(path):
+        with open(path) as f:
+            artifact = json.load(f)
+        if is_stale(artifact, generator.template_dir):
+            log.error("%s is out of date with the templates; run python -m cogs.template_compiler", ARTIFACT_NAME)
+            artifact = None
+    else:
+        log.warning("%s not found; run python -m cogs.template_compiler", ARTIFACT_NAME)
+
+    if artifact is None:
+        artifact, _, errors = compile_templates(generator)
+        if errors:
+            raise TemplateError("Templates failed validation:\n" + "\n".join(errors))
+
+    return {
+        name: {zone_name: tuple(zone) for zone_name, zone in entry["zones"].items()}
+        for name, entry in artifact["layouts"].items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate templates and color maps and compile their zones")
+    parser.add_argument("--check", action="store_true", help="validate only; fail if the artifact is out of date")
+    parser.add_argument("--verbose", action="store_true", help="list every edge-purity warning")
+    args = parser.parse_args(argv)
+
+    from .embed_generator import EmbedGenerator
+    generator = EmbedGenerator()
+    artifact, warnings, errors = compile_templates(generator)
+    if args.verbose:
+        for warning in warnings:
+            print(f"warning: {warning}")
+    elif warnings:
+        print(f"{len(warnings)} zones have anti-aliased edges (--verbose to list them)")
+    for error in errors:
+        print(f"error: {error}")
+    if errors:
+        return 1
+
+    path = artifact_path(generator.template_dir)
+    output = json.dumps(artifact, indent=2, sort_keys=True) + "\n"
+    if args.check:
+        current = ""
+        if os.path.exists(path):
+            with open(path) as f:
+                current = f.read()
+        if current != output:
+            print(f"error: {ARTIFACT_NAME} is out of date; run python -m cogs.template_compiler")
+            return 1
+        return 0
+
+    with open(path, "w") as f:
+        f.write(output)
+    print(f"Compiled {len(artifact['layouts'])} layouts to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
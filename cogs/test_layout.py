@@ -1,103 +1,79 @@
 import discord
 from discord.ext import commands
-from PIL import Image, ImageDraw, ImageFont
+import asyncio
 import io
-import os
+from .logs import get_logger
+
+log = get_logger("test_layout")
 
 class TestLayoutCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.template_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates"))
-
-    def create_grid_overlay(self, template_path):
-        """Create a grid overlay on the template to help with positioning"""
-        try:
-            # Load the template
-            template = Image.open(template_path).convert('RGBA')
-            
-            # Create a new transparent layer for the grid
-            grid = Image.new('RGBA', template.size, (0, 0, 0, 0))
-            draw = ImageDraw.Draw(grid)
-            
-            # Draw grid lines every 50 pixels
-            for x in range(0, template.width, 50):
-                draw.line([(x, 0), (x, template.height)], fill=(255, 0, 0, 128), width=1)
-                # Add coordinate numbers
-                draw.text((x+2, 2), str(x), fill=(255, 255, 0, 255))
-
-            for y in range(0, template.height, 50):
-                draw.line([(0, y), (template.width, y)], fill=(255, 0, 0, 128), width=1)
-                # Add coordinate numbers
-                draw.text((2, y+2), str(y), fill=(255, 255, 0, 255))
-
-            # Mark important areas with boxes and labels
-            areas = {
-                "PFP Area": ((25, 25), (95, 95)),
-                "Username": ((110, 45), (300, 70)),
-                "Price": ((template.width-300, 45), (template.width-30, 70)),
-                "Description": ((50, 200), (template.width-50, 500)),
-                "Showcase": ((50, 800), (template.width-50, 1100))
-            }
+        self.generator = None
 
-            for label, (start, end) in areas.items():
-                # Draw box
-                draw.rectangle([start, end], outline=(0, 255, 0, 255), width=2)
-                # Add label
-                draw.text((start[0], start[1]-20), label, fill=(0, 255, 255, 255))
-                # Add coordinates
-                coord_text = f"({start[0]},{start[1]}) to ({end[0]},{end[1]})"
-                draw.text((start[0], end[1]+5), coord_text, fill=(255, 255, 0, 255))
-
-            # Combine template and grid
-            result = Image.alpha_composite(template, grid)
-            
-            # Save to buffer
-            buffer = io.BytesIO()
-            result.save(buffer, format='PNG')
-            buffer.seek(0)
-            
-            return buffer
-
-        except Exception as e:
-            print(f"Error creating grid overlay: {str(e)}")
-            raise
+    def inspector(self):
+        """Layout inspector and a generator for it, imported on first use so Pillow stays out of startup"""
+        from . import layout_inspector
+        if self.generator is None:
+            from .embed_generator import EmbedGenerator
+            self.generator = EmbedGenerator()
+        return layout_inspector, self.generator
 
     @commands.command(name="showgrid")
     @commands.has_permissions(administrator=True)
     async def show_grid(self, ctx, template_type: str = "Main"):
-        """Show a grid overlay on the template to help with positioning
+        """Show the zones found in a template's color map, with their boxes and lookup cost
         Usage: !showgrid [template_type]
-        Template types: Main, PvP, HCIM, Iron, Special"""
-        
-        try:
-            template_file = {
-                "Main": "TEMPLATE_MAIN.png",
-                "PvP": "TEMPLATE_PVP.png",
-                "HCIM": "HCIM_TEMPLATE.png",
-                "Iron": "TEMPLATE_IRON.png",
-                "Special": "TEMPLATE_SPECIAL.png"
-            }.get(template_type)
-
-            if not template_file:
-                await ctx.send("Invalid template type. Use: Main, PvP, HCIM, Iron, or Special")
-                return
+        Template types: Main, PvP, HCIM, Iron, Special, GP_Buyer, GP_Seller, Showcase"""
 
-            template_path = os.path.join(self.template_dir, template_file)
-            if not os.path.exists(template_path):
-                await ctx.send(f"Template file not found: {template_file}")
+        try:
+            inspector, generator = self.inspector()
+            layouts = inspector.layouts(generator)
+            layout = layouts.get(template_type.upper())
+            if layout is None:
+                await ctx.send(f"Invalid template type. Use: {', '.join(name.title() for name in layouts)}")
                 return
 
-            # Create grid overlay
-            grid_image = self.create_grid_overlay(template_path)
-            
-            # Send the image
+            # Rendered once per template version; later calls reuse the PNG
+            png, reports = await asyncio.to_thread(inspector.overlay_png, generator, layout)
             await ctx.send(
-                "Grid overlay showing coordinates and areas. Use these numbers in config/layout.py",
-                file=discord.File(grid_image, filename="grid_overlay.png")
+                inspector.describe(layout[0], reports),
+                file=discord.File(io.BytesIO(png), filename=f"{layout[0].lower()}_zones.png")
             )
 
         except Exception as e:
-            await ctx.send(f"Error creating grid overlay: {str(e)}")
+            log.exception("Error creating zone overlay")
+            await ctx.send(f"Error creating zone overlay: {str(e)}")
+
+    @commands.command(name="exportlayouts")
+    @commands.has_permissions(administrator=True)
+    async def export_layouts(self, ctx):
+        """Export the zone overlay of every template
+        Usage: !exportlayouts"""
+
+        try:
+            inspector, generator = self.inspector()
+            overlays = []
+            for name, layout in inspector.layouts(generator).items():
+                try:
+                    png, reports = await asyncio.to_thread(inspector.overlay_png, generator, layout)
+                except OSError as e:
+                    await ctx.send(f"⚠️ Skipped {name}: {e}")
+                    continue
+                overlays.append((name, png, reports))
+
+            # Discord allows 10 attachments per message
+            for i in range(0, len(overlays), 10):
+                files = [discord.File(io.BytesIO(png), filename=f"{name.lower()}_zones.png") for name, png, _ in overlays[i:i + 10]]
+                await ctx.send(f"Zone overlays {i + 1}-{i + len(files)} of {len(overlays)}", files=files)
+
+            # The zone report is too long for one message, so it goes out as a file
+            report = "\n\n".join(inspector.describe(name, reports) for name, _, reports in overlays)
+            await ctx.send(file=discord.File(io.BytesIO(report.encode()), filename="layouts.txt"))
+
+        except Exception as e:
+            log.exception("Error exporting layouts")
+            await ctx.send(f"Error exporting layouts: {str(e)}")
 
 async def setup(bot):
-    await bot.add_cog(TestLayoutCog(bot))
\ No newline at end of file
+    await bot.add_cog(TestLayoutCog(bot))
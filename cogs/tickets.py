@@ -1,11 +1,35 @@
 import discord
+import asyncio
 from discord.ext import commands
 from discord.ui import View, Button, Modal, TextInput
 import io
+import uuid
 from datetime import datetime
-import sqlite3
-import json
-import asyncio
+from .reputation import reputation
+from .member_cache import member_resolver
+from .jobs import job_queue
+from .logs import get_logger
+
+log = get_logger("tickets")
+
+ARCHIVE_CHANNEL_ID = 1395791949969231945
+VOUCH_POST_CHANNEL_ID = 1383401756335149087
+
+
+def message_ref(message):
+    """[channel_id, message_id] for a real message, None for the placeholder vouch requests use"""
+    channel = getattr(message, 'channel', None)
+    return [channel.id, message.id] if channel is not None else None
+
+
+async def queue_ticket_archive(channel, user_ids):
+    """Transcript, DMs and channel deletion run as a job, so a restart can't leave a ticket half archived"""
+    await job_queue.enqueue(
+        "ticket_archive",
+        {"channel_id": channel.id, "user_ids": list(user_ids)},
+        key=f"ticket_archive:{channel.id}",
+        guild_id=channel.guild.id
+    )
 
 class TicketCog(commands.Cog):
     def __init__(self, bot):
@@ -13,10 +37,126 @@ class TicketCog(commands.Cog):
         self.EMBED_COLOR = discord.Color.gold()
         self.BRANDING_IMAGE = "https://i.postimg.cc/ZYvXG4Ms/Runes-and-Relics.png"
         self.CHANNELS = {
-            "archive": 1395791949969231945,
-            "vouch_post": 1383401756335149087
+            "archive": ARCHIVE_CHANNEL_ID,
+            "vouch_post": VOUCH_POST_CHANNEL_ID
         }
 
+    async def cog_load(self):
+        job_queue.register("vouch_finalize", self.finalize_vouches)
+        job_queue.register("ticket_archive", self.archive_ticket)
+
+    async def cog_unload(self):
+        job_queue.unregister("vouch_finalize", "ticket_archive")
+
+    async def finalize_vouches(self, job):
+        """Job: record both vouches, announce them and ask the lister about their listing"""
+        payload = job.payload
+        if not job.done("recorded"):
+            for user_id, (rating, comment) in payload["ratings"].items():
+                await asyncio.to_thread(reputation.record_vouch, user_id, rating, comment)
+            await job.checkpoint("recorded")
+
+        channel = self.bot.get_channel(payload["channel_id"])
+        if channel is None:
+            log.warning("Ticket %s was deleted before its vouches were announced", payload["channel_id"])
+            return
+
+        if not job.done("announced"):
+            await channel.send("✅ Both users have left vouches! Trade completed successfully.")
+            await job.checkpoint("announced")
+
+        if not job.done("posted"):
+            await self.post_vouches_to_thread(channel, payload)
+            await job.checkpoint("posted")
+
+        if not job.done("asked"):
+            await self.ask_listing_deletion(channel, payload)
+            await job.checkpoint("asked")
+
+    async def post_vouches_to_thread(self, channel, payload):
+        """Post the vouches to the vouch thread channel"""
+        vouch_channel = channel.guild.get_channel(self.CHANNELS["vouch_post"])
+        if not vouch_channel:
+            await channel.send("❌ Could not find vouch thread channel.")
+            return
+
+        user1_id, user2_id = payload["user_ids"]
+        vouch_content = f"⭐ **Trade Completed** ⭐\n\n"
+        vouch_content += f"**Trade Participants:** <@{user1_id}> & <@{user2_id}>\n"
+        vouch_content += f"**Channel:** {channel.mention}\n\n"
+
+        # Add individual vouch details
+        for user_id, (rating, comment) in payload["ratings"].items():
+            user = await member_resolver.resolve(channel.guild, int(user_id))
+            stars = "⭐" * rating
+            vouch_content += f"**{user.display_name if user else f'User {user_id}'}:** {stars} ({rating}/5)\n"
+            if comment and comment != "No comment provided":
+                vouch_content += f"*Comment:* {comment}\n"
+            vouch_content += "\n"
+
+        await vouch_channel.send(vouch_content)
+
+    async def ask_listing_deletion(self, channel, payload):
+        """Ask the lister if they want to delete or keep their listing"""
+        if payload["listing"] is None:
+            # Vouch requests have no listing to ask about
+            await queue_ticket_archive(channel, payload["user_ids"])
+            return
+
+        def partial(ref):
+            ref_channel = self.bot.get_channel(ref[0])
+            return ref_channel.get_partial_message(ref[1]) if ref_channel else None
+
+        listing_message = partial(payload["listing"])
+        # GP listings are a single message; don't pass it twice or it gets deleted twice
+        account_message = partial(payload["account"]) if payload["account"] and payload["account"] != payload["listing"] else None
+        lister = await member_resolver.resolve(channel.guild, payload["lister_id"])
+
+        view = ListingDeletionView(listing_message, payload["user_ids"], account_message, lister)
+        await channel.send(
+            f"<@{payload['lister_id']}>, would you like to delete your listing or keep it active?",
+            view=view
+        )
+
+    async def archive_ticket(self, job):
+        """Job: post the transcript to the archive, queue transcript DMs, then delete the ticket"""
+        channel = self.bot.get_channel(job.payload["channel_id"])
+        if channel is None:
+            log.info("Ticket %s is already gone, nothing to archive", job.payload["channel_id"])
+            return
+
+        if not job.done("archived"):
+            transcript_lines = []
+            async for msg in channel.history(limit=None, oldest_first=True):
+                timestamp = msg.created_at.strftime("%Y-%m-%d %H:%M:%S")
+                author = msg.author.display_name
+                content = msg.content or ""
+                transcript_lines.append(f"[{timestamp}] {author}: {content}")
+                for att in msg.attachments:
+                    transcript_lines.append(f"[{timestamp}] {author} sent an attachment: {att.url}")
+
+            transcript_text = "\n".join(transcript_lines)
+            filename = f"ticket-{channel.name}-archive.txt"
+
+            archive = channel.guild.get_channel(self.CHANNELS["archive"])
+            if archive:
+                discord_file = discord.File(fp=io.BytesIO(transcript_text.encode()), filename=filename)
+                await archive.send(content=f"📁 Archived ticket: {channel.name}", file=discord_file)
+
+            for user_id in job.payload["user_ids"]:
+                await job_queue.enqueue("dm", {
+                    "user_id": user_id,
+                    "content": f"📄 Transcript from your completed trade in `{channel.name}`.",
+                    "filename": filename,
+                    "text": transcript_text,
+                }, key=f"transcript:{channel.id}:{user_id}")
+            await job.checkpoint("archived")
+
+        try:
+            await channel.delete()
+        except discord.NotFound:
+            pass
+
     @commands.command(name="complete")
     async def complete_trade(self, ctx):
         """Mark the trade/vouch as complete and start the vouching process"""
@@ -112,8 +252,8 @@ class TicketActions(View):
         self.vouch_view = None
         self.lister = user2
         self.CHANNELS = {
-            "archive": 1395791949969231945,
-            "vouch_post": 1383401756335149087
+            "archive": ARCHIVE_CHANNEL_ID,
+            "vouch_post": VOUCH_POST_CHANNEL_ID
         }
 
     @discord.ui.button(label="✅ Mark as Complete", style=discord.ButtonStyle.success)
@@ -157,31 +297,7 @@ class TicketActions(View):
         await channel.send(f"{user_list[1].mention}, please rate your trade partner:", view=view2)
 
     async def archive_ticket(self, channel):
-        archive = channel.guild.get_channel(self.CHANNELS["archive"])
-        transcript_lines = []
-        async for msg in channel.history(limit=None, oldest_first=True):
-            timestamp = msg.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            author = msg.author.display_name
-            content = msg.content or ""
-            transcript_lines.append(f"[{timestamp}] {author}: {content}")
-            for att in msg.attachments:
-                transcript_lines.append(f"[{timestamp}] {author} sent an attachment: {att.url}")
-
-        transcript_text = "\n".join(transcript_lines)
-        transcript_file = io.StringIO(transcript_text)
-        discord_file = discord.File(fp=transcript_file, filename=f"ticket-{channel.name}-archive.txt")
-
-        if archive:
-            await archive.send(content=f"📁 Archived ticket: {channel.name}", file=discord_file)
-
-        for user in self.users.values():
-            try:
-                transcript_file.seek(0)
-                await user.send(content=f"📄 Transcript from your completed trade in `{channel.name}`.", file=discord_file)
-            except discord.Forbidden:
-                await channel.send(f"⚠️ Could not DM transcript to {user.mention}.")
-
-        await channel.delete()
+        await queue_ticket_archive(channel, self.users)
 
 class VouchView:
     def __init__(self, ticket_actions, channel, listing_message, user1, user2, lister):
@@ -193,117 +309,31 @@ class VouchView:
         self.lister = lister
         self.ratings = {}
         self.comments = {}
-        self.DB_PATH = "/app/data/vouches.db"
+        # One finalize job per vouching round, however often the last rating is submitted
+        self.round_id = uuid.uuid4().hex
 
-    def add_rating(self, user_id, rating, comment):
+    async def add_rating(self, user_id, rating, comment):
         self.ratings[user_id] = rating
         self.comments[user_id] = comment
         
         # Check if both users have rated
         if len(self.ratings) == 2:
-            asyncio.create_task(self.complete_vouching())
+            await self.complete_vouching()
 
     async def complete_vouching(self):
+        """Hand the rest of the trade to the job queue, which survives restarts"""
         try:
-            # Update vouches in database
-            for user_id, rating in self.ratings.items():
-                comment = self.comments.get(user_id, "")
-                self.update_vouch(str(user_id), rating, comment)
-            
-            # Send completion message
-            await self.channel.send("✅ Both users have left vouches! Trade completed successfully.")
-            
-            # Post vouches to vouch thread channel
-            await self.post_vouches_to_thread()
-            
-            # Ask lister if they want to delete or keep their listing
-            await self.ask_listing_deletion()
-            
+            await job_queue.enqueue("vouch_finalize", {
+                "channel_id": self.channel.id,
+                "user_ids": list(self.ticket_actions.users),
+                "ratings": {str(user_id): [rating, self.comments.get(user_id, "")] for user_id, rating in self.ratings.items()},
+                "lister_id": self.lister.id,
+                "listing": message_ref(self.listing_message),
+                "account": message_ref(self.ticket_actions.account_message),
+            }, key=f"vouch_finalize:{self.channel.id}:{self.round_id}", guild_id=self.channel.guild.id)
         except Exception as e:
             await self.channel.send(f"❌ Error completing vouching: {str(e)}")
 
-    async def post_vouches_to_thread(self):
-        """Post the vouches to the vouch thread channel"""
-        try:
-            vouch_channel = self.channel.guild.get_channel(self.ticket_actions.CHANNELS["vouch_post"])
-            if not vouch_channel:
-                await self.channel.send("❌ Could not find vouch thread channel.")
-                return
-            
-            # Create vouch post content
-            user_list = list(self.ticket_actions.users.values())
-            user1, user2 = user_list[0], user_list[1]
-            
-            vouch_content = f"⭐ **Trade Completed** ⭐\n\n"
-            vouch_content += f"**Trade Participants:** {user1.mention} & {user2.mention}\n"
-            vouch_content += f"**Channel:** {self.channel.mention}\n\n"
-            
-            # Add individual vouch details
-            for user_id, rating in self.ratings.items():
-                user = self.channel.guild.get_member(int(user_id))
-                comment = self.comments.get(user_id, "")
-                stars = "⭐" * rating
-                vouch_content += f"**{user.display_name if user else f'User {user_id}'}:** {stars} ({rating}/5)\n"
-                if comment and comment != "No comment provided":
-                    vouch_content += f"*Comment:* {comment}\n"
-                vouch_content += "\n"
-            
-            await vouch_channel.send(vouch_content)
-            
-        except Exception as e:
-            await self.channel.send(f"❌ Error posting vouches to thread: {str(e)}")
-
-    def update_vouch(self, user_id, stars, comment):
-        with sqlite3.connect(self.DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS vouches (
-                    user_id TEXT PRIMARY KEY,
-                    total_stars INTEGER NOT NULL,
-                    count INTEGER NOT NULL,
-                    comments TEXT
-                )
-            ''')
-            
-            row = self.get_vouch_data(user_id)
-            if row:
-                total_stars, count, comments_json = row
-                comments_list = json.loads(comments_json) if comments_json else []
-                total_stars += stars
-                count += 1
-                comments_list.append(comment)
-                comments_json = json.dumps(comments_list)
-                cursor.execute('UPDATE vouches SET total_stars=?, count=?, comments=? WHERE user_id=?',
-                               (total_stars, count, comments_json, user_id))
-            else:
-                comments_json = json.dumps([comment])
-                cursor.execute('INSERT INTO vouches (user_id, total_stars, count, comments) VALUES (?, ?, ?, ?)',
-                               (user_id, stars, 1, comments_json))
-            conn.commit()
-
-    def get_vouch_data(self, user_id):
-        with sqlite3.connect(self.DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT total_stars, count, comments FROM vouches WHERE user_id = ?', (user_id,))
-            return cursor.fetchone()
-
-    async def ask_listing_deletion(self):
-        """Ask the lister if they want to delete or keep their listing"""
-        # Check if this is a GP listing by checking if listing_message and account_message are the same
-        is_gp_listing = (self.listing_message == self.ticket_actions.account_message)
-        
-        if is_gp_listing:
-            # For GP listings, only pass the listing_message (don't pass account_message to avoid double deletion)
-            view = ListingDeletionView(self.listing_message, self.ticket_actions, None, self.lister)
-        else:
-            # For account listings, pass both messages
-            view = ListingDeletionView(self.listing_message, self.ticket_actions, self.ticket_actions.account_message, self.lister)
-        
-        await self.channel.send(
-            f"{self.lister.mention}, would you like to delete your listing or keep it active?",
-            view=view
-        )
-
 class StarRatingView(View):
     def __init__(self, vouch_view, user):
         super().__init__(timeout=300)  # 5 minute timeout
@@ -369,7 +399,7 @@ class VouchCommentModal(Modal):
 
     async def on_submit(self, interaction: discord.Interaction):
         comment = self.comment.value or "No comment provided"
-        self.vouch_view.add_rating(self.user_id, self.stars, comment)
+        await self.vouch_view.add_rating(self.user_id, self.stars, comment)
         
         await interaction.response.send_message(
             f"✅ Thank you for your {self.stars}⭐ rating! Your vouch has been recorded.",
@@ -377,10 +407,10 @@ class VouchCommentModal(Modal):
         )
 
 class ListingDeletionView(View):
-    def __init__(self, listing_message, ticket_actions=None, account_message=None, lister=None):
+    def __init__(self, listing_message, participant_ids=None, account_message=None, lister=None):
         super().__init__(timeout=300)  # 5 minute timeout
         self.listing_message = listing_message
-        self.ticket_actions = ticket_actions
+        self.participant_ids = participant_ids
         self.account_message = account_message
         self.lister = lister
 
@@ -404,8 +434,8 @@ class ListingDeletionView(View):
             await interaction.response.send_message(f"❌ Failed to delete listing: {str(e)}", ephemeral=True)
         
         # Archive the ticket after listing decision
-        if self.ticket_actions:
-            await self.ticket_actions.archive_ticket(interaction.channel)
+        if self.participant_ids:
+            await queue_ticket_archive(interaction.channel, self.participant_ids)
 
     @discord.ui.button(label="✅ Keep Listing", style=discord.ButtonStyle.success)
     async def keep_listing(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -417,8 +447,8 @@ class ListingDeletionView(View):
         await interaction.response.send_message("✅ Listing will remain active.", ephemeral=True)
         
         # Archive the ticket after listing decision
-        if self.ticket_actions:
-            await self.ticket_actions.archive_ticket(interaction.channel)
+        if self.participant_ids:
+            await queue_ticket_archive(interaction.channel, self.participant_ids)
 
 async def cleanup_bot_messages(channel, limit=100):
     async for msg in channel.history(limit=limit):
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+
+class UploadSession:
+    """Messages routed to one user waiting to upload screenshots in one channel"""
+    __slots__ = ("key", "queue")
+
+    def __init__(self, key):
+        self.key = key
+        self.queue = asyncio.Queue()
+
+    async def next_message(self, timeout):
+        """Next upload (or 'done') message; raises asyncio.TimeoutError"""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class UploadSessionManager:
+    """Pending screenshot uploads indexed by (channel_id, author_id).
+
+    Replaces a wait_for("message") per listing, where every guild message ran
+    every pending check: on_message does one dict lookup and ignores the
+    message unless its author has an open session in that channel.
+
+    Screenshots can also be staged ahead of time from the /listaccount
+    attachment options; a staged listing never opens a session at all.
+    """
+
+    def __init__(self, staged_ttl=900):
+        self.sessions = {}
+        self.staged_ttl = staged_ttl
+        # user_id -> (attachments, staged_at)
+        self.staged = {}
+
+    def open(self, channel_id, author_id):
+        """Start routing this user's messages in this channel; replaces an older session"""
+        key = (channel_id, author_id)
+        session = self.sessions[key] = UploadSession(key)
+        return session
+
+    def close(self, session):
+        # A newer session for the same key may have replaced this one
+        if self.sessions.get(session.key) is session:
+            del self.sessions[session.key]
+
+    def dispatch(self, message):
+        """Hand a message to its session. Returns True if one was waiting for it."""
+        if not self.sessions:
+            return False
+        session = self.sessions.get((message.channel.id, message.author.id))
+        if session is None:
+            return False
+        if message.attachments or message.content.lower() == 'done':
+            session.queue.put_nowait(message)
+        return True
+
+    def stage(self, user_id, attachments):
+        """Keep attachments from a slash command until the user's listing modal is submitted"""
+        self.staged[user_id] = (list(attachments), time.monotonic())
+
+    def take_staged(self, user_id):
+        """Staged attachments for a user (removing them), or an empty list"""
+        attachments, staged_at = self.staged.pop(user_id, ((), 0))
+        if time.monotonic() - staged_at > self.staged_ttl:
+            return []
+        return list(attachments)
+
+    def purge_staged(self):
+        now = time.monotonic()
+        for user_id in [user_id for user_id, (_, staged_at) in self.staged.items() if now - staged_at > self.staged_ttl]:
+            del self.staged[user_id]
+
+
+upload_sessions = UploadSessionManager()
@@ -1,77 +1,105 @@
 import discord
 from discord.ext import commands
-import sqlite3
-import json
 import asyncio
 from datetime import datetime
+from typing import Optional
+from .reputation import reputation
+from .guild_cache import guild_metadata
+from .member_cache import member_resolver
+
+VOUCH_PAGE_SIZE = 5
+
+
+class VouchPageView(discord.ui.View):
+    """Prev/Next pager over vouch_entries using keyset cursors.
+
+    fetch_page(before_id, limit) returns rows newest first; each page asks for
+    one extra row to know whether a next page exists, so a trader with
+    thousands of vouches still only reads six rows per click.
+    """
+
+    def __init__(self, author_id, title, fetch_page, color, show_user=False):
+        super().__init__(timeout=300)
+        self.author_id = author_id
+        self.title = title
+        self.fetch_page = fetch_page
+        self.color = color
+        self.show_user = show_user
+        # before_id of every page visited so far; None is the first page
+        self.cursors = [None]
+        self.rows = []
+        self.has_next = False
+
+    async def load_page(self):
+        rows = await asyncio.to_thread(self.fetch_page, self.cursors[-1], VOUCH_PAGE_SIZE + 1)
+        self.has_next = len(rows) > VOUCH_PAGE_SIZE
+        self.rows = rows[:VOUCH_PAGE_SIZE]
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = not self.has_next
+
+    def build_embed(self):
+        embed = discord.Embed(title=self.title, color=self.color)
+        if not self.rows:
+            embed.description = "No vouches found."
+        for vouch_id, user_id, stars, comment, created_at in self.rows:
+            name = f"{'⭐' * stars} ({stars}/5)" if stars else "Vouch"
+            value = comment or "*No comment provided*"
+            if self.show_user:
+                value = f"<@{user_id}>: {value}"
+            embed.add_field(name=name, value=f"{value[:950]}\n`{created_at}`", inline=False)
+        embed.set_footer(text=f"Page {len(self.cursors)}")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Run the command yourself to page through vouches.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        await self.load_page()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.has_next and self.rows:
+            self.cursors.append(self.rows[-1][0])
+        await self.load_page()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
 
 class VouchCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.DB_PATH = "/app/data/vouches.db"
+        self.DB_PATH = reputation.db_path
         self.EMBED_COLOR = discord.Color.gold()
         self.BRANDING_IMAGE = "https://i.postimg.cc/ZYvXG4Ms/Runes-and-Relics.png"
-        
-        # Initialize database
-        with sqlite3.connect(self.DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS vouches (
-                user_id TEXT PRIMARY KEY,
-                total_stars INTEGER NOT NULL,
-                count INTEGER NOT NULL,
-                comments TEXT
-            )
-            ''')
-            conn.commit()
-
-    def get_vouch_data(self, user_id):
-        with sqlite3.connect(self.DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT total_stars, count, comments FROM vouches WHERE user_id = ?', (user_id,))
-            return cursor.fetchone()
 
-    def update_vouch(self, user_id, stars, comment):
-        with sqlite3.connect(self.DB_PATH) as conn:
-            cursor = conn.cursor()
-            row = self.get_vouch_data(user_id)
+    async def cog_load(self):
+        # Creates the schema and preloads every user's totals so renders and leaderboards never query SQLite
+        if not reputation.loaded:
+            await asyncio.to_thread(reputation.load)
 
-            if row:
-                total_stars, count, comments_json = row
-                comments_list = json.loads(comments_json) if comments_json else []
-                total_stars += stars
-                count += 1
-                comments_list.append(comment)
-                comments_json = json.dumps(comments_list)
-                cursor.execute('UPDATE vouches SET total_stars=?, count=?, comments=? WHERE user_id=?',
-                               (total_stars, count, comments_json, user_id))
-            else:
-                comments_json = json.dumps([comment])
-                cursor.execute('INSERT INTO vouches (user_id, total_stars, count, comments) VALUES (?, ?, ?, ?)',
-                               (user_id, stars, 1, comments_json))
-            conn.commit()
+    async def update_vouch(self, user_id, stars, comment):
+        await asyncio.to_thread(reputation.record_vouch, user_id, stars, comment)
 
     @commands.hybrid_command(name="vouchleader", description="Show top 10 vouched users")
     async def vouchleader(self, ctx):
-        with sqlite3.connect(self.DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT user_id, total_stars, count FROM vouches WHERE count > 0')
-            rows = cursor.fetchall()
-
-        if not rows:
+        # Sorted by average stars (total_stars/count) descending, then count descending
+        top10 = reputation.leaderboard(10)
+        if not top10:
             await ctx.send("No vouches recorded yet.")
             return
 
-        # Sort by average stars (total_stars/count) descending, then count descending
-        rows.sort(key=lambda r: (r[1]/r[2], r[2]), reverse=True)
-        top10 = rows[:10]
-
         embed = discord.Embed(title="🏆 Runes & Relics Vouch Leaderboard", color=self.EMBED_COLOR)
         embed.set_image(url="https://i.postimg.cc/0jHw8mRV/glowww.png")
         embed.set_footer(text="Based on average rating and number of vouches")
 
         for user_id, total_stars, count in top10:
-            member = ctx.guild.get_member(int(user_id))
+            member = await member_resolver.resolve(ctx.guild, int(user_id))
             if member:
                 avg = total_stars / count
                 embed.add_field(name=member.display_name, value=f"⭐ {avg:.2f} from {count} vouches", inline=False)
@@ -80,23 +108,46 @@ class VouchCog(commands.Cog):
 
     @commands.hybrid_command(name="vouchcheck", description="Check how many vouches you have.")
     async def vouchcheck(self, ctx):
-        user_id = str(ctx.author.id)
-        with sqlite3.connect(self.DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT total_stars, count FROM vouches WHERE user_id = ?', (user_id,))
-            row = cursor.fetchone()
-
-        if not row:
+        total_stars, count = reputation.get(ctx.author.id)
+        if not count:
             await ctx.send("You have no recorded vouches yet.", ephemeral=True)
             return
 
-        total_stars, count = row
         avg = total_stars / count if count > 0 else 0
         await ctx.send(
             f"📊 You have {count} vouches with an average rating of {avg:.2f}⭐.",
             ephemeral=True
         )
 
+    @commands.hybrid_command(name="vouchhistory", description="Browse a user's vouches, newest first")
+    async def vouchhistory(self, ctx, user: discord.Member = None):
+        user = user or ctx.author
+        total_stars, count = reputation.get(user.id)
+        view = VouchPageView(
+            ctx.author.id,
+            f"📜 Vouches for {user.display_name} ({count})",
+            lambda before_id, limit: reputation.history(user.id, before_id, limit),
+            self.EMBED_COLOR
+        )
+        await view.load_page()
+        await ctx.send(embed=view.build_embed(), view=view, ephemeral=True)
+
+    @commands.hybrid_command(name="vouchsearch", description="Search vouch comments, optionally for one user")
+    async def vouchsearch(self, ctx, user: Optional[discord.Member] = None, *, query: str):
+        # query is keyword-only so the prefix form takes the rest of the message, not just its first word
+        title = f"🔎 Vouches matching \"{query[:50]}\""
+        if user:
+            title += f" for {user.display_name}"
+        view = VouchPageView(
+            ctx.author.id,
+            title,
+            lambda before_id, limit: reputation.search(query, user.id if user else None, before_id, limit),
+            self.EMBED_COLOR,
+            show_user=user is None
+        )
+        await view.load_page()
+        await ctx.send(embed=view.build_embed(), view=view, ephemeral=True)
+
     @commands.hybrid_command(name="addvouch", description="Add a vouch for a user (Admin/Mod only)")
     @commands.has_permissions(administrator=True)
     async def addvouch(self, ctx):
@@ -136,7 +187,7 @@ class VouchCog(commands.Cog):
                         return
                     
                     # Get the user
-                    user = interaction.guild.get_member(user_id)
+                    user = await member_resolver.resolve(interaction.guild, user_id)
                     if not user:
                         await interaction.response.send_message("❌ User not found in this server.", ephemeral=True)
                         return
@@ -145,7 +196,7 @@ class VouchCog(commands.Cog):
                     comment = f"Admin vouch by {interaction.user.display_name}: {self.comment_input.value}"
                     
                     # Update vouch in database
-                    self.cog.update_vouch(str(user_id), stars, comment)
+                    await self.cog.update_vouch(str(user_id), stars, comment)
                     
                     # Post to vouch thread
                     vouch_thread_id = 1383401756335149087
@@ -192,21 +243,8 @@ class VouchCog(commands.Cog):
             return
         
         # Create ticket channel (same as GP and account tickets - no category specified)
-        overwrites = {
-            ctx.guild.default_role: discord.PermissionOverwrite(read_messages=False),
-            ctx.author: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-            user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-            ctx.guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
-        }
-        
-        # Add admin and moderator roles
-        admin_role = discord.utils.get(ctx.guild.roles, name="Admin")
-        mod_role = discord.utils.get(ctx.guild.roles, name="Moderator")
-        
-        if admin_role:
-            overwrites[admin_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
-        if mod_role:
-            overwrites[mod_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+        # Staff roles and @everyone come from the precomputed guild template
+        overwrites = guild_metadata.ticket_overwrites(ctx.guild, ctx.author, user, include_bot=True)
         
         # Get the tickets category
         tickets_category = ctx.guild.get_channel(1307491683461763132)
@@ -261,11 +299,7 @@ class VouchCog(commands.Cog):
         embed.set_footer(text=f"Use !complete when both users are ready to complete the vouch")
         
         # Tag admin and moderator roles
-        admin_mentions = ""
-        if admin_role:
-            admin_mentions += f"{admin_role.mention} "
-        if mod_role:
-            admin_mentions += f"{mod_role.mention}"
+        admin_mentions = " ".join(role.mention for role in reversed(guild_metadata.staff_roles(ctx.guild)))
         
         await ticket_channel.send(f"{admin_mentions}\n{ctx.author.mention} {user.mention}", embed=embed, view=vouch_request_view)
         
@@ -320,11 +354,15 @@ class VouchCog(commands.Cog):
 
     @commands.command(name="sync_commands")
     @commands.has_permissions(administrator=True)
-    async def sync_commands(self, ctx):
-        """Force sync slash commands"""
+    async def sync_commands(self, ctx, mode: str = None):
+        """Sync slash commands that changed since the last sync
+        Usage: !sync_commands [force]"""
         try:
-            synced = await ctx.bot.tree.sync()
-            await ctx.send(f"✅ Synced {len(synced)} commands")
+            results = await ctx.bot.command_sync.sync(force=mode == "force")
+            if not results:
+                await ctx.send("✅ Commands already up to date")
+                return
+            await ctx.send("✅ Synced " + ", ".join(f"{count} {scope} commands" for scope, count in results.items()))
         except Exception as e:
             await ctx.send(f"❌ Error syncing commands: {str(e)}")
 
@@ -1,30 +0,0 @@
-import discord
-
-# Database configuration
-DB_PATH = "data/vouches.db"
-
-# Channel IDs
-CHANNELS = {
-    "trusted": {
-        "main": 1381504991491260528,
-        "pvp": 1393405064374390935,
-        "ironman": 1393405855700877394,
-        "gp": 1393727788112154745,
-    },
-    "public": {
-        "main": 1393407626490024038,
-        "pvp": 1393407738188660858,
-        "ironman": 1393407893411332217,
-        "gp": 1393727911743193239,
-    },
-    "create_trade": 1395778950353129472,
-    "archive": 1395791949969231945,
-    "vouch_post": 1383401756335149087
-}
-
-# Visual settings
-EMBED_COLOR = discord.Color.gold()
-BRANDING_IMAGE = "https://i.postimg.cc/ZYvXG4Ms/Runes-and-Relics.png"
-
-# Bot configuration
-COMMAND_PREFIX = "!"
\ No newline at end of file
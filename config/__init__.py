@@ -0,0 +1,75 @@
+import os
+import discord
+
+# Database configuration
+DB_PATH = "data/vouches.db"
+
+# Directory for the bot's SQLite databases and sync state
+DATA_DIR = os.getenv("DATA_DIR", "/app/data")
+
+# Channel IDs
+CHANNELS = {
+    "trusted": {
+        "main": 1381504991491260528,
+        "pvp": 1393405064374390935,
+        "ironman": 1393405855700877394,
+        "gp": 1393727788112154745,
+    },
+    "public": {
+        "main": 1393407626490024038,
+        "pvp": 1393407738188660858,
+        "ironman": 1393407893411332217,
+        "gp": 1393727911743193239,
+    },
+    "create_trade": 1395778950353129472,
+    "archive": 1395791949969231945,
+    "vouch_post": 1383401756335149087
+}
+
+# Visual settings
+EMBED_COLOR = discord.Color.gold()
+BRANDING_IMAGE = "https://i.postimg.cc/ZYvXG4Ms/Runes-and-Relics.png"
+
+# Bot configuration
+COMMAND_PREFIX = "!"
+
+# Metrics endpoint (Prometheus text format); set METRICS_PORT=0 to disable
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+# Logging; LOG_LEVELS overrides per subsystem, e.g. "render=DEBUG,discord.gateway=WARNING"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = {
+    name.strip(): level.strip()
+    for name, level in (pair.split("=", 1) for pair in os.getenv("LOG_LEVELS", "").split(",") if "=" in pair)
+}
+LOG_JSON = os.getenv("LOG_JSON", "").lower() in ("1", "true", "yes")
+
+# Roles given access to every ticket, and the substring that marks a trusted trader role
+STAFF_ROLES = ("Moderator", "Admin")
+TRUSTED_ROLE_MATCH = "trusted"
+
+# Gateway intents and member caching: "full", "lean" or "minimal" (see cogs/member_cache.py)
+CACHE_POLICY = os.getenv("CACHE_POLICY", "full").lower()
+
+# Per-scope hashes of the app commands last pushed to Discord; only changed scopes are synced
+COMMAND_HASH_PATH = os.getenv("COMMAND_HASH_PATH", os.path.join(DATA_DIR, "command_sync.json"))
+# Guilds with guild-only app commands, comma separated; global commands need nothing here
+COMMAND_GUILD_IDS = [int(guild_id) for guild_id in os.getenv("COMMAND_GUILD_IDS", "").split(",") if guild_id.strip()]
+
+# Concurrent workers for the persistent job queue (vouch finalization, archiving, cleanup, DMs)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+
+# Sharding. SHARDED=1 runs an AutoShardedBot in this process; the cluster launcher
+# (launcher.py) sets SHARD_COUNT/SHARD_IDS/CLUSTER_ID for each process it starts.
+SHARD_COUNT = int(os.environ["SHARD_COUNT"]) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = [int(shard_id) for shard_id in os.environ["SHARD_IDS"].split(",")] if os.getenv("SHARD_IDS") else None
+SHARDED = os.getenv("SHARDED", "").lower() in ("1", "true", "yes") or SHARD_COUNT is not None
+CLUSTER_ID = int(os.environ["CLUSTER_ID"]) if os.getenv("CLUSTER_ID") else None
+CLUSTER_IPC_PATH = os.getenv("CLUSTER_IPC_PATH")
+
+# Concurrent renders per process; the launcher divides its total between clusters
+RENDER_CONCURRENCY = int(os.getenv("RENDER_CONCURRENCY", "4"))
+
+# Keep in-progress listing selections in SQLite so they survive a restart (off: memory only)
+PERSIST_LISTING_SESSIONS = os.getenv("PERSIST_LISTING_SESSIONS", "").lower() in ("1", "true", "yes")
@@ -11,6 +11,9 @@ FONT_SIZES = {
 PFP_CONFIG = {
     'size': (70, 70),          # Size of the profile picture (width, height)
     'position': (25, 25),      # Position of profile picture (x, y from top-left)
+    'fetch_size': 256,         # Avatar size requested from Discord's CDN (a power of 2)
+    'mask_supersample': 4,     # Circle masks are drawn this many times larger, then reduced
+    'cache_size': 256,         # Finished avatar circles kept in memory, by avatar URL and size
 }
 
 # Text settings
@@ -71,4 +74,31 @@ GP_TEXT_CONFIG = {
         'font_size': GP_FONT_SIZES['payment'],
         'color': (255, 255, 255),  # White
     }
-}
\ No newline at end of file
+}
+
+# Showcase upload limits (applied before any image is decoded)
+SHOWCASE_UPLOAD_CONFIG = {
+    'max_images': 10,                  # Images shown on the showcase template (Discord's per-message limit)
+    'max_bytes': 10 * 1024 * 1024,     # Reject attachments larger than 10 MB
+    'max_pixels': 40_000_000,          # Reject images larger than ~40 megapixels
+    'max_decode_pixels': 16_000_000,   # Largest bitmap ever held in memory after draft decoding
+    'formats': ('JPEG', 'PNG', 'WEBP', 'GIF', 'BMP'),
+}
+
+# Showcase collage: tiles are laid out inside the frame of IMAGE_TEMPLATE.png
+SHOWCASE_LAYOUT = {
+    'area': (48, 20, 1152, 700),       # (left, top, right, bottom) inside the frame
+    'gutter': 20,                      # Space between tiles
+    'style': 'grid',                   # 'grid' (rows from grid_rows) or 'masonry' (columns by aspect ratio)
+    'grid_rows': {                     # Images per row, by image count
+        1: (1,), 2: (2,), 3: (3,), 4: (2, 2), 5: (3, 2),
+        6: (3, 3), 7: (4, 3), 8: (4, 4), 9: (3, 3, 3), 10: (4, 3, 3),
+    },
+}
+
+# Screenshot carousel on account listings
+CAROUSEL_CONFIG = {
+    'thumbnail_size': (1024, 1024),    # Thumbnails are stored at most this size
+    'thumbnail_quality': 85,           # JPEG quality of stored thumbnails
+    'debounce_seconds': 0.4,           # Clicks this close together become one message edit
+}
@@ -0,0 +1,179 @@
+"""Cluster launcher: runs the bot's shards in several processes on one machine.
+
+Each cluster is a main.py process with its own slice of shards, render slots
+and job workers. All clusters share the SQLite databases (WAL mode) and
+exchange cache invalidations through a Unix socket hub run by this launcher.
+Crashed clusters are restarted with backoff.
+
+Usage:
+    python launcher.py --clusters 4                        # shard count from Discord
+    python launcher.py --clusters 2 --shards 4
+    python launcher.py --clusters 2 --shards 4 --dry-run   # print the plan only
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+import aiohttp
+from cogs.cluster_ipc import ClusterHub
+from cogs.logs import setup_logging, get_logger
+from config import LOG_LEVEL, LOG_LEVELS, LOG_JSON, METRICS_PORT, RENDER_CONCURRENCY, JOB_WORKERS
+
+log = get_logger("cluster")
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Discord allows one IDENTIFY per 5 seconds unless the bot has a higher max_concurrency
+IDENTIFY_INTERVAL = 5
+
+
+async def recommended_shards(token):
+    """Shard count Discord recommends for this bot"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"}
+        ) as resp:
+            resp.raise_for_status()
+            return (await resp.json())["shards"]
+
+
+def plan_clusters(shard_count, clusters):
+    """Contiguous, evenly sized shard id lists, one per cluster"""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    plan, start = [], 0
+    for cluster_id in range(clusters):
+        end = start + size + (1 if cluster_id < extra else 0)
+        plan.append(list(range(start, end)))
+        start = end
+    return plan
+
+
+def cluster_env(cluster_id, shard_ids, shard_count, clusters, ipc_path):
+    """Environment for one cluster process: its shards plus its share of render slots and workers"""
+    env = dict(os.environ)
+    env.update({
+        "SHARD_COUNT": str(shard_count),
+        "SHARD_IDS": ",".join(map(str, shard_ids)),
+        "CLUSTER_ID": str(cluster_id),
+        "CLUSTER_IPC_PATH": ipc_path,
+        "RENDER_CONCURRENCY": str(max(1, RENDER_CONCURRENCY // clusters)),
+        "JOB_WORKERS": str(max(1, JOB_WORKERS // clusters)),
+        # One metrics port per cluster; 0 keeps the endpoint disabled
+        "METRICS_PORT": str(METRICS_PORT + cluster_id if METRICS_PORT else 0),
+    })
+    return env
+
+
+class Cluster:
+    """One main.py process, restarted with backoff when it exits unexpectedly"""
+
+    def __init__(self, cluster_id, shard_ids, env):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.env = env
+        self.process = None
+        self.stopping = False
+
+    async def run(self, start_delay=0):
+        await asyncio.sleep(start_delay)
+        failures = 0
+        while not self.stopping:
+            started = time.monotonic()
+            self.process = await asyncio.create_subprocess_exec(
+                sys.executable, os.path.join(ROOT, "main.py"), cwd=ROOT, env=self.env
+            )
+            log.info("Cluster %d started (pid %d, shards %s)", self.cluster_id, self.process.pid, self.shard_ids)
+            code = await self.process.wait()
+            if self.stopping:
+                break
+
+            # A cluster that stayed up for a while gets restarted right away
+            failures = 0 if time.monotonic() - started > 60 else failures + 1
+            delay = min(60, 2 ** failures) if failures else 1
+            log.error("Cluster %d exited with code %s, restarting in %ds", self.cluster_id, code, delay)
+            await asyncio.sleep(delay)
+
+    async def stop(self, timeout=20):
+        self.stopping = True
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.terminate()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            log.warning("Cluster %d did not stop in %ds, killing it", self.cluster_id, timeout)
+            self.process.kill()
+            await self.process.wait()
+
+
+async def launch(args):
+    shard_count = args.shards
+    if shard_count is None:
+        token = os.getenv("RELLY_DISCORD")
+        if not token:
+            log.error("Set RELLY_DISCORD or pass --shards")
+            return 1
+        shard_count = await recommended_shards(token)
+        log.info("Discord recommends %d shards", shard_count)
+
+    plan = plan_clusters(shard_count, args.clusters)
+    if args.dry_run:
+        print(json.dumps({
+            "shard_count": shard_count,
+            "clusters": [
+                {key: env[key] for key in ("CLUSTER_ID", "SHARD_IDS", "RENDER_CONCURRENCY", "JOB_WORKERS", "METRICS_PORT")}
+                for env in (cluster_env(i, shard_ids, shard_count, len(plan), args.ipc_path) for i, shard_ids in enumerate(plan))
+            ],
+        }, indent=2))
+        return 0
+
+    hub = ClusterHub(args.ipc_path)
+    await hub.start()
+
+    clusters = [
+        Cluster(cluster_id, shard_ids, cluster_env(cluster_id, shard_ids, shard_count, len(plan), args.ipc_path))
+        for cluster_id, shard_ids in enumerate(plan)
+    ]
+    # Stagger startup so the clusters' IDENTIFYs don't all hit the gateway at once
+    delays, elapsed = [], 0
+    for cluster in clusters:
+        delays.append(elapsed)
+        elapsed += len(cluster.shard_ids) * IDENTIFY_INTERVAL
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    tasks = [asyncio.create_task(cluster.run(delay)) for cluster, delay in zip(clusters, delays)]
+    log.info("Launching %d clusters for %d shards", len(clusters), shard_count)
+    await stop.wait()
+
+    log.info("Stopping clusters...")
+    await asyncio.gather(*(cluster.stop() for cluster in clusters))
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await hub.close()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the bot as several sharded processes")
+    parser.add_argument("--clusters", type=int, default=os.cpu_count() or 1, help="processes to run (default: CPU count)")
+    parser.add_argument("--shards", type=int, default=None, help="total shards (default: Discord's recommendation)")
+    parser.add_argument("--ipc-path", default=os.getenv("CLUSTER_IPC_PATH", "/tmp/relics-cluster.sock"))
+    parser.add_argument("--dry-run", action="store_true", help="print the cluster plan and exit")
+    args = parser.parse_args(argv)
+
+    setup_logging(LOG_LEVEL, LOG_LEVELS, json_output=LOG_JSON)
+    return asyncio.run(launch(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
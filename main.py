@@ -1,69 +1,103 @@
 import os
 import discord
 from discord.ext import commands, tasks
-import logging
 import asyncio
+from cogs.interaction_router import InteractionRouter
+from cogs.metrics import discord_trace_config
+from cogs.logs import setup_logging, get_logger
+from cogs.member_cache import gateway_options, command_prefix
+from cogs.command_sync import CommandSyncManager
+from cogs.jobs import job_queue
+from cogs.cluster import shard_options, is_primary_cluster
+from config import LOG_LEVEL, LOG_LEVELS, LOG_JSON, CACHE_POLICY, COMMAND_HASH_PATH, COMMAND_GUILD_IDS, SHARDED
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
+setup_logging(LOG_LEVEL, LOG_LEVELS, json_output=LOG_JSON)
+log = get_logger("bot")
 
-# Bot setup
-intents = discord.Intents.default()
-intents.message_content = True
-intents.guilds = True
-intents.members = True
+# Bot setup: intents, member cache flags and chunking come from CACHE_POLICY
+gateway = gateway_options(CACHE_POLICY)
 
-class CustomBot(commands.Bot):
+# SHARDED (or the cluster launcher) runs shards through AutoShardedBot
+BotBase = commands.AutoShardedBot if SHARDED else commands.Bot
+
+class CustomBot(BotBase):
     def __init__(self):
-        super().__init__(command_prefix="!", intents=intents)
+        super().__init__(command_prefix=command_prefix(CACHE_POLICY, "!"), http_trace=discord_trace_config(), **gateway, **shard_options())
         self.initial_extensions = [
+            'cogs.cluster',
+            'cogs.jobs',
+            'cogs.guild_cache',
             'cogs.vouch',
             'cogs.listings',
-            'cogs.tickets',
-            'cogs.test_layout'
+            'cogs.tickets'
+        ]
+        # Search, diagnostics and the metrics server are loaded after ready so they don't hold up login
+        self.deferred_extensions = [
+            'cogs.test_layout',
+            'cogs.search',
+            'cogs.perf'
         ]
+        self.deferred_load_task = None
+        # Single entry point for component interactions; cogs register their routes
+        self.interaction_router = InteractionRouter()
+        # Syncs app commands only for scopes whose commands changed since the last sync
+        self.command_sync = CommandSyncManager(self.tree, COMMAND_HASH_PATH, COMMAND_GUILD_IDS)
 
-    async def setup_hook(self):
-        # Load all cogs
-        for extension in self.initial_extensions:
+    async def load_extensions(self, extensions):
+        for extension in extensions:
             try:
                 await self.load_extension(extension)
-                print(f"✅ Loaded extension {extension}")
+                log.info("Loaded extension %s", extension)
             except Exception as e:
-                print(f"❌ Failed to load extension {extension}: {e}")
+                log.exception("Failed to load extension %s", extension)
+
+    async def setup_hook(self):
+        # Only the cogs that handle listings, tickets and vouches are loaded before login
+        await self.load_extensions(self.initial_extensions)
 
-        # Sync commands
+    async def finish_startup(self):
+        """Load the deferred cogs, then sync app commands against the complete tree"""
+        await self.load_extensions(self.deferred_extensions)
+        log.info("Registered commands: %s", ", ".join(command.name for command in self.commands))
+
+        # Sync commands only when the tree changed since the last deploy; commands are
+        # global, so under the launcher only cluster 0 syncs
+        if not is_primary_cluster():
+            return
         try:
-            print("Syncing commands...")
-            synced = await self.tree.sync()
-            print(f"✅ Synced {len(synced)} commands")
+            await self.command_sync.sync()
         except Exception as e:
-            print(f"❌ Error syncing commands: {e}")
+            log.error("Error syncing commands: %s", e)
 
     async def on_ready(self):
-        print(f"Logged in as {self.user} (ID: {self.user.id})")
-        print("------")
-        print("Registered commands:")
-        for command in self.commands:
-            print(f"- {command.name}")
-        print("------")
+        log.info("Logged in as %s (ID: %s)", self.user, self.user.id)
+
+        # on_ready fires again after a reconnect; the deferred cogs are only loaded once
+        if self.deferred_load_task is None:
+            self.deferred_load_task = asyncio.create_task(self.finish_startup())
         
-        # Start the daily cleanup task
-        self.daily_cleanup.start()
+        # Start the daily cleanup task; on_ready fires again after a reconnect
+        if not self.daily_cleanup.is_running():
+            self.daily_cleanup.start()
+
+    async def on_interaction(self, interaction: discord.Interaction):
+        await self.interaction_router.dispatch(interaction)
 
     @tasks.loop(hours=24)
     async def daily_cleanup(self):
-        """Run daily cleanup of old listings"""
+        """Queue the daily cleanup of old listings"""
         try:
-            # Get the listings cog
-            listings_cog = self.get_cog("Listings")
-            if listings_cog:
-                await listings_cog.cleanup_old_listings()
-                print("✅ Daily listing cleanup completed")
-            else:
-                print("❌ Listings cog not found for cleanup")
+            # Keyed by date so a restart on the same day doesn't queue it twice;
+            # one job per guild so it runs in the cluster that has the guild
+            today = discord.utils.utcnow().date().isoformat()
+            for guild in self.guilds:
+                await job_queue.enqueue("listing_cleanup", {"guild_id": guild.id},
+                                        key=f"listing_cleanup:{today}:{guild.id}", guild_id=guild.id)
+            removed = await asyncio.to_thread(job_queue.purge)
+            log.info("Daily listing cleanup queued, purged %d finished jobs", removed)
         except Exception as e:
-            print(f"❌ Error in daily cleanup: {str(e)}")
+            log.exception("Error in daily cleanup")
 
     @daily_cleanup.before_loop
     async def before_daily_cleanup(self):
@@ -76,15 +110,15 @@ class CustomBot(commands.Bot):
             next_run = next_run.replace(day=next_run.day + 1)
         await discord.utils.sleep_until(next_run)
 
-bot = CustomBot()
-
-@bot.event
-async def on_command_error(ctx, error):
-    if isinstance(error, commands.CommandNotFound):
-        print(f"Command not found: {ctx.message.content}")
-        print("Available commands:", [cmd.name for cmd in bot.commands])
-    else:
-        print(f"Error: {str(error)}")
+    async def on_command_error(self, ctx, error):
+        if isinstance(error, commands.CommandNotFound):
+            log.info("Command not found: %s", ctx.message.content)
+        else:
+            log.error("Command error in %s: %s", ctx.command, error)
 
-TOKEN = os.getenv("RELLY_DISCORD")
-bot.run(TOKEN)
\ No newline at end of file
+# Guarded so benchmarks can import CustomBot and run it against a fake Discord
+if __name__ == "__main__":
+    bot = CustomBot()
+    TOKEN = os.getenv("RELLY_DISCORD")
+    # Logging is already configured above, so stop discord.py from installing its own handler
+    bot.run(TOKEN, log_handler=None)